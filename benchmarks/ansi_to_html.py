@@ -0,0 +1,69 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import sys
+import time
+import resource
+
+from colorful import html
+from colorful.core import Colorful
+
+#: Holds the size of the converted log in bytes
+LOG_SIZE = 100 * 1000 * 1000
+
+#: Holds the size of the chunks fed to the converter
+CHUNK_SIZE = 64 * 1024
+
+
+def make_log_chunk():
+    colorful = Colorful(colormode=Colorful.ANSI_256_COLORS)
+    lines = []
+    size = 0
+    i = 0
+    while size < CHUNK_SIZE:
+        line = str(
+            colorful.dimmed('[{:05d}] '.format(i)) +
+            colorful.bold_green('PASSED') + ' tests/test_module.py::test_' +
+            colorful.blue('case_{}'.format(i)) + ' ' + colorful.yellow('<0.1s>') + '\n')
+        lines.append(line)
+        size += len(line)
+        i += 1
+    return ''.join(lines)
+
+
+def iter_log(chunk):
+    """
+    Iterate the chunks of a log of ``LOG_SIZE`` without holding it in memory
+    """
+    for _ in range(LOG_SIZE // len(chunk)):
+        yield chunk
+
+
+def main():
+    chunk = make_log_chunk()
+
+    for inline_styles in (False, True):
+        html_size = 0
+        start = time.perf_counter()
+        for html_chunk in html.ansi_to_html(iter_log(chunk), inline_styles=inline_styles):
+            html_size += len(html_chunk)
+        duration = time.perf_counter() - start
+        print('ansi_to_html(inline_styles={}): {:.0f} MB in {:.1f}s, {:.1f} MB/s -> {:.0f} MB'
+              .format(inline_styles, LOG_SIZE / 1e6, duration, LOG_SIZE / duration / 1e6,
+                      html_size / 1e6))
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':  # the maximum resident set size is in kilobytes on Linux
+        max_rss *= 1024
+    print('maximum resident set size: {:.1f} MB'.format(max_rss / 1e6))
+
+
+if __name__ == '__main__':
+    main()
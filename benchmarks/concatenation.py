@@ -0,0 +1,47 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import time
+
+from colorful.core import Colorful
+
+#: Holds the number of segments to concatenate
+SEGMENTS = 100000
+
+
+def build_with_augmented_assignment(colorful, fragments):
+    s = colorful.str('')
+    for fragment in fragments:
+        s += fragment
+    return str(s)
+
+
+def build_with_addition(colorful, fragments):
+    s = colorful.str('')
+    for fragment in fragments:
+        s = s + fragment
+    return str(s)
+
+
+def main():
+    colorful = Colorful(colormode=Colorful.TRUE_COLORS)
+    fragments = [colorful.bold_red('cell {} '.format(i)) for i in range(SEGMENTS)]
+
+    for name, build in [('s += fragment', build_with_augmented_assignment),
+                        ('s = s + fragment', build_with_addition)]:
+        start = time.perf_counter()
+        string = build(colorful, fragments)
+        duration = time.perf_counter() - start
+        print('{name}: {segments} segments ({size} characters) in {duration:.3f}s'.format(
+            name=name, segments=SEGMENTS, size=len(string), duration=duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import tracemalloc
+
+import colorful.colors as colors
+from colorful.core import Colorful
+
+#: Holds the number of instances to allocate
+INSTANCES = 100000
+
+
+def measure(create):
+    """
+    Measure the allocated bytes per instance returned by ``create``.
+    """
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    instances = [create(i) for i in range(INSTANCES)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # the list holding the instances is not part of the instance size
+    return (after - before - instances.__sizeof__()) / INSTANCES
+
+
+def measure_palette(load):
+    """
+    Measure the allocated bytes of the color palette returned by ``load``.
+    """
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    colorpalette = load()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return colorpalette, after - before
+
+
+def main():
+    colorful = Colorful(colormode=Colorful.TRUE_COLORS)
+    style = colorful.bold_red
+    cell = 'cell'
+
+    for name, create in [
+            ('ColorfulStyle',
+             lambda i: Colorful.ColorfulStyle(style.style, style.colormode, colorful)),
+            ('ColorfulString', lambda i: style(cell)),
+            ('ColorfulString (concatenated)', lambda i: style(cell) + ' ')]:
+        print('{name}: {size:.1f} bytes per instance'.format(name=name, size=measure(create)))
+
+    # the raw colors are parsed beforehand, thus, only the sanitized color palettes are measured
+    raw_colors = colors.parse_colors(Colorful.COLORNAMES_COLORS)
+    for name, load in [
+            ('color palette dict', lambda: colors.sanitize_color_palette(raw_colors)),
+            ('CompactColorPalette', lambda: colors.CompactColorPalette.from_color_palette(
+                colors.sanitize_color_palette(raw_colors)))]:
+        colorpalette, size = measure_palette(load)
+        print('{name} ({count} colors): {size:.0f} KiB, {per_color:.1f} bytes per color'.format(
+            name=name, count=len(colorpalette), size=size / 1024,
+            per_color=size / len(colorpalette)))
+
+
+if __name__ == '__main__':
+    main()
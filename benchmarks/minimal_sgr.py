@@ -0,0 +1,52 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+from colorful.core import Colorful
+
+#: Holds the size of the rendered table
+ROWS = 1000
+COLUMNS = 10
+
+
+def build_table(colorful):
+    """
+    Build a table where every cell is colored depending on its value.
+    """
+    table = colorful.str('')
+    for row in range(ROWS):
+        row_style = colorful.on_black if row % 2 else colorful.on_gray
+        line = colorful.str('')
+        for column in range(COLUMNS):
+            value = (row * 7 + column * 13) % 100
+            if value > 90:
+                style = colorful.bold_red
+            elif value > 50:
+                style = colorful.green
+            else:
+                style = colorful.white
+            line += style(' {:>3} '.format(value), nested=True)
+        table += row_style(line) + '\n'
+    return table
+
+
+def main():
+    colorful = Colorful(colormode=Colorful.TRUE_COLORS)
+    table = build_table(colorful)
+
+    for colormode in (Colorful.ANSI_16_COLORS, Colorful.ANSI_256_COLORS, Colorful.TRUE_COLORS):
+        full = len(table.render(colormode).encode('utf-8'))
+        minimal = len(table.render(colormode, minimal=True).encode('utf-8'))
+        print('color mode {colormode}: {full} bytes, minimal SGR {minimal} bytes '
+              '({saving:.0%} less)'.format(
+                  colormode=colormode, full=full, minimal=minimal, saving=1 - minimal / full))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import time
+import random
+
+import colorful.colors as colors
+from colorful.core import Colorful
+
+#: Holds the number of RGB values to look up
+LOOKUPS = 2000
+
+
+def linear_scan(colorpalette, to_point, rgb):
+    point = to_point(*rgb)
+    return min(colorpalette, key=lambda color: sum(
+        (a - b) ** 2 for a, b in zip(color[1], point)))[0]
+
+
+def main():
+    palette = colors.make_color_palette(Colorful.COLORNAMES_COLORS)
+    rng = random.Random(0)
+    rgbs = [(rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            for _ in range(LOOKUPS)]
+
+    for metric in sorted(colors.COLOR_METRICS):
+        to_point = colors.COLOR_METRICS[metric]
+        points = [(name, to_point(*rgb)) for name, rgb in palette.items()]
+
+        start = time.perf_counter()
+        for rgb in rgbs[:LOOKUPS // 20]:
+            linear_scan(points, to_point, rgb)
+        linear = (time.perf_counter() - start) / (LOOKUPS // 20)
+
+        start = time.perf_counter()
+        index = palette.nearest_color_index(metric)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for rgb in rgbs:
+            index.nearest(rgb)
+        indexed = (time.perf_counter() - start) / LOOKUPS
+
+        print('{metric} ({count} colors): linear scan {linear:.1f}us, index {indexed:.1f}us '
+              '({speedup:.0f}x faster), index built in {build:.1f}ms'.format(
+                  metric=metric, count=len(palette), linear=linear * 1e6, indexed=indexed * 1e6,
+                  speedup=linear / indexed, build=build * 1e3))
+
+
+if __name__ == '__main__':
+    main()
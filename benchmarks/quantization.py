@@ -0,0 +1,59 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import timeit
+
+import colorful.ansi as ansi
+import colorful.utils as utils
+
+#: Holds a gradient of RGB values like used to render a heatmap
+GRADIENT = [(r, (r * 7) % 256, 255 - r) for r in range(256)] * 16
+
+
+def quantize(rgb_to_ansi):
+    for r, g, b in GRADIENT:
+        rgb_to_ansi(r, g, b)
+
+
+#: Holds the ANSI 256 colors of the color cube and the grayscale ramp in the CIELAB color space
+ANSI256_LAB_COLORS = [(code, utils.rgb_to_lab(*ansi.ansi256_to_rgb(code)))
+                      for code in range(16, 256)]
+
+
+def perceptual_linear_scan(r, g, b):
+    """
+    Find the perceptually nearest ANSI 256 color by measuring the distance to every color.
+    """
+    lab = utils.rgb_to_lab(r, g, b)
+    return min(ANSI256_LAB_COLORS, key=lambda color: sum(
+        (x - y) ** 2 for x, y in zip(color[1], lab)))[0]
+
+
+def main():
+    for name, table_func, computed_func in [
+            ('rgb_to_ansi256', ansi.rgb_to_ansi256, ansi._rgb_to_ansi256),
+            ('rgb_to_ansi16', ansi.rgb_to_ansi16, ansi._rgb_to_ansi16)]:
+        computed = min(timeit.repeat(lambda: quantize(computed_func), number=20, repeat=5))
+        table = min(timeit.repeat(lambda: quantize(table_func), number=20, repeat=5))
+        print('{name}: computed {computed:.4f}s, lookup tables {table:.4f}s '
+              '({speedup:.1f}x faster)'.format(
+                  name=name, computed=computed, table=table, speedup=computed / table))
+
+    # the perceptual quantization memoizes the RGB values, thus, only the first
+    # quantization of a RGB value searches the index of the terminal colors.
+    linear = min(timeit.repeat(lambda: quantize(perceptual_linear_scan), number=1, repeat=3))
+    table = min(timeit.repeat(
+        lambda: quantize(ansi.rgb_to_ansi256_perceptual), number=20, repeat=5)) / 20
+    print('rgb_to_ansi256_perceptual: linear scan {linear:.4f}s, memoized index {table:.4f}s '
+          '({speedup:.0f}x faster)'.format(linear=linear, table=table, speedup=linear / table))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import os
+import time
+import tempfile
+
+import colorful.colors as colors
+from colorful.core import Colorful
+
+#: Holds the number of times every color palette is loaded
+LOADS = 20
+
+
+def measure(load):
+    """
+    Measure the seconds to load a color palette with ``load``.
+    """
+    start = time.perf_counter()
+    for _ in range(LOADS):
+        load()
+    return (time.perf_counter() - start) / LOADS
+
+
+def main():
+    # like a worker process would load the color palette
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ['COLORFUL_PALETTE_CACHE_DIR'] = cache_dir
+        colors.load_color_palette(Colorful.COLORNAMES_COLORS)
+
+        published = colors.SharedColorPalette.publish(Colorful.COLORNAMES_COLORS)
+        try:
+            for name, load in [
+                    ('parse color file', lambda: colors.sanitize_color_palette(
+                        colors.parse_colors(Colorful.COLORNAMES_COLORS))),
+                    ('load compiled color palette',
+                     lambda: colors.load_color_palette(Colorful.COLORNAMES_COLORS)),
+                    ('attach shared color palette',
+                     lambda: colors.SharedColorPalette.attach(published.name).close())]:
+                print('{name}: {duration:.2f}ms'.format(name=name, duration=measure(load) * 1e3))
+        finally:
+            published.unlink()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import io
+import time
+
+from colorful import ansi
+from colorful.core import Colorful
+
+#: Holds the number of log lines to strip
+LINES = 100000
+
+
+def make_log():
+    colorful = Colorful(colormode=Colorful.TRUE_COLORS)
+    lines = []
+    for i in range(LINES):
+        lines.append(str(
+            colorful.dimmed('2017-01-01 12:00:{:02d} '.format(i % 60)) +
+            colorful.bold_green('INFO') + ' ' +
+            colorful.blue('worker-{}'.format(i % 8)) + ' processed request ' +
+            colorful.underlined('#{}'.format(i)) + '\n'))
+    return ''.join(lines)
+
+
+def measure(name, size, function):
+    start = time.perf_counter()
+    function()
+    duration = time.perf_counter() - start
+    print('{name}: {rate:.1f} MB/s'.format(name=name, rate=size / duration / 1e6))
+
+
+def main():
+    log = make_log()
+    size = len(log)
+    print('log: {:.1f} MB, {} lines'.format(size / 1e6, LINES))
+
+    measure('strip_ansi', size, lambda: ansi.strip_ansi(log))
+    measure('visible_len', size, lambda: ansi.visible_len(log))
+    measure('strip_ansi_stream (file)', size,
+            lambda: sum(1 for _ in ansi.strip_ansi_stream(io.StringIO(log))))
+    measure('strip_ansi_stream (lines)', size,
+            lambda: sum(1 for _ in ansi.strip_ansi_stream(io.StringIO(log).readlines())))
+
+
+if __name__ == '__main__':
+    main()
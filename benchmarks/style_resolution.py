@@ -0,0 +1,50 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import time
+
+import colorful.core as core
+import colorful.colors as colors
+import colorful.terminal as terminal
+
+#: Holds the color modes which are switched between
+COLORMODES = (terminal.ANSI_16_COLORS, terminal.ANSI_256_COLORS, terminal.TRUE_COLORS)
+
+
+def resolve_without_index(styles, colorpalette, colormode):
+    for style in styles:
+        core.render_style(core.parse_style(style, colorpalette), colormode)
+
+
+def resolve_with_index(styles, colorpalette, colormode):
+    for style in styles:
+        core.resolve_style(style, colormode, colorpalette)
+
+
+def main():
+    colorpalette = colors.make_color_palette(core.COLORNAMES_COLORS_PATH)
+    names = list(colorpalette)
+    styles = ['bold_{}_on_{}'.format(name, names[-i - 1]) for i, name in enumerate(names)]
+
+    for name, resolve in [('without ANSI code index', resolve_without_index),
+                          ('with ANSI code index', resolve_with_index)]:
+        # every round resolves all styles in every color mode like
+        # a style cache would after switching the color mode.
+        start = time.perf_counter()
+        for _ in range(3):
+            for colormode in COLORMODES:
+                resolve(styles, colorpalette, colormode)
+        duration = time.perf_counter() - start
+        print('{name}: {rate:.0f} styles/s'.format(
+            name=name, rate=3 * len(COLORMODES) * len(styles) / duration))
+
+
+if __name__ == '__main__':
+    main()
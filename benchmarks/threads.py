@@ -0,0 +1,64 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import sys
+import time
+import threading
+
+from colorful.core import Colorful
+
+#: Holds the number of styled strings every thread creates
+STRINGS_PER_THREAD = 100000
+
+#: Holds the thread counts to benchmark
+THREAD_COUNTS = (1, 2, 4, 8, 16)
+
+#: Holds the styles which are resolved by the threads
+STYLES = ('red', 'bold_green', 'italic_blue_on_white', 'underlined_magenta', 'cyan')
+
+
+def style_strings(colorful, barrier):
+    barrier.wait()
+    for i in range(STRINGS_PER_THREAD):
+        str(getattr(colorful, STYLES[i % len(STYLES)])('x'))
+
+
+def run(colorful, thread_count):
+    barrier = threading.Barrier(thread_count + 1)
+    threads = [
+        threading.Thread(target=style_strings, args=(colorful, barrier))
+        for _ in range(thread_count)
+    ]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print('Python {} (GIL {})'.format(
+        sys.version.split()[0], 'enabled' if is_gil_enabled else 'disabled'))
+
+    colorful = Colorful(colormode=Colorful.TRUE_COLORS)
+    for thread_count in THREAD_COUNTS:
+        duration = run(colorful, thread_count)
+        print('{threads:>2} threads: {rate:>12,.0f} styled strings/s'.format(
+            threads=thread_count, rate=thread_count * STRINGS_PER_THREAD / duration))
+
+    print(colorful.style_cache_info())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import io
+import os
+import time
+
+from colorful.core import Colorful
+
+#: Holds the number of lines to write
+LINES = 100000
+
+
+class CountingFileIO(io.FileIO):
+    """
+    Unbuffered file which counts the write syscalls
+    """
+    write_calls = 0
+
+    def write(self, data):
+        self.write_calls += 1
+        return super().write(data)
+
+
+def open_line_buffered_devnull():
+    raw = CountingFileIO(os.devnull, 'w')
+    return raw, io.TextIOWrapper(raw, encoding='utf-8', line_buffering=True)
+
+
+def write_with_print(colorful, file):
+    for i in range(LINES):
+        colorful.print(colorful.bold_red('line'), colorful.green(str(i)), file=file)
+
+
+def write_with_writer(colorful, file):
+    with colorful.writer(file) as writer:
+        for i in range(LINES):
+            writer.print(colorful.bold_red('line'), colorful.green(str(i)))
+
+
+def main():
+    colorful = Colorful(colormode=Colorful.TRUE_COLORS)
+
+    for name, write in [('Colorful.print', write_with_print),
+                        ('Colorful.writer', write_with_writer)]:
+        raw, file = open_line_buffered_devnull()
+        start = time.perf_counter()
+        write(colorful, file)
+        file.flush()
+        duration = time.perf_counter() - start
+        print('{name}: {lines} lines with {writes} write syscalls in {duration:.3f}s'.format(
+            name=name, lines=LINES, writes=raw.write_calls, duration=duration))
+        file.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -10,19 +10,18 @@ Terminal string styling done right, in Python.
 
 import os
 import sys
-import copy
 import types
-import platform
 from contextlib import contextmanager
 
 from .core import Colorful
+from .ansi import strip_ansi, visible_len, strip_ansi_stream  # noqa: F401
 from . import terminal
 
 #: Holds the current version
 __version__ = '0.5.8'
 
 # if we are on Windows we have to init colorama
-if platform.system() == 'Windows':
+if sys.platform == 'win32':
     os.system('color')
 
 
@@ -39,10 +38,14 @@ class ColorfulModule(types.ModuleType):
     def with_setup(self, colormode=None, colorpalette=None, extend_colors=False):
         """
         Return a new Colorful object with the given color config.
+
+        The color palettes are immutable, thus, the new Colorful object
+        shares the color palette instead of copying it.
         """
         colorful = Colorful(
             colormode=self.colorful.colormode,
-            colorpalette=copy.copy(self.colorful.colorpalette)
+            colorpalette=self.colorful.colorpalette,
+            quantization=self.colorful.quantization
         )
 
         colorful.setup(
@@ -54,42 +57,48 @@ class ColorfulModule(types.ModuleType):
     def with_8_ansi_colors(self):
         yield Colorful(
             colormode=terminal.ANSI_8_COLORS,
-            colorpalette=copy.copy(self.colorful.colorpalette)
+            colorpalette=self.colorful.colorpalette,
+            quantization=self.colorful.quantization
         )
 
     @contextmanager
     def with_16_ansi_colors(self):
         yield Colorful(
             colormode=terminal.ANSI_16_COLORS,
-            colorpalette=copy.copy(self.colorful.colorpalette)
+            colorpalette=self.colorful.colorpalette,
+            quantization=self.colorful.quantization
         )
 
     @contextmanager
     def with_256_ansi_colors(self):
         yield Colorful(
             colormode=terminal.ANSI_256_COLORS,
-            colorpalette=copy.copy(self.colorful.colorpalette)
+            colorpalette=self.colorful.colorpalette,
+            quantization=self.colorful.quantization
         )
 
     @contextmanager
     def with_true_colors(self):
         yield Colorful(
             colormode=terminal.TRUE_COLORS,
-            colorpalette=copy.copy(self.colorful.colorpalette)
+            colorpalette=self.colorful.colorpalette,
+            quantization=self.colorful.quantization
         )
 
     @contextmanager
     def with_palette(self, colorpalette):
         yield Colorful(
             colormode=self.colorful.colormode,
-            colorpalette=colorpalette
+            colorpalette=colorpalette,
+            quantization=self.colorful.quantization
         )
 
     @contextmanager
     def with_updated_palette(self, colorpalette):
         colorful = Colorful(
             colormode=self.colorful.colormode,
-            colorpalette=copy.copy(self.colorful.colorpalette),
+            colorpalette=self.colorful.colorpalette,
+            quantization=self.colorful.quantization
         )
         colorful.update_palette(colorpalette)
         yield colorful
@@ -99,6 +108,7 @@ class ColorfulModule(types.ModuleType):
         colorful = Colorful(
             colormode=self.colorful.colormode,
             colorpalette={},
+            quantization=self.colorful.quantization
         )
         colorful.use_style(style_name)
         yield colorful
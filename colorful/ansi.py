@@ -8,6 +8,7 @@ Terminal string styling done right, in Python.
 :license: MIT, see LICENSE for more details.
 """
 
+import re
 import math
 
 # For the ANSI escape code sequences please consult
@@ -45,8 +46,61 @@ CSI = '\033['
 #: Holds the base ANSI escape code
 ANSI_ESCAPE_CODE = '{csi}{{code}}m'.format(csi=CSI)
 
+#: Holds the prebuilt ANSI escape codes for the SGR codes of the modifiers
+#  and the ANSI 8 and ANSI 16 fore- and background colors.
+SGR_ESCAPE_CODES = {code: ANSI_ESCAPE_CODE.format(code=code) for code in range(108)}
+
+#: Holds the ANSI escape codes for the ANSI 256 colors by fore- and background
+#  color offset. They are built on first use to keep ``import colorful`` cheap.
+ANSI256_ESCAPE_CODES = {FOREGROUND_COLOR_OFFSET: {}, BACKGROUND_COLOR_OFFSET: {}}
+
+#: Holds the prebuilt start and end ANSI escape codes for the modifiers
+MODIFIER_ESCAPE_CODES = {
+    name: (SGR_ESCAPE_CODES[start_code], SGR_ESCAPE_CODES[end_code])
+    for name, (start_code, end_code) in MODIFIERS.items()
+}
+
 #: Holds the placeholder for the nest indicators
-NEST_PLACEHOLDER = ANSI_ESCAPE_CODE.format(code=26)
+NEST_PLACEHOLDER = SGR_ESCAPE_CODES[26]
+
+
+def sgr_escape_code(code):
+    """
+    Get the ANSI escape code for the given SGR code
+    """
+    escape_code = SGR_ESCAPE_CODES.get(code)
+    if escape_code is None:  # the SGR code is not prebuilt
+        escape_code = ANSI_ESCAPE_CODE.format(code=code)
+    return escape_code
+
+
+def ansi256_escape_code(code, offset):
+    """
+    Get the ANSI escape code for the given ANSI 256 color code
+
+    :param int code: the ANSI 256 color code
+    :param int offset: the fore- or background color offset
+    """
+    escape_codes = ANSI256_ESCAPE_CODES.get(offset)
+    if escape_codes is None:
+        escape_codes = {}
+
+    escape_code = escape_codes.get(code)
+    if escape_code is None:
+        escape_code = ANSI_ESCAPE_CODE.format(
+            code='{base};5;{code}'.format(base=8 + offset, code=code))
+        if 0 <= code < 256:
+            escape_codes[code] = escape_code
+    return escape_code
+
+
+def true_color_escape_code(r, g, b, offset):
+    """
+    Get the ANSI escape code for the given true color
+
+    :param int offset: the fore- or background color offset
+    """
+    return '{csi}{base};2;{r};{g};{b}m'.format(csi=CSI, base=8 + offset, r=r, g=g, b=b)
 
 
 def round(value):
@@ -56,9 +110,9 @@ def round(value):
     return int(math.ceil(value))
 
 
-def rgb_to_ansi256(r, g, b):
+def _rgb_to_ansi256(r, g, b):
     """
-    Convert RGB to ANSI 256 color
+    Compute the ANSI 256 color for the given RGB value.
     """
     if r == g and g == b:
         if r < 8:
@@ -75,9 +129,9 @@ def rgb_to_ansi256(r, g, b):
     return ansi
 
 
-def rgb_to_ansi16(r, g, b, use_bright=False):
+def _rgb_to_ansi16(r, g, b, use_bright=False):
     """
-    Convert RGB to ANSI 16 color
+    Compute the ANSI 16 color for the given RGB value.
     """
     ansi_b = round(b / 255.0) << 2
     ansi_g = round(g / 255.0) << 1
@@ -85,3 +139,466 @@ def rgb_to_ansi16(r, g, b, use_bright=False):
     ansi = (90 if use_bright else 30) + (ansi_b | ansi_g | ansi_r)
 
     return ansi
+
+
+#: Holds the lookup tables to quantize a RGB channel value to the 6x6x6 ANSI 256 color cube.
+#  The values are already weighted by the position of the channel in the cube
+#  and the red channel table contains the offset of the cube within the 256 colors.
+#  The tables are computed with integer arithmetic which rounds exactly like ``round``
+#  because no channel value lies halfway between two levels.
+ANSI256_RED_TABLE = {v: 16 + 36 * ((10 * v + 255) // 510) for v in range(256)}
+ANSI256_GREEN_TABLE = {v: 6 * ((10 * v + 255) // 510) for v in range(256)}
+ANSI256_BLUE_TABLE = {v: (10 * v + 255) // 510 for v in range(256)}
+
+#: Holds the lookup table to quantize a gray RGB value to the ANSI 256 grayscale ramp
+ANSI256_GRAYSCALE_TABLE = {
+    v: 16 if v < 8 else 231 if v > 248 else 232 + (48 * (v - 8) + 247) // 494 for v in range(256)
+}
+
+#: Holds the lookup tables to quantize a RGB channel value to the ANSI 16 color bits
+ANSI16_RED_TABLE = {v: int(v >= 128) for v in range(256)}
+ANSI16_GREEN_TABLE = {v: int(v >= 128) << 1 for v in range(256)}
+ANSI16_BLUE_TABLE = {v: int(v >= 128) << 2 for v in range(256)}
+
+
+def rgb_to_ansi256(r, g, b):
+    """
+    Convert RGB to ANSI 256 color
+    """
+    try:
+        if r == g and g == b:
+            return ANSI256_GRAYSCALE_TABLE[r]
+
+        return ANSI256_RED_TABLE[r] + ANSI256_GREEN_TABLE[g] + ANSI256_BLUE_TABLE[b]
+    except KeyError:  # the channel values are out of the lookup tables range
+        return _rgb_to_ansi256(r, g, b)
+
+
+def rgb_to_ansi16(r, g, b, use_bright=False):
+    """
+    Convert RGB to ANSI 16 color
+    """
+    try:
+        ansi = ANSI16_BLUE_TABLE[b] | ANSI16_GREEN_TABLE[g] | ANSI16_RED_TABLE[r]
+    except KeyError:  # the channel values are out of the lookup tables range
+        return _rgb_to_ansi16(r, g, b, use_bright)
+
+    return (90 if use_bright else 30) + ansi
+
+
+#: Holds the compiled regular expressions by their source.
+#  The regular expressions are compiled on first use to keep ``import colorful`` cheap.
+_patterns = {}
+
+
+def _pattern(regex):
+    """
+    Get the compiled pattern of the given regular expression.
+
+    :param str regex: the regular expression
+
+    :returns re.Pattern: the compiled pattern
+    """
+    pattern = _patterns.get(regex)
+    if pattern is None:
+        pattern = _patterns[regex] = re.compile(regex)
+    return pattern
+
+
+#: Holds the regular expression to match SGR escape code sequences
+SGR_ESCAPE_CODE_REGEX = r'\033\[([0-9;]*)m'
+
+#: Holds the SGR codes of the modifiers mapped to the SGR code which resets them
+MODIFIER_RESET_CODES = {start_code: end_code for start_code, end_code in MODIFIERS.values()
+                        if start_code != MODIFIERS['reset'][0]}
+
+#: Holds the SGR state of a terminal without any styles.
+#  A SGR state is a ``(modifiers, foreground, background, untracked)`` tuple.
+#  The modifiers are a frozenset of the active modifier SGR codes and
+#  the fore- and background colors are tuples of the SGR parameters
+#  which set the color or ``None`` for the default color.
+#  The SGR parameters which are not tracked, like unknown SGR codes,
+#  are collected in the untracked tuple until the next reset.
+DEFAULT_SGR_STATE = (frozenset(), None, None, ())
+
+
+def apply_sgr_params(state, params):
+    """
+    Apply the given SGR parameters to the given SGR state.
+
+    :param tuple state: the SGR state. See ``DEFAULT_SGR_STATE``
+    :param str params: the ``;`` separated SGR parameters of an SGR escape code sequence
+
+    :returns tuple: the new SGR state
+    """
+    modifiers, foreground, background, untracked = state
+
+    params = params.split(';')
+    index = 0
+    while index < len(params):
+        param = params[index]
+        code = int(param) if param else 0
+        index += 1
+
+        if code == 0:
+            modifiers, foreground, background, untracked = DEFAULT_SGR_STATE
+        elif code in MODIFIER_RESET_CODES:
+            modifiers = modifiers | {code}
+        elif code in MODIFIER_RESET_CODES.values():
+            modifiers = frozenset(m for m in modifiers if MODIFIER_RESET_CODES[m] != code)
+        elif 30 <= code <= 37 or 90 <= code <= 97:
+            foreground = (str(code),)
+        elif 40 <= code <= 47 or 100 <= code <= 107:
+            background = (str(code),)
+        elif code == FOREGROUND_COLOR_OFFSET + COLOR_CLOSE_OFFSET:
+            foreground = None
+        elif code == BACKGROUND_COLOR_OFFSET + COLOR_CLOSE_OFFSET:
+            background = None
+        elif code in (38, 48):
+            # extended colors are either ``5;<n>`` or ``2;<r>;<g>;<b>``
+            length = {'5': 2, '2': 4}.get(params[index] if index < len(params) else None)
+            if length is None or index + length > len(params):
+                untracked += tuple(str(int(p or 0)) for p in params[index - 1:])
+                break
+
+            color = (str(code),) + tuple(str(int(p or 0)) for p in params[index:index + length])
+            index += length
+            if code == 38:
+                foreground = color
+            else:
+                background = color
+        elif code == 26:
+            pass  # the nest placeholder has no effect on the terminal
+        else:
+            untracked += (str(code),)
+
+    return modifiers, foreground, background, untracked
+
+
+def sgr_state_params(state):
+    """
+    Get the SGR parameters to set the given SGR state from the default SGR state.
+    """
+    modifiers, foreground, background, untracked = state
+    params = [str(code) for code in sorted(modifiers)]
+    if foreground is not None:
+        params.extend(foreground)
+    if background is not None:
+        params.extend(background)
+    params.extend(untracked)
+    return params
+
+
+def sgr_state_diff(old_state, new_state):
+    """
+    Get the fewest SGR parameters to change the old SGR state into the new SGR state.
+    """
+    if old_state == new_state:
+        return []
+
+    old_modifiers, old_foreground, old_background, old_untracked = old_state
+    new_modifiers, new_foreground, new_background, new_untracked = new_state
+
+    # resetting everything and setting the new state
+    reset_params = ['0'] + sgr_state_params(new_state)
+
+    # untracked SGR parameters can only be removed by resetting everything
+    if new_untracked[:len(old_untracked)] != old_untracked:
+        return reset_params
+
+    # resetting a modifier might reset other modifiers, too. For example
+    # ``22`` resets bold and dimmed, thus, they have to be set again.
+    reset_codes = sorted({MODIFIER_RESET_CODES[m] for m in old_modifiers - new_modifiers})
+    kept_modifiers = frozenset(
+        m for m in old_modifiers if MODIFIER_RESET_CODES[m] not in reset_codes)
+
+    params = [str(code) for code in reset_codes]
+    params.extend(str(code) for code in sorted(new_modifiers - kept_modifiers))
+    if old_foreground != new_foreground:
+        if new_foreground is None:
+            params.append(str(FOREGROUND_COLOR_OFFSET + COLOR_CLOSE_OFFSET))
+        else:
+            params.extend(new_foreground)
+    if old_background != new_background:
+        if new_background is None:
+            params.append(str(BACKGROUND_COLOR_OFFSET + COLOR_CLOSE_OFFSET))
+        else:
+            params.extend(new_background)
+    params.extend(new_untracked[len(old_untracked):])
+
+    if len(';'.join(reset_params)) < len(';'.join(params)):
+        return reset_params
+
+    return params
+
+
+def minimize_sgr(string):
+    """
+    Minimize the SGR escape code sequences in the given string.
+
+    The SGR state of the terminal is tracked across the whole string and
+    only the changes in the state are emitted right before the text they apply to.
+    All changes are merged into a single SGR escape code sequence.
+    The terminal is assumed to be in the default SGR state at the beginning of the string.
+    The nest placeholders are removed.
+
+    :param str string: the string containing SGR escape code sequences
+
+    :returns str: the string with the minimal SGR escape code sequences
+    """
+    parts = []
+    state = target_state = DEFAULT_SGR_STATE
+
+    position = 0
+    for match in _pattern(SGR_ESCAPE_CODE_REGEX).finditer(string):
+        if match.start() > position:
+            params = sgr_state_diff(state, target_state)
+            if params:
+                parts.append('{csi}{params}m'.format(csi=CSI, params=';'.join(params)))
+            parts.append(string[position:match.start()])
+            state = target_state
+
+        target_state = apply_sgr_params(target_state, match.group(1))
+        position = match.end()
+
+    params = sgr_state_diff(state, target_state)
+    if params:
+        parts.append('{csi}{params}m'.format(csi=CSI, params=';'.join(params)))
+    parts.append(string[position:])
+
+    return ''.join(parts)
+
+
+#: Holds the regular expression to match ANSI escape sequences.
+#  It matches CSI sequences (like SGR escape codes), OSC sequences (like
+#  hyperlinks and window titles), DCS, SOS, PM and APC strings and all
+#  other two or more character escape sequences. Unterminated sequences
+#  are not matched.
+ANSI_ESCAPE_SEQUENCE_REGEX = (
+    r'\033(?:'
+    r'\[[0-?]*[ -/]*[@-~]|'
+    r'\][^\007\033]*(?:\007|\033\\)|'
+    r'[PX^_][^\033]*\033\\|'
+    r'[ -/]+[0-~]|'
+    r'[0-OQ-WYZ\\`-~])')
+
+#: Holds the regular expression to match the beginning of an ANSI escape sequence
+#  which is cut off at the end of a string. See ``ANSI_ESCAPE_SEQUENCE_REGEX``.
+INCOMPLETE_ANSI_ESCAPE_SEQUENCE_REGEX = (
+    r'\033(?:'
+    r'\[[0-?]*[ -/]*|'
+    r'\][^\007\033]*\033?|'
+    r'[PX^_][^\033]*\033?|'
+    r'[ -/]*)\Z')
+
+#: Holds the maximum length of an incomplete ANSI escape sequence which is
+#  held back by ``strip_ansi_stream`` until the next chunk completes it.
+MAX_INCOMPLETE_ANSI_ESCAPE_SEQUENCE_LENGTH = 4096
+
+#: Holds the number of characters read at once from a file by ``strip_ansi_stream``
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def strip_ansi(string):
+    """
+    Strip all ANSI escape sequences from the given string.
+
+    :param str string: the string containing ANSI escape sequences
+
+    :returns str: the string without ANSI escape sequences
+    """
+    return _pattern(ANSI_ESCAPE_SEQUENCE_REGEX).sub('', str(string))
+
+
+def visible_len(string):
+    """
+    Get the length of the given string without its ANSI escape sequences.
+
+    In contrast to ``len()`` of a ``str`` with ANSI escape sequences
+    it's the number of characters visible on the terminal - like
+    ``len()`` of a ``ColorfulString``.
+
+    :param str string: the string containing ANSI escape sequences
+
+    :returns int: the length of the string without ANSI escape sequences
+    """
+    return len(strip_ansi(string))
+
+
+def split_incomplete_escape_sequence(string):
+    """
+    Split an incomplete ANSI escape sequence off the end of the given string.
+
+    :param str string: the string which might end with an incomplete ANSI escape sequence
+
+    :returns tuple: the string without the incomplete ANSI escape sequence and
+                    the incomplete ANSI escape sequence which might be empty
+    """
+    start = -MAX_INCOMPLETE_ANSI_ESCAPE_SEQUENCE_LENGTH
+    position = string.rfind('\033', start)
+    if position == -1:
+        return string, ''
+
+    pattern = _pattern(INCOMPLETE_ANSI_ESCAPE_SEQUENCE_REGEX)
+    if position == len(string) - 1:
+        # a trailing ESC might be the beginning of the ST
+        # which terminates an OSC, DCS, SOS, PM or APC string
+        previous = string.rfind('\033', start, position)
+        if previous != -1 and pattern.match(string, previous):
+            position = previous
+    elif not pattern.match(string, position):
+        return string, ''
+
+    return string[:position], string[position:]
+
+
+def iter_chunks(iterable_or_file):
+    """
+    Iterate the chunks of the given iterable of strings or text file.
+
+    :param iterable_or_file: the iterable of strings or the text file.
+                             A file is read in chunks of ``STREAM_CHUNK_SIZE``.
+    """
+    read = getattr(iterable_or_file, 'read', None)
+    if read is not None:
+        return iter(lambda: read(STREAM_CHUNK_SIZE), '')
+
+    return iter(iterable_or_file)
+
+
+def strip_ansi_stream(iterable_or_file):
+    """
+    Strip all ANSI escape sequences from the given stream of strings.
+
+    ANSI escape sequences which are split across chunks are
+    stripped, too. Only a single chunk is held in memory.
+
+    :param iterable_or_file: the iterable of strings or the text file.
+                             A file is read in chunks of ``STREAM_CHUNK_SIZE``.
+
+    :returns: a generator of the stripped chunks
+    """
+    pattern = _pattern(ANSI_ESCAPE_SEQUENCE_REGEX)
+    incomplete = ''
+    for chunk in iter_chunks(iterable_or_file):
+        chunk, incomplete = split_incomplete_escape_sequence(incomplete + chunk)
+        chunk = pattern.sub('', chunk)
+        if chunk:
+            yield chunk
+
+    if incomplete:
+        yield incomplete
+
+
+#: Holds the RGB values of the default xterm ANSI 16 colors.
+#  The normal colors are followed by the bright colors.
+ANSI16_RGB_COLORS = (
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0),
+    (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+    (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+)
+
+#: Holds the channel values of the 6x6x6 ANSI 256 color cube
+ANSI256_CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+
+
+def ansi256_to_rgb(code):
+    """
+    Convert the given ANSI 256 color to RGB.
+
+    The ANSI 16 colors (0-15) are mapped to the default xterm colors.
+
+    :param int code: the ANSI 256 color
+
+    :returns tuple: the ``(red, green, blue)`` channel values
+    """
+    if code < 16:
+        return ANSI16_RGB_COLORS[code]
+
+    if code < 232:
+        code -= 16
+        return (ANSI256_CUBE_LEVELS[code // 36],
+                ANSI256_CUBE_LEVELS[code // 6 % 6],
+                ANSI256_CUBE_LEVELS[code % 6])
+
+    gray = 8 + (code - 232) * 10
+    return gray, gray, gray
+
+
+#: Holds the methods to quantize RGB values to ANSI 256 and ANSI 16 colors.
+#  The ``cube`` quantization snaps every channel on its own to the ANSI 256 color cube
+#  or the ANSI 16 color bits. The ``perceptual`` quantization picks the terminal color
+#  with the smallest perceptual color difference in the CIELAB color space.
+QUANTIZATION_CUBE = 'cube'
+QUANTIZATION_PERCEPTUAL = 'perceptual'
+QUANTIZATIONS = (QUANTIZATION_CUBE, QUANTIZATION_PERCEPTUAL)
+
+#: Holds the maximum number of RGB values memoized per perceptual quantization table
+MAX_PERCEPTUAL_QUANTIZATION_TABLE_SIZE = 65536
+
+#: Holds the indexes of the terminal colors and the memoized quantized RGB values
+#  of the perceptual quantization by the number of terminal colors.
+#  The indexes are built on first use.
+_perceptual_quantization_indexes = {}
+_perceptual_quantization_tables = {256: {}, 16: {}, 8: {}}
+
+
+def _get_perceptual_quantization_index(count):
+    try:
+        return _perceptual_quantization_indexes[count]
+    except KeyError:
+        pass
+
+    if count == 256:
+        # the ANSI 16 colors depend on the terminal theme, thus, only the
+        # colors of the color cube and the grayscale ramp are candidates.
+        terminal_colors = ((code, ansi256_to_rgb(code)) for code in range(16, 256))
+    else:
+        terminal_colors = enumerate(ANSI16_RGB_COLORS[:count])
+
+    # ``colors`` is imported on first use because only the perceptual quantization needs it
+    from . import colors
+
+    index = _perceptual_quantization_indexes[count] = colors.NearestColorIndex(
+        terminal_colors, colors.METRIC_LAB)
+    return index
+
+
+def _quantize_perceptually(r, g, b, count):
+    table = _perceptual_quantization_tables[count]
+    try:
+        return table[r, g, b]
+    except KeyError:
+        pass
+
+    if len(table) >= MAX_PERCEPTUAL_QUANTIZATION_TABLE_SIZE:
+        table.clear()
+
+    code = table[r, g, b] = _get_perceptual_quantization_index(count).nearest((r, g, b))
+    return code
+
+
+def rgb_to_ansi256_perceptual(r, g, b):
+    """
+    Convert RGB to the perceptually nearest ANSI 256 color.
+
+    The RGB values are memoized, thus, a repeated conversion is a table lookup.
+    """
+    return _quantize_perceptually(r, g, b, 256)
+
+
+def rgb_to_ansi16_perceptual(r, g, b, bright_colors=True):
+    """
+    Convert RGB to the perceptually nearest ANSI 16 color.
+
+    The ANSI 16 colors are assumed to be the default xterm colors.
+
+    :param bool bright_colors: if the bright colors are candidates, too
+
+    :returns int: the SGR code of the foreground color
+    """
+    code = _quantize_perceptually(r, g, b, 16 if bright_colors else 8)
+    if code >= 8:
+        return 90 + code - 8
+    return 30 + code
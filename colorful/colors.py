@@ -8,10 +8,564 @@ Terminal string styling done right, in Python.
 :license: MIT, see LICENSE for more details.
 """
 
-import json
+import os
+import sys
+import math
+import collections.abc
 
 from . import utils
 
+#: Holds the magic bytes which identify a compiled color palette file
+COMPILED_PALETTE_MAGIC = b'CFPAL\x00\x00\x01'
+
+#: Holds the ``struct`` format of the header of a compiled color palette file.
+#  It consists of the magic bytes, the modification time in nanoseconds
+#  and the size of the source color file, the length of the source path,
+#  the number of colors and the length of the color names blob.
+#  The header is followed by the source path, the newline separated color names
+#  and the RGB channels of all colors as one byte per channel.
+COMPILED_PALETTE_HEADER_FORMAT = '<8sqQIII'
+
+#: Holds the ``struct.Struct`` for the header of a compiled color palette file.
+#  It's created on first use to keep ``import colorful`` cheap.
+_compiled_palette_header = None
+
+#: Holds the file extension for compiled color palette files
+COMPILED_PALETTE_EXTENSION = '.cfpal'
+
+#: Holds the maximum number of compiled color palettes kept
+#  in the palette cache directory per color file name
+MAX_COMPILED_PALETTES_PER_NAME = 4
+
+
+#: Holds the color metrics to find the nearest color.
+#  A color metric maps the RGB channels to the coordinates
+#  in which the euclidean distance between colors is measured.
+#  The ``lab`` metric measures the perceptual CIE76 color difference.
+METRIC_RGB = 'rgb'
+METRIC_LAB = 'lab'
+COLOR_METRICS = {
+    METRIC_RGB: lambda red, green, blue: (red, green, blue),
+    METRIC_LAB: utils.rgb_to_lab,
+}
+
+#: Holds the maximum number of overlays stacked on a color palette
+#  before they are merged into a single overlay.
+MAX_COLOR_PALETTE_OVERLAYS = 8
+
+
+class ColorPalette(collections.abc.Mapping):
+    """
+    Represents an immutable color palette.
+
+    A color palette maps color names to RGB channel triplets.
+    It consists of one or more layers of sanitized color palettes.
+    The colors of the upper layers shadow the colors of the lower layers.
+    This allows to cheaply derive a new color palette with some changed colors
+    using ``overlay()`` without copying the whole color palette.
+
+    :param layers: the sanitized color palettes from the top to the bottom layer.
+                   The layers must not be modified afterwards.
+    """
+    __slots__ = ('_layers', '_nearest_color_indexes', '_ansi_code_indexes')
+
+    def __init__(self, *layers):
+        self._layers = layers or ({},)
+        self._nearest_color_indexes = {}
+        self._ansi_code_indexes = {}
+
+    def overlay(self, colorpalette):
+        """
+        Create a new color palette with the given colors on top of this color palette.
+
+        The cost only depends on the size of the given color palette
+        and not on the size of this color palette.
+
+        :param dict colorpalette: the colors to add or replace
+
+        :returns ColorPalette: the new color palette
+        """
+        layers = (sanitize_color_palette(colorpalette),) + self._layers
+        if len(layers) > MAX_COLOR_PALETTE_OVERLAYS + 1:
+            # merge all overlays, but not the bottom layer which usually holds most colors.
+            overlay = {}
+            for layer in reversed(layers[:-1]):
+                overlay.update(layer)
+            layers = (overlay, layers[-1])
+
+        return ColorPalette(*layers)
+
+    def ansi_code_index(self, offset, colormode, quantization):
+        """
+        Get the index of the ANSI escape codes of the colors of this color palette.
+
+        The index maps the color names to their ``(offset, red, green, blue)`` style part
+        and their ANSI start and end escape codes for the given color offset, color mode
+        and quantization. It's filled on demand by ``core.resolve_color``. A color palette
+        is immutable, thus, the index is never invalidated and the indexes of
+        other color modes are kept when the color mode changes.
+
+        :param int offset: the fore- or background color offset
+        :param int colormode: the color mode. See ``core.translate_rgb_to_ansi_code``
+        :param str quantization: the quantization. See ``ansi.QUANTIZATIONS``
+
+        :returns dict: the index
+        """
+        key = (offset, colormode, quantization)
+        try:
+            return self._ansi_code_indexes[key]
+        except KeyError:
+            # concurrent callers may both create an index, but only one is kept
+            return self._ansi_code_indexes.setdefault(key, {})
+
+    def nearest_color_index(self, metric=METRIC_RGB):
+        """
+        Get the index to find the nearest color of this color palette.
+
+        The index is built on first use. A color palette is
+        immutable, thus, the index is never invalidated.
+
+        :param str metric: the color metric to use. See ``COLOR_METRICS``
+
+        :returns NearestColorIndex: the index
+        """
+        try:
+            return self._nearest_color_indexes[metric]
+        except KeyError:
+            index = self._nearest_color_indexes[metric] = NearestColorIndex(
+                self.items(), metric)
+            return index
+
+    def nearest_color(self, rgb, metric=METRIC_RGB):
+        """
+        Find the name of the nearest color to the given RGB value.
+
+        :param tuple rgb: the RGB channel triplet
+        :param str metric: the color metric to use. See ``COLOR_METRICS``
+
+        :returns str: the color name or ``None`` if the color palette is empty
+        """
+        return self.nearest_color_index(metric).nearest(rgb)
+
+    def __getitem__(self, colorname):
+        for layer in self._layers:
+            try:
+                return layer[colorname]
+            except KeyError:
+                pass
+
+        raise KeyError(colorname)
+
+    def __contains__(self, colorname):
+        return any(colorname in layer for layer in self._layers)
+
+    def __iter__(self):
+        if len(self._layers) == 1:
+            return iter(self._layers[0])
+
+        return iter(self._merged())
+
+    def __len__(self):
+        if len(self._layers) == 1:
+            return len(self._layers[0])
+
+        return len(self._merged())
+
+    def _merged(self):
+        """
+        Merge all layers into a single dict.
+        """
+        merged = {}
+        for layer in reversed(self._layers):
+            merged.update(layer)
+        return merged
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, dict(self.items()))
+
+
+class CompactColorPalette(collections.abc.Mapping):
+    """
+    Represents a sanitized color palette in a compact form.
+
+    The RGB channels of all colors are stored in a single buffer with one byte
+    per channel instead of a tuple of ``int`` objects per color. The color names
+    map to the position of their color in the buffer. A compact color palette
+    is read-only and behaves like a sanitized color palette ``dict``:
+
+    >>> palette = CompactColorPalette(['black', 'white'], b'\\x00\\x00\\x00\\xff\\xff\\xff')
+    >>> palette['white']
+    (255, 255, 255)
+
+    :param names: the color names
+    :param channels: the buffer with the RGB channels of the colors in the order of
+                     the color names, like ``bytes``, ``array('B')`` or a ``memoryview``.
+                     The buffer must not be modified afterwards.
+    """
+    __slots__ = ('_positions', '_channels')
+
+    def __init__(self, names, channels):
+        # if a color name is duplicated the last color wins - just like with a ``dict``
+        self._positions = {name: position for name, position in zip(
+            names, range(0, len(channels), 3))}
+        self._channels = channels
+
+    @classmethod
+    def from_color_palette(cls, colorpalette):
+        """
+        Create a compact color palette from the given sanitized color palette.
+
+        :param dict colorpalette: the sanitized color palette
+
+        :returns CompactColorPalette: the compact color palette
+
+        :raises ValueError: if a channel value cannot be stored in one byte
+        """
+        # ``array`` is imported on first use to keep ``import colorful`` cheap
+        import array
+
+        try:
+            channels = array.array(
+                'B', (channel for rgb in colorpalette.values() for channel in rgb))
+        except (OverflowError, TypeError) as exc:
+            raise ValueError('the colors cannot be stored in one byte per channel: {}'.format(
+                exc))
+
+        if len(channels) != len(colorpalette) * 3:
+            raise ValueError('the colors must have exactly three channels')
+
+        return cls(colorpalette.keys(), channels)
+
+    @property
+    def channels(self):
+        """
+        Get the buffer with the RGB channels of the colors.
+        """
+        return self._channels
+
+    def __getitem__(self, colorname):
+        position = self._positions[colorname]
+        channels = self._channels
+        return (channels[position], channels[position + 1], channels[position + 2])
+
+    def __contains__(self, colorname):
+        return colorname in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, dict(self.items()))
+
+
+#: Holds the names of the shared memory blocks published by this process.
+#  They stay registered with the resource tracker when this process attaches to them.
+_published_shared_memory_names = set()
+
+
+def _attach_shared_memory(name):
+    """
+    Attach to the shared memory with the given name without tracking it.
+
+    A tracked shared memory is unlinked by the resource tracker when the
+    attaching process exits. Python 3.13+ supports ``track=False``, older
+    versions unregister the shared memory from the resource tracker right
+    after attaching to it.
+    """
+    from multiprocessing import shared_memory
+
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    memory = shared_memory.SharedMemory(name=name)
+    # only POSIX shared memory is tracked. The registration of the
+    # shared memory published by this process itself has to be kept.
+    if os.name == 'posix' and memory.name not in _published_shared_memory_names:
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(memory._name, 'shared_memory')
+    return memory
+
+
+def _close_shared_memory(channels, shared_memory):
+    """
+    Release the given channels of the shared memory and close it.
+
+    The channels are a slice of the shared memory buffer
+    which has to be released before the shared memory is closed.
+    """
+    channels.release()
+    shared_memory.close()
+
+
+class SharedColorPalette(CompactColorPalette):
+    """
+    Represents a compact color palette in shared memory.
+
+    The color palette is published once in the compiled color palette format
+    and attached to by other processes, like the workers of a process pool.
+    Attaching neither parses nor copies the colors: the RGB channels are read
+    directly from the shared memory and only the color names are decoded.
+
+    >>> palette = SharedColorPalette.publish(colorful.COLORNAMES_COLORS)
+    >>> # in the worker processes
+    >>> colorful.use_palette(SharedColorPalette.attach(palette.name))
+
+    The publishing process owns the shared memory and
+    has to ``unlink`` it once no process uses it anymore.
+
+    :param shared_memory: the ``multiprocessing.shared_memory.SharedMemory``
+                          holding the compiled color palette
+    """
+    __slots__ = ('_shared_memory', '_finalizer', '__weakref__')
+
+    def __init__(self, shared_memory):
+        self._shared_memory = None
+        unpacked = unpack_color_palette(shared_memory.buf)
+        if unpacked is None:
+            raise ValueError('the shared memory "{}" holds no color palette'.format(
+                shared_memory.name))
+
+        colorpalette = unpacked[0]
+        self._positions = colorpalette._positions
+        self._channels = colorpalette._channels
+        self._shared_memory = shared_memory
+        #: Holds the finalizer which closes the shared memory if this color palette
+        #  isn't closed explicitly. It runs before the ``SharedMemory`` is finalized -
+        #  at the latest at interpreter exit - and, thus, releases the channels
+        #  before the ``SharedMemory`` tries to close its buffer.
+        # ``weakref`` is imported on first use to keep ``import colorful`` cheap
+        import weakref
+        self._finalizer = weakref.finalize(
+            self, _close_shared_memory, self._channels, shared_memory)
+
+    @classmethod
+    def publish(cls, colorpalette, name=None):
+        """
+        Publish the given color palette in a new shared memory block.
+
+        :param colorpalette: the color palette to publish or the path to a color file
+        :param str name: the name of the shared memory. A unique name is chosen by default.
+
+        :returns SharedColorPalette: the published color palette
+
+        :raises ValueError: if a channel value cannot be stored in one byte
+        """
+        from multiprocessing import shared_memory
+
+        if isinstance(colorpalette, str):  # we assume it's a path to a color file
+            colorpalette = load_color_palette(colorpalette)
+        if not isinstance(colorpalette, CompactColorPalette):
+            colorpalette = CompactColorPalette.from_color_palette(
+                sanitize_color_palette(colorpalette))
+
+        data = pack_color_palette(colorpalette)
+        memory = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+        memory.buf[:len(data)] = data
+        _published_shared_memory_names.add(memory.name)
+        return cls(memory)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attach to the color palette published with the given name.
+
+        :param str name: the name of the shared memory. See ``name``
+
+        :returns SharedColorPalette: the color palette
+        """
+        memory = _attach_shared_memory(name)
+        try:
+            return cls(memory)
+        except ValueError:
+            memory.close()
+            raise
+
+    @property
+    def name(self):
+        """
+        Get the name of the shared memory.
+        """
+        return self._shared_memory.name
+
+    def close(self):
+        """
+        Detach this process from the shared memory.
+
+        The color palette cannot be used afterwards.
+        """
+        self._shared_memory = None
+        self._finalizer()
+
+    def unlink(self):
+        """
+        Detach from and free the shared memory.
+
+        The processes which are still attached keep their mapping.
+        Only the publishing process should unlink the shared memory.
+        """
+        if self._shared_memory is None:
+            raise ValueError('the shared color palette is closed')
+
+        if sys.version_info < (3, 13) and os.name == 'posix':
+            # the workers which share the resource tracker of this process
+            # unregister the shared memory when they attach to it.
+            # See ``_attach_shared_memory``.
+            from multiprocessing import resource_tracker
+
+            resource_tracker.register(self._shared_memory._name, 'shared_memory')
+
+        self._shared_memory.unlink()
+        _published_shared_memory_names.discard(self._shared_memory.name)
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _build_kd_tree(points, depth):
+    """
+    Build a k-d tree from the given list of ``(point, index)`` tuples.
+
+    A node of the tree is a ``(point, index, axis, left, right)`` tuple.
+    The points in the left subtree are less than or equal to the point of the node
+    on the axis of the node, the points in the right subtree are greater than or equal.
+    """
+    if not points:
+        return None
+
+    axis = depth % 3
+    points.sort(key=lambda entry: entry[0][axis])
+    median = len(points) // 2
+    point, index = points[median]
+    return (point, index, axis,
+            _build_kd_tree(points[:median], depth + 1),
+            _build_kd_tree(points[median + 1:], depth + 1))
+
+
+def _search_kd_tree(node, x, y, z, best):
+    """
+    Search the nearest point to the given point in the given k-d tree.
+
+    The ``best`` list holds the squared distance and the index of the nearest point
+    found so far. If multiple points have the same distance the lowest index wins.
+    """
+    point, index, axis, left, right = node
+    dx = x - point[0]
+    dy = y - point[1]
+    dz = z - point[2]
+    distance = dx * dx + dy * dy + dz * dz
+    if distance < best[0] or (distance == best[0] and index < best[1]):
+        best[0] = distance
+        best[1] = index
+
+    delta = dx if axis == 0 else (dy if axis == 1 else dz)
+    if delta < 0:
+        near, far = left, right
+    else:
+        near, far = right, left
+
+    if near is not None:
+        _search_kd_tree(near, x, y, z, best)
+    # the other side can only hold a nearer point if the splitting plane is near enough
+    if far is not None and delta * delta <= best[0]:
+        _search_kd_tree(far, x, y, z, best)
+
+
+class NearestColorIndex():
+    """
+    Index to find the nearest of a set of colors to any RGB value.
+
+    The colors are stored in a k-d tree, thus, a lookup only measures the distance
+    to a few colors instead of all colors. If multiple colors are equally near,
+    the color which comes first wins - just like with a linear scan.
+
+    :param colors: the iterable of ``(key, (red, green, blue))`` tuples
+    :param str metric: the color metric to use. See ``COLOR_METRICS``
+    """
+    __slots__ = ('metric', '_to_point', '_keys', '_tree')
+
+    def __init__(self, colors, metric=METRIC_RGB):
+        try:
+            to_point = COLOR_METRICS[metric]
+        except KeyError:
+            raise ValueError('the color metric "{}" is unknown. Use one of {}'.format(
+                metric, ', '.join(sorted(COLOR_METRICS))))
+
+        self.metric = metric
+        self._to_point = to_point
+        self._keys = []
+        points = []
+        for index, (key, rgb) in enumerate(colors):
+            self._keys.append(key)
+            points.append((to_point(*rgb), index))
+
+        self._tree = _build_kd_tree(points, 0)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def nearest(self, rgb):
+        """
+        Find the key of the nearest color to the given RGB value.
+
+        :param tuple rgb: the RGB channel triplet
+
+        :returns: the key of the nearest color or ``None`` if the index is empty
+        """
+        if self._tree is None:
+            return None
+
+        best = [math.inf, -1]
+        _search_kd_tree(self._tree, *self._to_point(*rgb), best)
+        return self._keys[best[1]]
+
+    def nearest_many(self, rgbs):
+        """
+        Find the keys of the nearest colors to the given RGB values.
+
+        Every distinct RGB value is only looked up once.
+
+        :param rgbs: the iterable of RGB channel triplets
+
+        :returns list: the keys of the nearest colors
+        """
+        nearest = {}
+        keys = []
+        for rgb in rgbs:
+            rgb = tuple(rgb)
+            try:
+                key = nearest[rgb]
+            except KeyError:
+                key = nearest[rgb] = self.nearest(rgb)
+            keys.append(key)
+        return keys
+
+
+def make_color_palette(colorpalette):
+    """
+    Make an immutable color palette from the given color palette.
+
+    :param dict colorpalette: the color palette to sanitize.
+                              A ``ColorPalette`` is returned as it is and
+                              a ``str`` is loaded as path to a color file.
+
+    :returns ColorPalette: the color palette
+    """
+    if isinstance(colorpalette, ColorPalette):
+        return colorpalette
+
+    if isinstance(colorpalette, str):  # we assume it's a path to a color file
+        return ColorPalette(load_color_palette(colorpalette))
+
+    return ColorPalette(sanitize_color_palette(colorpalette))
+
 
 def parse_colors(path):
     """Parse the given color files.
@@ -62,6 +616,9 @@ def parse_json_color_file(path):
 
     :param str path: the path to the JSON color file
     """
+    # ``json`` is imported on first use to keep ``import colorful`` cheap
+    import json
+
     with open(path) as color_file:
         color_list = json.load(color_file)
 
@@ -70,6 +627,301 @@ def parse_json_color_file(path):
     return color_dict
 
 
+def get_palette_cache_dir(env):
+    """
+    Get the directory to store the compiled color palettes in.
+
+    The directory can be set with the ``COLORFUL_PALETTE_CACHE_DIR`` environment
+    variable. It defaults to the user cache directory.
+    ``None`` is returned if the cache is disabled with ``COLORFUL_NO_PALETTE_CACHE=1``.
+
+    :param dict env: the environment dict like returned by ``os.environ``
+    """
+    if env.get('COLORFUL_NO_PALETTE_CACHE', '0') == '1':
+        return None
+
+    cache_dir = env.get('COLORFUL_PALETTE_CACHE_DIR')
+    if cache_dir:
+        return cache_dir
+
+    if sys.platform == 'win32':
+        base_dir = env.get('LOCALAPPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base_dir = os.path.expanduser(os.path.join('~', 'Library', 'Caches'))
+    else:
+        base_dir = env.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache'))
+
+    return os.path.join(base_dir, 'colorful')
+
+
+def get_palette_cache_path(path, cache_dir):
+    """
+    Get the path of the compiled color palette for the given color file.
+
+    :param str path: the path to the color file
+    :param str cache_dir: the directory to store the compiled color palettes in
+    """
+    # ``zlib`` is imported on first use to keep ``import colorful`` cheap
+    import zlib
+
+    path = os.path.abspath(path)
+    return os.path.join(cache_dir, '{name}-{checksum:08x}{ext}'.format(
+        name=os.path.basename(path),
+        checksum=zlib.crc32(path.encode('utf-8', 'surrogateescape')),
+        ext=COMPILED_PALETTE_EXTENSION))
+
+
+def read_compiled_palette_source(path):
+    """
+    Read the path of the color file the given compiled color palette was compiled from.
+
+    :param str path: the path to the compiled color palette
+
+    :returns bytes: the encoded path to the color file or ``None``
+                    if the compiled color palette is invalid
+    """
+    compiled_palette_header = get_compiled_palette_header()
+    with open(path, 'rb') as cache_file:
+        header = cache_file.read(compiled_palette_header.size)
+        if len(header) != compiled_palette_header.size:
+            return None
+
+        magic, _, _, source_len, _, _ = compiled_palette_header.unpack(header)
+        if magic != COMPILED_PALETTE_MAGIC:
+            return None
+
+        source = cache_file.read(source_len)
+        return source if len(source) == source_len else None
+
+
+def prune_palette_cache(cache_path):
+    """
+    Remove the compiled color palettes of the same color file name as the given
+    compiled color palette if their color file doesn't exist anymore or if there are
+    more than ``MAX_COMPILED_PALETTES_PER_NAME`` of them. The given compiled color
+    palette and the most recently compiled ones are kept.
+
+    :param str cache_path: the path to the compiled color palette to keep
+    """
+    cache_dir, cache_name = os.path.split(cache_path)
+    # the name of a compiled color palette is ``<name>-<checksum><ext>``
+    prefix = cache_name[:-len('-00000000' + COMPILED_PALETTE_EXTENSION) + 1]
+
+    candidates = []
+    for name in os.listdir(cache_dir):
+        if (name == cache_name or not name.startswith(prefix) or
+                not name.endswith(COMPILED_PALETTE_EXTENSION) or
+                len(name) != len(cache_name)):
+            continue
+
+        path = os.path.join(cache_dir, name)
+        try:
+            source = read_compiled_palette_source(path)
+            if source is not None and os.path.exists(source.decode('utf-8', 'surrogateescape')):
+                candidates.append((os.stat(path).st_mtime_ns, path))
+                continue
+            os.remove(path)
+        except OSError:
+            pass
+
+    candidates.sort(reverse=True)
+    for _, path in candidates[MAX_COMPILED_PALETTES_PER_NAME - 1:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def get_compiled_palette_header():
+    """
+    Get the ``struct.Struct`` to pack and unpack the header of a compiled color palette.
+
+    See ``COMPILED_PALETTE_HEADER_FORMAT`` for the header layout.
+    """
+    global _compiled_palette_header
+
+    if _compiled_palette_header is None:
+        import struct
+        _compiled_palette_header = struct.Struct(COMPILED_PALETTE_HEADER_FORMAT)
+
+    return _compiled_palette_header
+
+
+def pack_color_palette(colorpalette, source=b'', mtime_ns=0, size=0):
+    """
+    Pack the given sanitized color palette into the compiled color palette format.
+
+    :param dict colorpalette: the sanitized color palette to pack
+    :param bytes source: the encoded path to the color file the palette was parsed from
+    :param int mtime_ns: the modification time of the color file in nanoseconds
+    :param int size: the size of the color file
+
+    :returns bytes: the compiled color palette
+    """
+    names = '\n'.join(colorpalette).encode('utf-8')
+    if isinstance(colorpalette, CompactColorPalette) and \
+            len(colorpalette.channels) == len(colorpalette) * 3:
+        channels = bytes(colorpalette.channels)
+    else:
+        channels = bytes(channel for rgb in colorpalette.values() for channel in rgb)
+
+    header = get_compiled_palette_header().pack(
+        COMPILED_PALETTE_MAGIC, mtime_ns, size, len(source), len(colorpalette), len(names))
+    return b''.join((header, source, names, channels))
+
+
+def unpack_color_palette(data):
+    """
+    Unpack the given compiled color palette without checking if it's stale.
+
+    The RGB channels of the unpacked color palette are a slice of ``data``,
+    thus, the channels of a ``memoryview`` are not copied.
+
+    :param data: the buffer with the compiled color palette.
+                 The buffer may be larger than the compiled color palette.
+
+    :returns tuple: the ``(colorpalette, source, mtime_ns, size, length)`` with the
+                    ``CompactColorPalette`` and the ``length`` of the compiled color
+                    palette in bytes or ``None`` if the compiled color palette is invalid.
+    """
+    compiled_palette_header = get_compiled_palette_header()
+    if len(data) < compiled_palette_header.size:
+        return None
+
+    magic, mtime_ns, size, source_len, count, names_len = compiled_palette_header.unpack_from(
+        data)
+    if magic != COMPILED_PALETTE_MAGIC:
+        return None
+
+    names_start = compiled_palette_header.size + source_len
+    channels_start = names_start + names_len
+    length = channels_start + count * 3
+    if len(data) < length:
+        return None
+
+    source = bytes(data[compiled_palette_header.size:names_start])
+    names = str(data[names_start:channels_start], 'utf-8').split('\n') if count else []
+    colorpalette = CompactColorPalette(names, data[channels_start:length])
+    return colorpalette, source, mtime_ns, size, length
+
+
+def compile_color_palette(colorpalette, source_path, source_stat):
+    """
+    Compile the given sanitized color palette into
+    the compiled color palette format.
+
+    :param dict colorpalette: the sanitized color palette to compile
+    :param str source_path: the absolute path to the color file the palette was parsed from
+    :param os.stat_result source_stat: the stat result of the color file
+
+    :returns bytes: the compiled color palette
+    """
+    return pack_color_palette(
+        colorpalette, source_path.encode('utf-8', 'surrogateescape'),
+        source_stat.st_mtime_ns, source_stat.st_size)
+
+
+def load_compiled_color_palette(data, source_path, source_stat):
+    """
+    Load the given compiled color palette into a sanitized color palette.
+
+    :param bytes data: the compiled color palette
+    :param str source_path: the absolute path to the color file the palette was parsed from
+    :param os.stat_result source_stat: the stat result of the color file
+
+    :returns CompactColorPalette: the sanitized color palette or ``None``
+                                  if the compiled color palette is invalid or stale.
+    """
+    unpacked = unpack_color_palette(data)
+    if unpacked is None:
+        return None
+
+    colorpalette, source, mtime_ns, size, length = unpacked
+    if (length != len(data) or mtime_ns != source_stat.st_mtime_ns or
+            size != source_stat.st_size or
+            source != source_path.encode('utf-8', 'surrogateescape')):
+        return None
+
+    return colorpalette
+
+
+def load_color_palette(path):
+    """
+    Load and sanitize the color palette from the given color file.
+
+    The sanitized color palette is stored as compiled color palette
+    in the palette cache directory, see ``get_palette_cache_dir``.
+    Subsequent loads of the same unchanged color file read
+    the compiled color palette instead of parsing the color file.
+    The compiled color palettes of removed color files with the same
+    name are pruned, see ``prune_palette_cache``.
+
+    The colors are stored in a ``CompactColorPalette`` if possible.
+
+    :param str path: the path to the color file
+
+    :returns CompactColorPalette: the sanitized color palette
+    """
+    cache_dir = get_palette_cache_dir(os.environ)
+    if cache_dir is None:
+        return compact_color_palette(sanitize_color_palette(parse_colors(path)))
+
+    source_path = os.path.abspath(path)
+    source_stat = os.stat(source_path)
+    cache_path = get_palette_cache_path(source_path, cache_dir)
+
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            colorpalette = load_compiled_color_palette(
+                cache_file.read(), source_path, source_stat)
+    except (OSError, ValueError):
+        colorpalette = None
+
+    if colorpalette is not None:
+        return colorpalette
+
+    colorpalette = sanitize_color_palette(parse_colors(path))
+
+    try:
+        colorpalette = CompactColorPalette.from_color_palette(colorpalette)
+        data = compile_color_palette(colorpalette, source_path, source_stat)
+    except ValueError:
+        return colorpalette  # the colors cannot be stored in one byte per channel
+
+    # write to a temporary file first so that concurrent
+    # processes never read a partially written file.
+    tmp_cache_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_cache_path, 'wb') as cache_file:
+            cache_file.write(data)
+        os.replace(tmp_cache_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_cache_path)
+        except OSError:
+            pass
+    else:
+        prune_palette_cache(cache_path)
+
+    return colorpalette
+
+
+def compact_color_palette(colorpalette):
+    """
+    Store the given sanitized color palette in a ``CompactColorPalette`` if possible.
+
+    :param dict colorpalette: the sanitized color palette
+
+    :returns: the compact color palette or the given color palette if
+              its colors cannot be stored in one byte per channel
+    """
+    try:
+        return CompactColorPalette.from_color_palette(colorpalette)
+    except ValueError:
+        return colorpalette
+
+
 def sanitize_color_palette(colorpalette):
     """
     Sanitze the given color palette so it can
@@ -77,7 +929,12 @@ def sanitize_color_palette(colorpalette):
 
     It will convert colors specified in hex RGB to
     a RGB channel triplet.
+    A ``ColorPalette`` and a ``CompactColorPalette`` are already
+    sanitized and are returned as they are.
     """
+    if isinstance(colorpalette, (ColorPalette, CompactColorPalette)):
+        return colorpalette
+
     new_palette = {}
 
     def __make_valid_color_name(name):
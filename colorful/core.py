@@ -9,11 +9,19 @@ Terminal string styling done right, in Python.
 """
 
 import os
+import sys
+import string
+import itertools
+import threading
+import contextvars
+import collections
+from contextlib import contextmanager
 
 from . import ansi
 from . import colors
 from . import styles
 from . import terminal
+from . import utils
 
 #: Holds the name of the env variable which is
 #  used as path to the default rgb.txt file
@@ -21,13 +29,69 @@ DEFAULT_RGB_TXT_PATH = os.environ.get(
     'COLORFUL_DEFAULT_COLOR_PALETTE',
     os.path.join(os.path.dirname(__file__), 'data', 'rgb.txt'))
 
-#: Holds the color names mapped to RGB channels
-COLOR_PALETTE = colors.parse_colors(path=DEFAULT_RGB_TXT_PATH)
+#: Holds the raw and the sanitized default color palette once they were loaded.
+#  The default color palette is loaded lazily on first use in order
+#  to keep ``import colorful`` cheap.
+_raw_default_color_palette = None
+_default_color_palette = None
+
+#: Holds the maximum number of resolved styles cached per Colorful object
+STYLE_CACHE_SIZE = 512
+
+#: Holds the counter for the color palette versions.
+#  Every color palette a Colorful object uses - either set or scoped -
+#  gets a unique version which is part of the style cache key.
+_colorpalette_versions = itertools.count(1)
+
+#: Holds the scoped setups of the Colorful objects for the current context.
+#  The value is a ``dict`` which maps a Colorful object to its scoped
+#  ``(colormode, colorpalette, colorpalette_version)``. The ``dict`` is never
+#  mutated, thus, every thread and asyncio task can safely have its own scope.
+#  See ``Colorful.scoped_setup``.
+_scoped_setups = contextvars.ContextVar('colorful_scoped_setups', default=None)
+
+#: Holds the maximum number of compiled templates cached per ``CompiledFormat``
+MAX_COMPILED_TEMPLATES = 16
 
 #: Holds the path to the built-in `colornames` color palette file
 COLORNAMES_COLORS_PATH = os.path.join(os.path.dirname(__file__), "data", "colornames.json")
 
 
+def __getattr__(name):
+    """
+    Lazily provide the ``COLOR_PALETTE`` module attribute.
+
+    ``COLOR_PALETTE`` holds the color names of the
+    default color palette mapped to RGB channels.
+    """
+    global _raw_default_color_palette
+
+    if name == 'COLOR_PALETTE':
+        if _raw_default_color_palette is None:
+            _raw_default_color_palette = colors.parse_colors(path=DEFAULT_RGB_TXT_PATH)
+        return _raw_default_color_palette
+
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def get_default_color_palette():
+    """
+    Get the sanitized default color palette.
+
+    The default color palette is parsed and sanitized on the first call
+    and re-used for every subsequent call.
+
+    :returns colors.ColorPalette: the default color palette
+    """
+    global _default_color_palette
+
+    if _default_color_palette is None:
+        _default_color_palette = colors.ColorPalette(
+            colors.load_color_palette(DEFAULT_RGB_TXT_PATH))
+
+    return _default_color_palette
+
+
 class ColorfulError(Exception):
     """
     Exception which is raised for Colorful specific
@@ -44,7 +108,8 @@ class ColorfulAttributeError(AttributeError, ColorfulError):
     """
 
 
-def translate_rgb_to_ansi_code(red, green, blue, offset, colormode):
+def translate_rgb_to_ansi_code(red, green, blue, offset, colormode,
+                               quantization=ansi.QUANTIZATION_CUBE):
     """
     Translate the given RGB color into the appropriate ANSI escape code
     for the given color mode.
@@ -62,44 +127,47 @@ def translate_rgb_to_ansi_code(red, green, blue, offset, colormode):
     :param int blue: the blue channel value
     :param int offset: the offset to use for the base color
     :param int colormode: the color mode to use. See explanation above
+    :param str quantization: the method to quantize the RGB color to ANSI 256
+                             and ANSI 16 colors. See ``ansi.QUANTIZATIONS``
     """
     if colormode == terminal.NO_COLORS:  # colors are disabled, thus return empty string
         return '', ''
 
     if colormode == terminal.ANSI_8_COLORS or colormode == terminal.ANSI_16_COLORS:
-        color_code = ansi.rgb_to_ansi16(red, green, blue)
-        start_code = ansi.ANSI_ESCAPE_CODE.format(
-            code=color_code + offset - ansi.FOREGROUND_COLOR_OFFSET)
-        end_code = ansi.ANSI_ESCAPE_CODE.format(code=offset + ansi.COLOR_CLOSE_OFFSET)
+        if quantization == ansi.QUANTIZATION_PERCEPTUAL:
+            color_code = ansi.rgb_to_ansi16_perceptual(
+                red, green, blue, bright_colors=colormode == terminal.ANSI_16_COLORS)
+        else:
+            color_code = ansi.rgb_to_ansi16(red, green, blue)
+        start_code = ansi.sgr_escape_code(color_code + offset - ansi.FOREGROUND_COLOR_OFFSET)
+        end_code = ansi.sgr_escape_code(offset + ansi.COLOR_CLOSE_OFFSET)
         return start_code, end_code
 
     if colormode == terminal.ANSI_256_COLORS:
-        color_code = ansi.rgb_to_ansi256(red, green, blue)
-        start_code = ansi.ANSI_ESCAPE_CODE.format(code='{base};5;{code}'.format(
-            base=8 + offset, code=color_code))
-        end_code = ansi.ANSI_ESCAPE_CODE.format(code=offset + ansi.COLOR_CLOSE_OFFSET)
+        if quantization == ansi.QUANTIZATION_PERCEPTUAL:
+            color_code = ansi.rgb_to_ansi256_perceptual(red, green, blue)
+        else:
+            color_code = ansi.rgb_to_ansi256(red, green, blue)
+        start_code = ansi.ansi256_escape_code(color_code, offset)
+        end_code = ansi.sgr_escape_code(offset + ansi.COLOR_CLOSE_OFFSET)
         return start_code, end_code
 
     if colormode == terminal.TRUE_COLORS:
-        start_code = ansi.ANSI_ESCAPE_CODE.format(code='{base};2;{red};{green};{blue}'.format(
-            base=8 + offset, red=red, green=green, blue=blue))
-        end_code = ansi.ANSI_ESCAPE_CODE.format(code=offset + ansi.COLOR_CLOSE_OFFSET)
+        start_code = ansi.true_color_escape_code(red, green, blue, offset)
+        end_code = ansi.sgr_escape_code(offset + ansi.COLOR_CLOSE_OFFSET)
         return start_code, end_code
 
     raise ColorfulAttributeError('invalid color mode "{}"'.format(colormode))
 
 
-def translate_colorname_to_ansi_code(colorname, offset, colormode, colorpalette):
+def resolve_colorname_to_rgb(colorname, colorpalette):
     """
-    Translate the given color name to a valid
-    ANSI escape code.
+    Resolve the given color name to its RGB channels.
 
     :parma str colorname: the name of the color to resolve
-    :parma str offset: the offset for the color code
-    :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
     :parma dict colorpalette: the color palette to use for the color name mapping
 
-    :returns str: the color as ANSI escape code
+    :returns tuple: the RGB channel triplet
 
     :raises ColorfulError: if the given color name is invalid
     """
@@ -109,7 +177,63 @@ def translate_colorname_to_ansi_code(colorname, offset, colormode, colorpalette)
         raise ColorfulAttributeError('the color "{}" is unknown. Use a color in your color palette (by default: X11 rgb.txt)'.format(  # noqa
             colorname))
     else:
-        return translate_rgb_to_ansi_code(red, green, blue, offset, colormode)
+        return red, green, blue
+
+
+def translate_colorname_to_ansi_code(colorname, offset, colormode, colorpalette,
+                                     quantization=ansi.QUANTIZATION_CUBE):
+    """
+    Translate the given color name to a valid
+    ANSI escape code.
+
+    :parma str colorname: the name of the color to resolve
+    :parma str offset: the offset for the color code
+    :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+    :parma dict colorpalette: the color palette to use for the color name mapping
+    :param str quantization: the quantization to use. See ``translate_rgb_to_ansi_code``
+
+    :returns str: the color as ANSI escape code
+
+    :raises ColorfulError: if the given color name is invalid
+    """
+    return resolve_color(colorname, offset, colormode, colorpalette, quantization)[1]
+
+
+def resolve_color(colorname, offset, colormode, colorpalette,
+                  quantization=ansi.QUANTIZATION_CUBE):
+    """
+    Resolve the given color name to its style part and ANSI escape codes.
+
+    The resolved colors of a ``colors.ColorPalette`` are stored in its
+    ANSI code index, thus, every color name is only resolved once
+    per color mode. See ``colors.ColorPalette.ansi_code_index``.
+
+    :parma str colorname: the name of the color to resolve
+    :parma str offset: the offset for the color code
+    :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+    :parma dict colorpalette: the color palette to use for the color name mapping
+    :param str quantization: the quantization to use. See ``translate_rgb_to_ansi_code``
+
+    :returns tuple: the ``(offset, red, green, blue)`` style part and
+                    the ANSI start and end escape codes
+
+    :raises ColorfulError: if the given color name is invalid
+    """
+    if isinstance(colorpalette, colors.ColorPalette):
+        ansi_code_index = colorpalette.ansi_code_index(offset, colormode, quantization)
+        try:
+            return ansi_code_index[colorname]
+        except KeyError:
+            pass
+    else:
+        ansi_code_index = None
+
+    red, green, blue = resolve_colorname_to_rgb(colorname, colorpalette)
+    color = ((offset, red, green, blue),
+             translate_rgb_to_ansi_code(red, green, blue, offset, colormode, quantization))
+    if ansi_code_index is not None:
+        ansi_code_index[colorname] = color
+    return color
 
 
 def resolve_modifier_to_ansi_code(modifiername, colormode):
@@ -128,37 +252,27 @@ def resolve_modifier_to_ansi_code(modifiername, colormode):
         return '', ''
 
     try:
-        start_code, end_code = ansi.MODIFIERS[modifiername]
+        return ansi.MODIFIER_ESCAPE_CODES[modifiername]
     except KeyError:
         raise ColorfulAttributeError('the modifier "{}" is unknown. Use one of: {}'.format(
             modifiername, ansi.MODIFIERS.keys()))
-    else:
-        return ansi.ANSI_ESCAPE_CODE.format(
-            code=start_code), ansi.ANSI_ESCAPE_CODE.format(
-                code=end_code)
 
 
-def translate_style(style, colormode, colorpalette):
+def split_style(style):
     """
-    Translate the given style to an ANSI escape code
-    sequence.
+    Split the given style into the names of its modifiers and colors.
 
-    ``style`` examples are:
+    Every part is either the name of a modifier or
+    a ``(offset, colorname)`` tuple for a fore- or background color.
+    See ``translate_style`` for examples of styles.
 
-    * green
-    * bold
-    * red_on_black
-    * bold_green
-    * italic_yellow_on_cyan
+    :param str style: the style to split
 
-    :param str style: the style to translate
-    :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
-    :parma dict colorpalette: the color palette to use for the color name mapping
+    :returns tuple: the parts of the style
     """
     style_parts = iter(style.split('_'))
 
-    ansi_start_sequence = []
-    ansi_end_sequence = []
+    parts = []
 
     try:
         # consume all modifiers
@@ -168,35 +282,127 @@ def translate_style(style, colormode, colorpalette):
             if part not in ansi.MODIFIERS:
                 break  # all modifiers have been consumed
 
-            mod_start_code, mod_end_code = resolve_modifier_to_ansi_code(part, colormode)
-            ansi_start_sequence.append(mod_start_code)
-            ansi_end_sequence.append(mod_end_code)
+            parts.append(part)
         else:  # we've consumed all parts, thus we can exit
             raise StopIteration()
 
         # next part has to be a foreground color or the 'on' keyword
         # which means we have to consume background colors
         if part != 'on':
-            ansi_start_code, ansi_end_code = translate_colorname_to_ansi_code(
-                part, ansi.FOREGROUND_COLOR_OFFSET, colormode, colorpalette)
-            ansi_start_sequence.append(ansi_start_code)
-            ansi_end_sequence.append(ansi_end_code)
+            parts.append((ansi.FOREGROUND_COLOR_OFFSET, part))
             # consume the required 'on' keyword after the foreground color
             next(style_parts)
 
         # next part has to be the background color
         part = next(style_parts)
-        ansi_start_code, ansi_end_code = translate_colorname_to_ansi_code(
-            part, ansi.BACKGROUND_COLOR_OFFSET, colormode, colorpalette)
-        ansi_start_sequence.append(ansi_start_code)
-        ansi_end_sequence.append(ansi_end_code)
+        parts.append((ansi.BACKGROUND_COLOR_OFFSET, part))
     except StopIteration:  # we've consumed all parts of the styling string
         pass
 
+    return tuple(parts)
+
+
+def parse_style(style, colorpalette):
+    """
+    Parse the given style into its color mode independent parts.
+
+    Every part is either the name of a modifier or
+    a ``(offset, red, green, blue)`` tuple for a fore- or background color.
+    See ``translate_style`` for examples of styles.
+
+    :param str style: the style to parse
+    :parma dict colorpalette: the color palette to use for the color name mapping
+
+    :returns tuple: the parts of the style
+    """
+    return tuple(
+        part if isinstance(part, str)
+        else (part[0],) + resolve_colorname_to_rgb(part[1], colorpalette)
+        for part in split_style(style))
+
+
+def resolve_style(style, colormode, colorpalette, quantization=ansi.QUANTIZATION_CUBE):
+    """
+    Parse and render the given style in one pass.
+
+    The colors are resolved with the ANSI code index of the color palette,
+    thus, a color which was resolved before for the color mode is one dict lookup.
+
+    :param str style: the style to resolve
+    :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+    :parma dict colorpalette: the color palette to use for the color name mapping
+    :param str quantization: the quantization to use. See ``translate_rgb_to_ansi_code``
+
+    :returns tuple: the style parts like returned by ``parse_style`` and
+                    the ANSI start and end escape code sequences
+    """
+    parts = []
+    ansi_start_sequence = []
+    ansi_end_sequence = []
+
+    for part in split_style(style):
+        if isinstance(part, str):
+            parts.append(part)
+            ansi_start_code, ansi_end_code = resolve_modifier_to_ansi_code(part, colormode)
+        else:
+            part, (ansi_start_code, ansi_end_code) = resolve_color(
+                part[1], part[0], colormode, colorpalette, quantization)
+            parts.append(part)
+
+        ansi_start_sequence.append(ansi_start_code)
+        ansi_end_sequence.append(ansi_end_code)
+
+    return tuple(parts), (''.join(ansi_start_sequence), ''.join(ansi_end_sequence))
+
+
+def render_style(style_parts, colormode, quantization=ansi.QUANTIZATION_CUBE):
+    """
+    Render the given style parts to an ANSI escape code
+    sequence for the given color mode.
+
+    :param tuple style_parts: the style parts returned by ``parse_style``
+    :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+    :param str quantization: the quantization to use. See ``translate_rgb_to_ansi_code``
+    """
+    ansi_start_sequence = []
+    ansi_end_sequence = []
+
+    for part in style_parts:
+        if isinstance(part, str):
+            ansi_start_code, ansi_end_code = resolve_modifier_to_ansi_code(part, colormode)
+        else:
+            offset, red, green, blue = part
+            ansi_start_code, ansi_end_code = translate_rgb_to_ansi_code(
+                red, green, blue, offset, colormode, quantization)
+
+        ansi_start_sequence.append(ansi_start_code)
+        ansi_end_sequence.append(ansi_end_code)
+
     # construct and return ANSI escape code sequence
     return ''.join(ansi_start_sequence), ''.join(ansi_end_sequence)
 
 
+def translate_style(style, colormode, colorpalette, quantization=ansi.QUANTIZATION_CUBE):
+    """
+    Translate the given style to an ANSI escape code
+    sequence.
+
+    ``style`` examples are:
+
+    * green
+    * bold
+    * red_on_black
+    * bold_green
+    * italic_yellow_on_cyan
+
+    :param str style: the style to translate
+    :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+    :parma dict colorpalette: the color palette to use for the color name mapping
+    :param str quantization: the quantization to use. See ``translate_rgb_to_ansi_code``
+    """
+    return resolve_style(style, colormode, colorpalette, quantization)[1]
+
+
 def style_string(string, ansi_style, colormode, nested=False):
     """
     Style the given string according to the given
@@ -220,68 +426,327 @@ def style_string(string, ansi_style, colormode, nested=False):
             nest_ph=ansi.NEST_PLACEHOLDER if nested else '')
 
 
+def render_rope(rope, colormode, scoped=False):
+    """
+    Render the given ColorfulString rope for the given color mode.
+
+    The rope is flattened in a single pass. Nest placeholders in the text
+    of a styled segment are replaced by the start code of the segment,
+    while a nested segment itself is followed by the start code of its enclosing
+    segment in order to continue the enclosing style.
+    The result is the same as styling every segment with ``style_string``
+    from the innermost to the outermost segment.
+
+    :param rope: the rope to render. See ``ColorfulString``
+    :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+    :param bool scoped: if the ``ScopedSegment`` objects are rendered for their own
+                        color mode instead of the given color mode
+
+    :returns str: the rendered string
+    """
+    if colormode == terminal.NO_COLORS:
+        return _render_rope_without_styles(rope, scoped)
+
+    if isinstance(rope, str):
+        return rope
+
+    parts = []
+
+    # every node is stacked together with the start code of
+    # its enclosing styled segment or ``None`` on the top level.
+    nodes = [(rope, None)]
+    while nodes:
+        node, enclosing_start_code = nodes.pop()
+        node_type = type(node)
+        if node_type is tuple:
+            nodes.append((node[1], enclosing_start_code))
+            nodes.append((node[0], enclosing_start_code))
+            continue
+
+        if node_type is StyledSegment:
+            start_code, end_code = node.style.render(colormode)
+            if node.nested:
+                end_code += (ansi.NEST_PLACEHOLDER if enclosing_start_code is None
+                             else enclosing_start_code)
+
+            parts.append(start_code)
+            # the end code is stacked without enclosing start code
+            # so that it's emitted unchanged after the segment's text.
+            nodes.append((end_code, None))
+            nodes.append((node.rope, start_code))
+            continue
+
+        if node_type is ScopedSegment:
+            if not scoped:
+                nodes.append((node.rope, enclosing_start_code))
+                continue
+            text = node.render()
+        else:
+            text = node if isinstance(node, str) else node.styled_string
+        if enclosing_start_code is not None:
+            text = text.replace(ansi.NEST_PLACEHOLDER, enclosing_start_code)
+        parts.append(text)
+
+    return ''.join(parts)
+
+
+def _render_rope_without_styles(rope, scoped=False):
+    """
+    Render the given ColorfulString rope without any styles.
+
+    :param bool scoped: if the ``ScopedSegment`` objects are rendered for their own color mode
+    """
+    if isinstance(rope, str):
+        return rope
+
+    parts = []
+
+    nodes = [rope]
+    while nodes:
+        node = nodes.pop()
+        node_type = type(node)
+        if node_type is tuple:
+            nodes.append(node[1])
+            nodes.append(node[0])
+        elif node_type is StyledSegment:
+            nodes.append(node.rope)
+        elif node_type is ScopedSegment:
+            if scoped:
+                parts.append(node.render())
+            else:
+                nodes.append(node.rope)
+        elif isinstance(node, str):
+            parts.append(node)
+        else:
+            parts.append(node.orig_string)
+
+    return ''.join(parts)
+
+
+class StyledSegment():
+    """
+    Represents a segment of a ColorfulString which is
+    styled with a ColorfulStyle.
+
+    The ANSI escape codes are rendered on demand for the requested color mode.
+    See ``render_rope``.
+    """
+    __slots__ = ('style', 'rope', 'nested')
+
+    def __init__(self, style, rope, nested):
+        self.style = style
+        self.rope = rope
+        self.nested = nested
+
+
+class RenderedSegment():
+    """
+    Represents a segment of a ColorfulString which
+    was already rendered for a specific color mode.
+    """
+    __slots__ = ('orig_string', 'styled_string')
+
+    def __init__(self, orig_string, styled_string):
+        self.orig_string = orig_string
+        self.styled_string = styled_string
+
+
+class ScopedSegment():
+    """
+    Represents a segment of a ColorfulString which was
+    created within a ``Colorful.scoped_setup``.
+
+    The segment keeps the color mode of the scoped setup, thus, it's rendered
+    for that color mode wherever the segment ends up - even if it's concatenated
+    to or styled by a ColorfulString which was created outside of the scope.
+    """
+    __slots__ = ('rope', 'colormode', '_rendering')
+
+    def __init__(self, rope, colormode):
+        self.rope = rope
+        self.colormode = colormode
+        self._rendering = None
+
+    def render(self):
+        """
+        Render the segment for its color mode.
+        """
+        if self._rendering is None:
+            self._rendering = render_rope(self.rope, self.colormode, scoped=True)
+        return self._rendering
+
+
+def scope_rope(rope, colorful_ctx):
+    """
+    Wrap the given rope in a ``ScopedSegment`` if a scoped setup
+    with a color mode is active for the given colorful object.
+
+    :returns: the rope to use
+    """
+    scoped_setups = _scoped_setups.get()
+    if scoped_setups is None:
+        return rope
+
+    scoped_setup = scoped_setups.get(colorful_ctx)
+    if scoped_setup is None or scoped_setup[0] is None:
+        return rope
+
+    colormode = scoped_setup[0]
+    if type(rope) is ScopedSegment and rope.colormode == colormode:
+        return rope
+    return ScopedSegment(rope, colormode)
+
+
 class ColorfulString():
     """
     Represents a colored string
+
+    The string is stored as rope, which is a tree of ``(left, right)`` tuples
+    with plain strings, ``StyledSegment``, ``RenderedSegment`` and ``ScopedSegment``
+    objects as leaves.
+    This makes concatenating ColorfulStrings a constant time operation.
+
+    The string is rendered for a color mode only once it's needed and
+    the rendered strings are cached per color mode. Thus, the same
+    ColorfulString can be rendered for different color modes.
+
+    A ColorfulString created within a ``Colorful.scoped_setup`` keeps the
+    color mode of the scoped setup, thus, ``str()`` renders it for that
+    color mode outside of the scope, in other threads and as part of other
+    ColorfulStrings, too. See ``ScopedSegment``.
     """
+    __slots__ = ('_rope', '_length', '_renderings', 'colorful_ctx')
+
     def __init__(self, orig_string, styled_string, colorful_ctx):
-        self.orig_string = str(orig_string)
-        self.styled_string = str(styled_string)
+        orig_string = str(orig_string)
+        styled_string = str(styled_string)
+        if orig_string == styled_string:
+            rope = orig_string
+        else:
+            rope = RenderedSegment(orig_string, styled_string)
+        self._rope = scope_rope(rope, colorful_ctx)
+        self._length = len(orig_string)
+        self._renderings = None
         self.colorful_ctx = colorful_ctx
 
-    def __str__(self):
-        if self.colorful_ctx.colormode == terminal.NO_COLORS:
-            return self.orig_string
+    @classmethod
+    def _from_rope(cls, rope, length, colorful_ctx):
+        """
+        Create a new ColorfulString from the given rope.
+        """
+        colorful_string = cls.__new__(cls)
+        # the hot path of concatenations without any scoped setup skips the call
+        if _scoped_setups.get() is not None:
+            rope = scope_rope(rope, colorful_ctx)
+        colorful_string._rope = rope
+        colorful_string._length = length
+        colorful_string._renderings = None
+        colorful_string.colorful_ctx = colorful_ctx
+        return colorful_string
+
+    def _get_colormode(self):
+        """
+        Get the color mode ``str()`` renders this ColorfulString for on the top level.
+        """
+        if type(self._rope) is ScopedSegment:
+            return self._rope.colormode
+        return self.colorful_ctx.colormode
+
+    def render(self, colormode, minimal=False, scoped=False):
+        """
+        Render this ColorfulString for the given color mode.
+
+        :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+        :param bool minimal: if only the changes in the SGR state of the terminal
+                             should be rendered. See ``ansi.minimize_sgr``
+        :param bool scoped: if the parts created within a scoped setup are rendered
+                            for the color mode of their scoped setup. By default
+                            the whole string is rendered for the given color mode.
+
+        :returns str: the rendered string
+        """
+        if self._renderings is None:
+            self._renderings = {}
+
+        key = (colormode, minimal, scoped)
+        try:
+            return self._renderings[key]
+        except KeyError:
+            pass
+
+        if minimal:
+            rendering = ansi.minimize_sgr(self.render(colormode, scoped=scoped))
         else:
-            return self.styled_string
+            rendering = render_rope(self._rope, colormode, scoped)
+
+        self._renderings[key] = rendering
+        return rendering
+
+    @property
+    def orig_string(self):
+        """
+        Get the original string without any styles
+        """
+        return self.render(terminal.NO_COLORS)
+
+    @property
+    def styled_string(self):
+        """
+        Get the string styled for the color mode of the colorful object.
+        The parts created within a scoped setup are styled for its color mode.
+        """
+        return self.render(self.colorful_ctx.colormode, scoped=True)
+
+    def __str__(self):
+        return self.styled_string
 
     def __len__(self):
-        return len(self.orig_string)
+        return self._length
 
     def __iter__(self):
         return iter(self.styled_string)
 
     def __add__(self, other):
         if isinstance(other, ColorfulString):
-            return ColorfulString(
-                self.orig_string + other.orig_string,
-                self.styled_string + other.styled_string,
-                self.colorful_ctx)
+            return ColorfulString._from_rope(
+                (self._rope, other._rope), self._length + other._length, self.colorful_ctx)
 
-        return ColorfulString(
-            self.orig_string + other,
-            self.styled_string + other,
-            self.colorful_ctx)
+        if not isinstance(other, str):
+            return NotImplemented
+
+        return ColorfulString._from_rope(
+            (self._rope, other), self._length + len(other), self.colorful_ctx)
 
     def __iadd__(self, other):
         if isinstance(other, ColorfulString):
-            self.orig_string += other.orig_string
-            self.styled_string += other.styled_string
+            self._rope = (self._rope, other._rope)
+            self._length += other._length
+        elif isinstance(other, str):
+            self._rope = (self._rope, other)
+            self._length += len(other)
         else:
-            self.orig_string += other
-            self.styled_string += other
+            return NotImplemented
 
+        self._renderings = None
         return self
 
     def __radd__(self, other):
         if isinstance(other, ColorfulString):
-            return ColorfulString(
-                other.orig_string + self.orig_string,
-                other.styled_string + self.styled_string,
-                self.colorful_ctx)
+            return other + self
 
         # we return handover the conversion to the
         # object on the left side
         return other + self.styled_string
 
     def __mul__(self, other):
-        return ColorfulString(
-            self.orig_string * other,
-            self.styled_string * other,
-            self.colorful_ctx)
+        rope = ''
+        for _ in range(other):
+            rope = (rope, self._rope)
+
+        return ColorfulString._from_rope(rope, self._length * max(other, 0), self.colorful_ctx)
 
     def __format__(self, format_spec):
-        if self.colorful_ctx.colormode == terminal.NO_COLORS:
+        if self._get_colormode() == terminal.NO_COLORS:
             return self.orig_string.__format__(format_spec)
 
         # append nested placeholder to styled string in order to continue the
@@ -299,12 +764,209 @@ class ColorfulString():
         return str_method
 
 
+class CompiledFormat():
+    """
+    Represents a format string which is compiled for a colorful object.
+
+    All replacement fields referring to ``c`` are resolved once when the format string
+    is compiled. Thus, formatting only has to substitute the remaining fields.
+    The format string is compiled once per color mode, color palette and
+    quantization of the colorful object. The compiled templates are cached,
+    thus, threads and asyncio tasks in different scoped setups don't
+    compile the format string over and over again.
+
+    :param str template: the format string to compile
+    :param colorful_ctx: the colorful object to resolve the ``c`` fields with
+    """
+    __slots__ = ('template', 'colorful_ctx', '_compiled_templates')
+
+    #: Holds the formatter used to parse and resolve the format string
+    formatter = string.Formatter()
+
+    def __init__(self, template, colorful_ctx):
+        self.template = template
+        self.colorful_ctx = colorful_ctx
+        #: Holds the compiled templates by ``(colormode, colorpalette_version, quantization)``.
+        #  The ``dict`` is only read and written with single operations,
+        #  thus, it's safe to share it between threads.
+        self._compiled_templates = {}
+
+    def _compile(self):
+        """
+        Compile the format string by replacing the ``c`` fields with their formatted values.
+        """
+        parts = []
+        for literal_text, field_name, format_spec, conversion in self.formatter.parse(
+                self.template):
+            parts.append(literal_text.replace('{', '{{').replace('}', '}}'))
+            if field_name is None:
+                continue
+
+            # fields with nested replacement fields in their format spec
+            # depend on the format arguments and cannot be resolved in advance.
+            if (field_name == 'c' or field_name.startswith(('c.', 'c['))) and \
+                    '{' not in format_spec:
+                value, _ = self.formatter.get_field(field_name, (), {'c': self.colorful_ctx})
+                value = self.formatter.format_field(
+                    self.formatter.convert_field(value, conversion), format_spec)
+                parts.append(value.replace('{', '{{').replace('}', '}}'))
+            else:
+                parts.append('{{{field_name}{conversion}{format_spec}}}'.format(
+                    field_name=field_name,
+                    conversion='!' + conversion if conversion else '',
+                    format_spec=':' + format_spec if format_spec else ''))
+
+        return ''.join(parts)
+
+    def format(self, *args, **kwargs):
+        """
+        Format the compiled format string with the given ``args`` and ``kwargs``.
+        """
+        colorful_ctx = self.colorful_ctx
+        key = (colorful_ctx.colormode, colorful_ctx._colorpalette_version,
+               colorful_ctx.quantization)
+        compiled_template = self._compiled_templates.get(key)
+        if compiled_template is None:
+            compiled_template = self._compile()
+            # the template is only cached if the setup didn't change while compiling
+            if key == (colorful_ctx.colormode, colorful_ctx._colorpalette_version,
+                       colorful_ctx.quantization):
+                if len(self._compiled_templates) >= MAX_COMPILED_TEMPLATES:
+                    self._compiled_templates.clear()
+                self._compiled_templates[key] = compiled_template
+
+        kwargs.setdefault('c', colorful_ctx)
+        return compiled_template.format(*args, **kwargs)
+
+    def __str__(self):
+        return self.template
+
+
+#: Holds the statistics of a ``StyleCache``
+StyleCacheInfo = collections.namedtuple(
+    'StyleCacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class StyleCache():
+    """
+    Thread-safe cache for resolved styles.
+
+    Every thread looks up the styles in its own front cache first
+    and falls back to a table which is shared by all threads.
+    The shared table is never mutated. Instead, a miss publishes
+    a new table by swapping the reference under a lock.
+    Thus, hits never acquire a lock or write to shared state,
+    which keeps the cache contention-free on free-threaded Python builds.
+
+    :param callable resolve: the function to resolve a style on a cache miss
+    :param int maxsize: the maximum number of cached styles
+    """
+    __slots__ = ('resolve', 'maxsize', '_shared', '_local', '_lock',
+                 '_thread_stats', '_retired_stats')
+
+    def __init__(self, resolve, maxsize):
+        self.resolve = resolve
+        self.maxsize = maxsize
+        self._shared = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        #: Holds the threads and their ``[hits, misses]`` statistics.
+        #  Every thread only updates its own statistics.
+        self._thread_stats = []
+        self._retired_stats = (0, 0)
+
+    def _init_thread(self, local):
+        local.styles = {}
+        local.stats = stats = [0, 0]
+
+        with self._lock:
+            # fold the statistics of finished threads
+            hits, misses = self._retired_stats
+            thread_stats = []
+            for thread, stats_of_thread in self._thread_stats:
+                if thread.is_alive():
+                    thread_stats.append((thread, stats_of_thread))
+                else:
+                    hits += stats_of_thread[0]
+                    misses += stats_of_thread[1]
+            thread_stats.append((threading.current_thread(), stats))
+            self._thread_stats = thread_stats
+            self._retired_stats = (hits, misses)
+
+    def _publish(self, key, value):
+        with self._lock:
+            shared = self._shared
+            if key in shared:
+                return
+
+            if len(shared) >= self.maxsize:
+                # drop the least recently published styles
+                shared = dict(itertools.islice(
+                    shared.items(), len(shared) - self.maxsize + 1, None))
+            else:
+                shared = dict(shared)
+            shared[key] = value
+            self._shared = shared
+
+    def __call__(self, *key):
+        local = self._local
+        try:
+            styles = local.styles
+        except AttributeError:
+            self._init_thread(local)
+            styles = local.styles
+
+        value = styles.get(key)
+        if value is not None:
+            local.stats[0] += 1
+            return value
+
+        value = self._shared.get(key)
+        if value is None:
+            local.stats[1] += 1
+            value = self.resolve(*key)
+            self._publish(key, value)
+        else:
+            local.stats[0] += 1
+
+        if len(styles) >= self.maxsize:
+            styles.clear()
+        styles[key] = value
+        return value
+
+    def cache_info(self):
+        """
+        Get the statistics of this cache.
+
+        :returns StyleCacheInfo: the ``hits``, ``misses``, ``maxsize`` and ``currsize``
+        """
+        with self._lock:
+            hits, misses = self._retired_stats
+            for _, (thread_hits, thread_misses) in self._thread_stats:
+                hits += thread_hits
+                misses += thread_misses
+            return StyleCacheInfo(hits, misses, self.maxsize, len(self._shared))
+
+    def cache_clear(self):
+        """
+        Clear this cache and its statistics.
+        """
+        with self._lock:
+            self._shared = {}
+            self._local = threading.local()
+            self._thread_stats = []
+            self._retired_stats = (0, 0)
+
+
 class Colorful():
     """
     Provides methods to style strings for terminal
     output.
 
     :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+    :param str quantization: the method to quantize RGB colors to ANSI 256 and ANSI 16 colors.
+                             Use ``QUANTIZATION_PERCEPTUAL`` to pick the perceptually nearest
+                             terminal color. See ``ansi.QUANTIZATIONS``
     """
     # re-expose the color modes from ``colorful.terminal``
     # on a package level.
@@ -314,48 +976,116 @@ class Colorful():
     ANSI_256_COLORS = terminal.ANSI_256_COLORS
     TRUE_COLORS = terminal.TRUE_COLORS
 
+    # re-expose the quantizations from ``colorful.ansi``
+    QUANTIZATION_CUBE = ansi.QUANTIZATION_CUBE
+    QUANTIZATION_PERCEPTUAL = ansi.QUANTIZATION_PERCEPTUAL
+
     # expose the `colornames` color palette
     COLORNAMES_COLORS = COLORNAMES_COLORS_PATH
 
     # expose ANSI escape codes to close colors
     # this is especially useful when using ``str.format()``.
-    close_fg_color = ansi.ANSI_ESCAPE_CODE.format(
-        code=ansi.FOREGROUND_COLOR_OFFSET + ansi.COLOR_CLOSE_OFFSET)
-    close_bg_color = ansi.ANSI_ESCAPE_CODE.format(
-        code=ansi.BACKGROUND_COLOR_OFFSET + ansi.COLOR_CLOSE_OFFSET)
+    close_fg_color = ansi.SGR_ESCAPE_CODES[
+        ansi.FOREGROUND_COLOR_OFFSET + ansi.COLOR_CLOSE_OFFSET]
+    close_bg_color = ansi.SGR_ESCAPE_CODES[
+        ansi.BACKGROUND_COLOR_OFFSET + ansi.COLOR_CLOSE_OFFSET]
 
     # expose ANSI escape codes to close modifiers
-    no_bold = ansi.ANSI_ESCAPE_CODE.format(code=ansi.MODIFIERS['bold'][1])
-    no_dimmed = ansi.ANSI_ESCAPE_CODE.format(code=ansi.MODIFIERS['dimmed'][1])
-    no_italic = ansi.ANSI_ESCAPE_CODE.format(code=ansi.MODIFIERS['italic'][1])
-    no_underlined = ansi.ANSI_ESCAPE_CODE.format(code=ansi.MODIFIERS['underlined'][1])
-    no_blinkslow = ansi.ANSI_ESCAPE_CODE.format(code=ansi.MODIFIERS['blinkslow'][1])
-    no_blinkrapid = ansi.ANSI_ESCAPE_CODE.format(code=ansi.MODIFIERS['blinkrapid'][1])
-    no_inversed = ansi.ANSI_ESCAPE_CODE.format(code=ansi.MODIFIERS['inversed'][1])
-    no_concealed = ansi.ANSI_ESCAPE_CODE.format(code=ansi.MODIFIERS['concealed'][1])
-    no_struckthrough = ansi.ANSI_ESCAPE_CODE.format(code=ansi.MODIFIERS['struckthrough'][1])
-
-    def __init__(self, colormode=None, colorpalette=None):
+    no_bold = ansi.MODIFIER_ESCAPE_CODES['bold'][1]
+    no_dimmed = ansi.MODIFIER_ESCAPE_CODES['dimmed'][1]
+    no_italic = ansi.MODIFIER_ESCAPE_CODES['italic'][1]
+    no_underlined = ansi.MODIFIER_ESCAPE_CODES['underlined'][1]
+    no_blinkslow = ansi.MODIFIER_ESCAPE_CODES['blinkslow'][1]
+    no_blinkrapid = ansi.MODIFIER_ESCAPE_CODES['blinkrapid'][1]
+    no_inversed = ansi.MODIFIER_ESCAPE_CODES['inversed'][1]
+    no_concealed = ansi.MODIFIER_ESCAPE_CODES['concealed'][1]
+    no_struckthrough = ansi.MODIFIER_ESCAPE_CODES['struckthrough'][1]
+
+    def __init__(self, colormode=None, colorpalette=None, quantization=ansi.QUANTIZATION_CUBE):
         if colormode is None:  # try to auto-detect color mode
             colormode = terminal.detect_color_support(env=os.environ)
 
-        if colorpalette is None:  # load default color palette
-            colorpalette = COLOR_PALETTE
-        elif isinstance(colorpalette, str):  # we assume it's a path to a color file
-            colorpalette = colors.parse_colors(colorpalette)
-
         #: Holds the color mode to use for this Colorful object.
-        self.colormode = colormode
+        self._colormode = colormode
+
+        #: Holds the method to quantize RGB colors to ANSI 256 and ANSI 16 colors
+        self.quantization = quantization
+
+        #: Holds the cache for the resolved styles.
+        #  The cache is keyed by the style name, the color mode, the version
+        #  of the color palette and the quantization. The color palette version
+        #  is changed whenever the color palette changes.
+        self._own_colorpalette_version = 0
+        self._style_cache = StyleCache(self._resolve_style, maxsize=STYLE_CACHE_SIZE)
 
         #: Holds the color palette to use for this Colorful object.
+        #  If no color palette is given the default color palette
+        #  is loaded on first use.
         self._colorpalette = None
-        self.colorpalette = colorpalette
+        if colorpalette is not None:
+            self.colorpalette = colorpalette
+
+    def _get_scoped_setup(self):
+        scoped_setups = _scoped_setups.get()
+        if scoped_setups is None:
+            return None
+
+        return scoped_setups.get(self)
+
+    @property
+    def colormode(self):
+        """
+        Get the current used color mode.
+
+        The color mode of an active ``scoped_setup`` takes precedence.
+        """
+        scoped_setup = self._get_scoped_setup()
+        if scoped_setup is not None and scoped_setup[0] is not None:
+            return scoped_setup[0]
+
+        return self._colormode
+
+    @colormode.setter
+    def colormode(self, colormode):
+        """
+        Set the color mode which should be used
+        """
+        self._colormode = colormode
+
+    @property
+    def quantization(self):
+        """
+        Get the method to quantize RGB colors to ANSI 256 and ANSI 16 colors.
+
+        See ``ansi.QUANTIZATIONS``.
+        """
+        return self._quantization
+
+    @quantization.setter
+    def quantization(self, quantization):
+        """
+        Set the method to quantize RGB colors to ANSI 256 and ANSI 16 colors
+        """
+        if quantization not in ansi.QUANTIZATIONS:
+            raise ColorfulError('the quantization "{}" is unknown. Use one of {}'.format(
+                quantization, ', '.join(ansi.QUANTIZATIONS)))
+
+        self._quantization = quantization
 
     @property
     def colorpalette(self):
         """
-        Get the current used color palette
+        Get the current used color palette.
+
+        The color palette of an active ``scoped_setup`` takes precedence.
         """
+        scoped_setup = self._get_scoped_setup()
+        if scoped_setup is not None and scoped_setup[1] is not None:
+            return scoped_setup[1]
+
+        if self._colorpalette is None:  # load default color palette
+            self._colorpalette = get_default_color_palette()
+
         return self._colorpalette
 
     @colorpalette.setter
@@ -363,10 +1093,19 @@ class Colorful():
         """
         Set the colorpalette which should be used
         """
-        if isinstance(colorpalette, str):  # we assume it's a path to a color file
-            colorpalette = colors.parse_colors(colorpalette)
+        self._colorpalette = colors.make_color_palette(colorpalette)
+        self._own_colorpalette_version = next(_colorpalette_versions)
 
-        self._colorpalette = colors.sanitize_color_palette(colorpalette)
+    @property
+    def _colorpalette_version(self):
+        """
+        Get the version of the current used color palette
+        """
+        scoped_setup = self._get_scoped_setup()
+        if scoped_setup is not None and scoped_setup[1] is not None:
+            return scoped_setup[2]
+
+        return self._own_colorpalette_version
 
     def setup(self, colormode=None, colorpalette=None, extend_colors=False):
         """
@@ -389,6 +1128,54 @@ class Colorful():
             else:
                 self.colorpalette = colorpalette
 
+    @contextmanager
+    def scoped_setup(self, colormode=None, colorpalette=None, extend_colors=False):
+        """
+        Setup this colorful object for the current context only.
+
+        The scoped setup is stored in a ``contextvars.ContextVar``, thus, it only
+        applies to the current thread or asyncio task and neither mutates this
+        colorful object nor creates a new one:
+
+        >>> with colorful.scoped_setup(colormode=colorful.NO_COLORS):
+        ...     print(colorful.red('not red'))
+
+        Scoped setups can be nested. The inner scope inherits the color mode
+        and the color palette which it doesn't override from the outer scope.
+
+        :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+        :param dict colorpalette: the colorpalette to use. This ``dict`` should map
+                                  color names to it's corresponding RGB value
+        :param bool extend_colors: extend the active color palette instead of replacing it
+        """
+        scoped_setups = _scoped_setups.get()
+        if scoped_setups is None:
+            scoped_setups = {}
+
+        outer_colormode, outer_colorpalette, outer_colorpalette_version = scoped_setups.get(
+            self, (None, None, None))
+
+        if colormode is None:
+            colormode = outer_colormode
+
+        if colorpalette:
+            if extend_colors:
+                colorpalette = self.colorpalette.overlay(colorpalette)
+            else:
+                colorpalette = colors.make_color_palette(colorpalette)
+            colorpalette_version = next(_colorpalette_versions)
+        else:
+            colorpalette = outer_colorpalette
+            colorpalette_version = outer_colorpalette_version
+
+        new_scoped_setups = dict(scoped_setups)
+        new_scoped_setups[self] = (colormode, colorpalette, colorpalette_version)
+        token = _scoped_setups.set(new_scoped_setups)
+        try:
+            yield self
+        finally:
+            _scoped_setups.reset(token)
+
     def disable(self):
         """
         Disable all colors and styles
@@ -430,7 +1217,11 @@ class Colorful():
         Update the currently active color palette
         with the given color palette
         """
-        self.colorpalette.update(colors.sanitize_color_palette(colorpalette))
+        if self._colorpalette is None:  # load default color palette
+            self._colorpalette = get_default_color_palette()
+
+        self._colorpalette = self._colorpalette.overlay(colorpalette)
+        self._own_colorpalette_version = next(_colorpalette_versions)
 
     def use_style(self, style_name):
         """
@@ -446,6 +1237,59 @@ class Colorful():
         else:
             self.colorpalette = style
 
+    def style_cache_info(self):
+        """
+        Get the statistics of the resolved styles cache.
+
+        :returns StyleCacheInfo: a named tuple with the ``hits``, ``misses``,
+                                 ``maxsize`` and ``currsize`` of the cache
+        """
+        return self._style_cache.cache_info()
+
+    def _get_nearest_color_index(self, metric):
+        if metric not in colors.COLOR_METRICS:
+            raise ColorfulError('the color metric "{}" is unknown. Use one of {}'.format(
+                metric, ', '.join(sorted(colors.COLOR_METRICS))))
+
+        return self.colorpalette.nearest_color_index(metric)
+
+    def nearest_color(self, rgb, metric=colors.METRIC_RGB):
+        """
+        Find the name of the nearest color in the current color palette.
+
+        The colors are looked up in a spatial index which is built lazily
+        once per color palette and color metric:
+
+        >>> colorful.nearest_color('#fa8072')
+        'salmon'
+
+        :param rgb: the RGB channel triplet or the hex RGB string
+        :param str metric: the color metric to measure the distance with.
+                           Use ``'lab'`` for the perceptual color difference.
+                           See ``colors.COLOR_METRICS``
+
+        :returns str: the color name or ``None`` if the color palette is empty
+        """
+        if isinstance(rgb, str):
+            rgb = utils.hex_to_rgb(rgb)
+
+        return self._get_nearest_color_index(metric).nearest(rgb)
+
+    def nearest_colors(self, rgbs, metric=colors.METRIC_RGB):
+        """
+        Find the names of the nearest colors in the current color palette.
+
+        See ``nearest_color``. Every distinct color is only looked up once.
+
+        :param rgbs: the iterable of RGB channel triplets or hex RGB strings
+        :param str metric: the color metric to use. See ``colors.COLOR_METRICS``
+
+        :returns list: the color names
+        """
+        index = self._get_nearest_color_index(metric)
+        return index.nearest_many(
+            utils.hex_to_rgb(rgb) if isinstance(rgb, str) else rgb for rgb in rgbs)
+
     def format(self, string, *args, **kwargs):
         """
         Format the given string with the given ``args`` and ``kwargs``.
@@ -456,6 +1300,22 @@ class Colorful():
         """
         return string.format(c=self, *args, **kwargs)
 
+    def compile_format(self, template):
+        """
+        Compile the given format string for this colorful object.
+
+        All references to ``c`` are resolved once, which makes formatting
+        the returned ``CompiledFormat`` faster than ``Colorful.format``:
+
+        >>> log_format = colorful.compile_format('{c.bold_red}{level}{c.reset} {message}')
+        >>> log_format.format(level='ERROR', message='something went wrong')
+
+        :param str template: the format string to compile
+
+        :returns CompiledFormat: the compiled format string
+        """
+        return CompiledFormat(template, self)
+
     def str(self, string):
         """
         Create a new ColorfulString instance of the given
@@ -474,6 +1334,26 @@ class Colorful():
         """
         return ColorfulString(string, string, self)
 
+    def from_ansi(self, string):
+        """
+        Create a new ColorfulString instance of the given
+        string which is already styled with ANSI escape sequences.
+
+        The styles of the string are parsed, thus, the ColorfulString
+        can be rendered for another color mode:
+
+        >>> s = colorful.from_ansi(subprocess.check_output(['ls', '--color=always']))
+        >>> s.render(colorful.ANSI_256_COLORS, minimal=True)
+
+        Use ``parser.render_ansi`` to render large streams of styled text.
+
+        :param str string: the string with ANSI escape sequences
+        """
+        # ``parser`` is imported on first use to keep ``import colorful`` cheap
+        from . import parser
+
+        return parser.segments_to_colorful_string(parser.parse_ansi([str(string)]), self)
+
     def print(self, *objects, sep=' ', end='\n', file=None, flush=False):
         """
         Print the given objects to the given file stream.
@@ -491,14 +1371,193 @@ class Colorful():
         styled_objects = [self.format(o) for o in objects]
         print(*styled_objects, sep=sep, end=end, file=file, flush=flush)
 
+    @contextmanager
+    def writer(self, file=None, buffer_size=None, max_lines=None,
+               flush_interval=None, colormode=None, minimal=False):
+        """
+        Buffer styled output and write it to the given file stream in large chunks.
+
+        Writing many styled lines with ``Colorful.print`` results in several
+        small writes per line. The writer renders the strings into a buffer
+        instead and writes it with a single call once it's full:
+
+        >>> with colorful.writer() as w:
+        ...     for i in range(10000):
+        ...         w.print(colorful.red('line'), i)
+
+        The buffer is flushed when the with block is left.
+
+        :param file: the file stream to write to. Defaults to ``sys.stdout``
+        :param int buffer_size: the number of characters to buffer before writing.
+                                Defaults to ``output.DEFAULT_BUFFER_SIZE``
+        :param int max_lines: the number of lines to buffer before writing
+        :param float flush_interval: the number of seconds to buffer before writing.
+                                     It's checked on every write.
+        :param int colormode: the color mode to render for. Defaults to the
+                              color mode of this colorful object.
+        :param bool minimal: if only the changes in the SGR state of the terminal
+                             should be rendered. See ``ansi.minimize_sgr``
+
+        :returns ColorfulWriter: the writer. See ``output.ColorfulWriter``
+        """
+        # ``output`` is imported on first use to keep ``import colorful`` cheap
+        from . import output
+
+        if file is None:
+            file = sys.stdout
+        if buffer_size is None:
+            buffer_size = output.DEFAULT_BUFFER_SIZE
+
+        writer = output.ColorfulWriter(
+            file, self, buffer_size=buffer_size, max_lines=max_lines,
+            flush_interval=flush_interval, colormode=colormode, minimal=minimal)
+        try:
+            yield writer
+        finally:
+            writer.flush()
+
+    def background_writer(self, file=None, max_queue_size=None, overflow='block',
+                          buffer_size=None, colormode=None, minimal=False):
+        """
+        Create a writer for styled output which writes from a background thread.
+
+        Writing to a slow terminal or a stalled pipe doesn't block
+        the calling threads. The strings are rendered by the calling
+        threads and written by a background thread instead:
+
+        >>> writer = colorful.background_writer(overflow='drop')
+        >>> writer.print(colorful.red('I do not block'))
+
+        The writer is closed at interpreter exit or when it's used as context manager.
+
+        :param file: the file stream to write to. Defaults to ``sys.stdout``
+        :param int max_queue_size: the maximum number of queued writes.
+                                   Defaults to ``output.DEFAULT_MAX_QUEUE_SIZE``
+        :param str overflow: what to do if the queue is full. Either ``'block'``
+                             to wait for the background thread or ``'drop'``
+                             to drop the write.
+        :param int buffer_size: the maximum number of characters coalesced into a single write.
+                                Defaults to ``output.DEFAULT_BUFFER_SIZE``
+        :param int colormode: the color mode to render for. Defaults to the
+                              color mode of this colorful object.
+        :param bool minimal: if only the changes in the SGR state of the terminal
+                             should be rendered. See ``ansi.minimize_sgr``
+
+        :returns BackgroundWriter: the writer. See ``output.BackgroundWriter``
+        """
+        from . import output
+
+        if file is None:
+            file = sys.stdout
+        if max_queue_size is None:
+            max_queue_size = output.DEFAULT_MAX_QUEUE_SIZE
+        if buffer_size is None:
+            buffer_size = output.DEFAULT_BUFFER_SIZE
+
+        return output.BackgroundWriter(
+            file, self, max_queue_size=max_queue_size, overflow=overflow,
+            buffer_size=buffer_size, colormode=colormode, minimal=minimal)
+
+    def async_writer(self, stream=None, buffer_size=None, colormode=None, minimal=False,
+                     encoding='utf-8'):
+        """
+        Create a writer for styled output in asyncio applications.
+
+        The writes of many tasks are batched into a single write
+        per event loop iteration:
+
+        >>> reader, stream = await asyncio.open_connection('localhost', 8000)
+        >>> async with colorful.async_writer(stream) as writer:
+        ...     await writer.print(colorful.red('I do not block the event loop'))
+
+        :param stream: the ``asyncio.StreamWriter`` or file stream to write to.
+                       Defaults to ``sys.stdout``
+        :param int buffer_size: the number of characters to buffer before waiting
+                                for pending writes. Defaults to ``output.DEFAULT_BUFFER_SIZE``
+        :param int colormode: the color mode to render for. Defaults to the
+                              color mode of this colorful object.
+        :param bool minimal: if only the changes in the SGR state of the terminal
+                             should be rendered. See ``ansi.minimize_sgr``
+        :param str encoding: the encoding used for an ``asyncio.StreamWriter``
+
+        :returns AsyncWriter: the writer. See ``output.AsyncWriter``
+        """
+        from . import output
+
+        if stream is None:
+            stream = sys.stdout
+        if buffer_size is None:
+            buffer_size = output.DEFAULT_BUFFER_SIZE
+
+        return output.AsyncWriter(
+            stream, self, buffer_size=buffer_size, colormode=colormode, minimal=minimal,
+            encoding=encoding)
+
+    async def aprint(self, *objects, sep=' ', end='\n', file=None, flush=False):
+        """
+        Print the given objects to the given stream without
+        blocking the running event loop.
+
+        The objects are formatted like with ``Colorful.print`` and written
+        with an async writer which is shared by all tasks of the event loop.
+        See ``Colorful.async_writer``.
+
+        :param str sep: the seperater between the objects
+        :param str end: the ending delimiter after all objects
+        :param file: the ``AsyncWriter``, ``asyncio.StreamWriter`` or file stream
+                     to write to. Defaults to ``sys.stdout``
+        :param bool flush: if the stream should be drained
+        """
+        from . import output
+
+        if file is None:
+            file = sys.stdout
+
+        writer = output.get_async_writer(file, self)
+        styled_objects = [self.format(o) for o in objects]
+        await writer.print(*styled_objects, sep=sep, end=end)
+        if flush:
+            await writer.drain()
+
     class ColorfulStyle():
         """
         Represents a colorful style
         """
-        def __init__(self, style, colormode, colorful_ctx):
+        __slots__ = ('style', 'colormode', 'colorful_ctx', 'parts', 'quantization',
+                     '_renderings')
+
+        def __init__(self, style, colormode, colorful_ctx, parts=None,
+                     quantization=ansi.QUANTIZATION_CUBE):
             self.style = style
             self.colormode = colormode
             self.colorful_ctx = colorful_ctx
+            #: Holds the color mode independent style parts. See ``parse_style``.
+            #  Without the style parts the style can only be rendered in its own color mode.
+            self.parts = parts
+            #: Holds the quantization the style is rendered with in every color mode
+            self.quantization = quantization
+            self._renderings = None
+
+        def render(self, colormode):
+            """
+            Render this style for the given color mode.
+
+            :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+
+            :returns tuple: the ANSI start and end escape code sequences
+            """
+            if colormode == self.colormode or self.parts is None:
+                return self.style
+
+            if self._renderings is None:
+                self._renderings = {}
+
+            try:
+                return self._renderings[colormode]
+            except KeyError:
+                style = self._renderings[colormode] = render_style(
+                    self.parts, colormode, self.quantization)
+                return style
 
         def evaluate(self, string, nested=False):
             """
@@ -508,10 +1567,14 @@ class Colorful():
             :param bool nested: if the string is part of another styled string
                                 (=> nested in another style)
             """
-            return ColorfulString(
-                string,
-                style_string(string, self.style, self.colormode, nested),
-                self.colorful_ctx)
+            if isinstance(string, ColorfulString):
+                rope, length = string._rope, string._length
+            else:
+                rope = str(string)
+                length = len(rope)
+
+            return ColorfulString._from_rope(
+                StyledSegment(self, rope, nested), length, self.colorful_ctx)
 
         def __str__(self):
             return self.style[0]
@@ -521,7 +1584,12 @@ class Colorful():
                 self.style[0] + other.style[0],
                 self.style[1] + other.style[1]
             )
-            return Colorful.ColorfulStyle(new_style, self.colormode, self.colorful_ctx)
+            if self.parts is None or other.parts is None:
+                new_parts = None
+            else:
+                new_parts = self.parts + other.parts
+            return Colorful.ColorfulStyle(
+                new_style, self.colormode, self.colorful_ctx, new_parts, self.quantization)
 
         def __call__(self, string, nested=False):
             return self.evaluate(string, nested)
@@ -542,8 +1610,17 @@ class Colorful():
         def __hash__(self):
             return hash((self.style, self.colormode, self.colorful_ctx))
 
-    def __getattr__(self, name):
+    def _resolve_style(self, name, colormode, colorpalette_version, quantization):
         # translate the given name into an ANSI escape code sequence
-        style = translate_style(name, self.colormode, self.colorpalette)
-        style_wrapper = self.ColorfulStyle(style, self.colormode, self)
+        parts, style = resolve_style(name, colormode, self.colorpalette, quantization)
+        style_wrapper = self.ColorfulStyle(style, colormode, self, parts, quantization)
         return style_wrapper
+
+    def __getattr__(self, name):
+        scoped_setups = _scoped_setups.get()
+        if scoped_setups is None or self not in scoped_setups:
+            return self._style_cache(
+                name, self._colormode, self._own_colorpalette_version, self._quantization)
+
+        return self._style_cache(
+            name, self.colormode, self._colorpalette_version, self._quantization)
@@ -0,0 +1,280 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import itertools
+from html import escape
+
+from . import ansi
+from . import colors
+from . import parser
+
+#: Holds the default prefix of the CSS classes
+DEFAULT_CLASS_PREFIX = 'cf-'
+
+#: Holds the maximum number of HTML tags cached by a ``HtmlConverter``
+MAX_CACHED_TAGS = 1024
+
+#: Holds the color palette names of the ANSI 16 colors.
+#  The normal colors are followed by the bright colors.
+ANSI16_COLOR_NAMES = (
+    'black', 'red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'white',
+    'brightBlack', 'brightRed', 'brightGreen', 'brightYellow',
+    'brightBlue', 'brightMagenta', 'brightCyan', 'brightWhite',
+)
+
+#: Holds the ANSI 16 colors used as fore- and background color
+#  of inversed text without fore- or background color.
+DEFAULT_FOREGROUND_COLOR = 7
+DEFAULT_BACKGROUND_COLOR = 0
+
+#: Holds the CSS declarations of the modifiers.
+#  The text decorations of the modifiers are combined.
+MODIFIER_CSS = {
+    'bold': 'font-weight:bold',
+    'dimmed': 'opacity:0.5',
+    'italic': 'font-style:italic',
+    'concealed': 'visibility:hidden',
+}
+MODIFIER_TEXT_DECORATIONS = {
+    'underlined': 'underline',
+    'blinkslow': 'blink',
+    'blinkrapid': 'blink',
+    'struckthrough': 'line-through',
+}
+
+#: Holds the modifier names by their SGR code
+MODIFIER_NAMES = {start_code: name for name, (start_code, _) in ansi.MODIFIERS.items()}
+
+
+def sgr_color_to_html_color(color):
+    """
+    Convert the given SGR color to an ANSI 16 color or a RGB color.
+
+    :param tuple color: the SGR parameters of the color. See ``ansi.DEFAULT_SGR_STATE``
+
+    ANSI 256 colors above 255 are invalid and ignored like by terminals,
+    thus, the default color is used.
+
+    :returns: the ``int`` ANSI 16 color, the ``(red, green, blue)``
+              channel values or ``None`` for the default color
+    """
+    if color is None:
+        return None
+
+    code = int(color[0])
+    if len(color) == 1:  # ANSI 16 colors
+        if code >= 90:
+            return code % 10 + 8
+        return code % 10
+
+    if color[1] == '5':  # ANSI 256 colors
+        ansi256_code = int(color[2])
+        if ansi256_code > 255:
+            return None
+        if ansi256_code < 16:
+            return ansi256_code
+        return ansi.ansi256_to_rgb(ansi256_code)
+
+    return tuple(min(int(c), 255) for c in color[2:])
+
+
+class HtmlConverter():
+    """
+    Streaming converter from text with ANSI escape sequences to HTML.
+
+    The styled text is converted into ``<span>`` elements. Adjacent text with
+    the same style is merged into a single element. The text is fed in chunks
+    of any size and only the current chunk is held in memory. Escape sequences
+    which don't change the style, like cursor movements, are dropped.
+
+    The modifiers and the ANSI 16 colors are converted into CSS classes which
+    are defined by ``stylesheet()``. ANSI 256 and true colors are converted into
+    inline styles. With ``inline_styles`` everything is converted into inline styles.
+
+    >>> converter = HtmlConverter()
+    >>> converter.feed('\\033[1;31mbold red\\033[0m & plain')
+    '<span class="cf-bold cf-fg-1">bold red</span> &amp; plain'
+
+    :param bool inline_styles: if only inline styles should be used instead of CSS classes
+    :param dict colorpalette: the color palette to use for the ANSI 16 colors.
+                              See ``ANSI16_COLOR_NAMES``. The missing colors
+                              default to the xterm colors.
+    :param str class_prefix: the prefix of the CSS classes
+    """
+    def __init__(self, inline_styles=False, colorpalette=None,
+                 class_prefix=DEFAULT_CLASS_PREFIX):
+        self.inline_styles = inline_styles
+        self.class_prefix = class_prefix
+
+        if colorpalette is None:
+            colorpalette = {}
+        else:
+            colorpalette = colors.make_color_palette(colorpalette)
+
+        #: Holds the RGB values of the ANSI 16 colors
+        self.ansi16_colors = tuple(
+            colorpalette.get(name, default)
+            for name, default in zip(ANSI16_COLOR_NAMES, ansi.ANSI16_RGB_COLORS))
+
+        self._parser = parser.AnsiParser()
+        self._tags = {}
+        #: Holds the SGR state of the currently opened ``<span>`` element
+        self._state = ansi.DEFAULT_SGR_STATE[:3]
+
+    def _css_color(self, color):
+        if isinstance(color, int):
+            color = self.ansi16_colors[color]
+        return '#{:02x}{:02x}{:02x}'.format(*color)
+
+    def _make_tag(self, state):
+        modifiers, foreground, background = state
+        foreground = sgr_color_to_html_color(foreground)
+        background = sgr_color_to_html_color(background)
+        modifier_names = sorted(MODIFIER_NAMES[code] for code in modifiers)
+
+        if 'inversed' in modifier_names:
+            foreground, background = (
+                DEFAULT_BACKGROUND_COLOR if background is None else background,
+                DEFAULT_FOREGROUND_COLOR if foreground is None else foreground)
+
+        classes = []
+        declarations = []
+        if self.inline_styles:
+            declarations.extend(
+                MODIFIER_CSS[name] for name in modifier_names if name in MODIFIER_CSS)
+            decorations = sorted({MODIFIER_TEXT_DECORATIONS[name] for name in modifier_names
+                                  if name in MODIFIER_TEXT_DECORATIONS})
+            if decorations:
+                declarations.append('text-decoration:{}'.format(' '.join(decorations)))
+        else:
+            classes.extend(
+                self.class_prefix + name for name in modifier_names
+                if name in MODIFIER_CSS or name in MODIFIER_TEXT_DECORATIONS)
+
+        for color, kind, prop in ((foreground, 'fg', 'color'),
+                                  (background, 'bg', 'background-color')):
+            if color is None:
+                continue
+            if isinstance(color, int) and not self.inline_styles:
+                classes.append('{prefix}{kind}-{color}'.format(
+                    prefix=self.class_prefix, kind=kind, color=color))
+            else:
+                declarations.append('{}:{}'.format(prop, self._css_color(color)))
+
+        attributes = []
+        if classes:
+            attributes.append(' class="{}"'.format(' '.join(classes)))
+        if declarations:
+            attributes.append(' style="{}"'.format(';'.join(declarations)))
+        return '<span{}>'.format(''.join(attributes))
+
+    def _convert(self, segments):
+        parts = []
+        append = parts.append
+        last_style = None
+        for text, style, escape_sequence in segments:
+            if escape_sequence:
+                continue
+
+            if style is last_style:
+                append(escape(text, quote=False))
+                continue
+            last_style = style
+
+            # the untracked SGR parameters are not converted
+            state = style.state[:3]
+            if state != self._state:
+                if self._state != ansi.DEFAULT_SGR_STATE[:3]:
+                    parts.append('</span>')
+                if state != ansi.DEFAULT_SGR_STATE[:3]:
+                    try:
+                        tag = self._tags[state]
+                    except KeyError:
+                        if len(self._tags) >= MAX_CACHED_TAGS:
+                            self._tags.clear()
+                        tag = self._tags[state] = self._make_tag(state)
+                    parts.append(tag)
+                self._state = state
+
+            parts.append(escape(text, quote=False))
+
+        return ''.join(parts)
+
+    def feed(self, chunk):
+        """
+        Convert the given chunk to HTML.
+
+        :param str chunk: the chunk with ANSI escape sequences
+
+        :returns str: the HTML
+        """
+        return self._convert(self._parser.feed(chunk))
+
+    def close(self):
+        """
+        Finish the conversion and close the opened ``<span>`` element.
+
+        :returns str: the HTML
+        """
+        html = self._convert(self._parser.close())
+        if self._state != ansi.DEFAULT_SGR_STATE[:3]:
+            html += '</span>'
+            self._state = ansi.DEFAULT_SGR_STATE[:3]
+        return html
+
+    def stylesheet(self):
+        """
+        Get the CSS rules for the classes used by this converter.
+
+        :returns str: the CSS rules
+        """
+        rules = []
+        for name, declaration in sorted(MODIFIER_CSS.items()):
+            rules.append('.{}{} {{ {} }}'.format(self.class_prefix, name, declaration))
+
+        # the text decorations of multiple modifiers are combined
+        names = sorted(MODIFIER_TEXT_DECORATIONS)
+        for length in range(1, len(names) + 1):
+            for combination in itertools.combinations(names, length):
+                rules.append('{} {{ text-decoration:{} }}'.format(
+                    ''.join('.' + self.class_prefix + name for name in combination),
+                    ' '.join(sorted({MODIFIER_TEXT_DECORATIONS[name] for name in combination}))))
+
+        for color in range(len(self.ansi16_colors)):
+            for kind, prop in (('fg', 'color'), ('bg', 'background-color')):
+                rules.append('.{prefix}{kind}-{color} {{ {prop}:{value} }}'.format(
+                    prefix=self.class_prefix, kind=kind, color=color,
+                    prop=prop, value=self._css_color(color)))
+
+        return '\n'.join(rules)
+
+
+def ansi_to_html(iterable_or_file, inline_styles=False, colorpalette=None,
+                 class_prefix=DEFAULT_CLASS_PREFIX):
+    """
+    Convert the given stream of text with ANSI escape sequences to HTML.
+
+    See ``HtmlConverter`` for the options.
+
+    :param iterable_or_file: the iterable of strings or the text file.
+                             A file is read in chunks of ``ansi.STREAM_CHUNK_SIZE``.
+
+    :returns: a generator of the HTML chunks
+    """
+    converter = HtmlConverter(
+        inline_styles=inline_styles, colorpalette=colorpalette, class_prefix=class_prefix)
+    for chunk in ansi.iter_chunks(iterable_or_file):
+        html = converter.feed(chunk)
+        if html:
+            yield html
+
+    html = converter.close()
+    if html:
+        yield html
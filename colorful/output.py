@@ -0,0 +1,629 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import time
+import queue
+import atexit
+import weakref
+import threading
+
+from . import core
+
+#: Holds the default number of characters which are buffered before they are written
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+#: Holds the default number of writes queued for a background writer
+DEFAULT_MAX_QUEUE_SIZE = 10000
+
+#: Holds the supported policies when the queue of a background writer is full
+OVERFLOW_BLOCK = 'block'
+OVERFLOW_DROP = 'drop'
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP)
+
+#: Holds the number of seconds to wait for the queued writes of
+#  the open background writers at interpreter exit
+EXIT_TIMEOUT = 1.0
+
+#: Holds the async writers used by ``Colorful.aprint`` per event loop.
+#  They are dropped together with their event loop. The writers of an
+#  ``asyncio.StreamWriter`` keep their event loop alive, thus, they are
+#  dropped once their event loop is closed. See ``get_async_writer``.
+_async_writers = weakref.WeakKeyDictionary()
+
+#: Holds the open background writers which are closed at interpreter exit.
+#  A writer is kept alive by its background thread until it's closed.
+_background_writers = weakref.WeakSet()
+
+
+def _close_background_writers():
+    """
+    Close the open background writers at interpreter exit.
+
+    The queued strings which aren't written within ``EXIT_TIMEOUT`` are dropped.
+    """
+    for writer in list(_background_writers):
+        try:
+            writer.close(timeout=EXIT_TIMEOUT)
+        except Exception:
+            # the error can't be handled anymore at interpreter exit
+            pass
+
+
+atexit.register(_close_background_writers)
+
+
+def render(string, colormode, minimal=False, scoped=False):
+    """
+    Render the given string for the given color mode.
+
+    :param string: the ``ColorfulString`` or any other object to render
+    :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+    :param bool minimal: if only the changes in the SGR state of the terminal
+                         should be rendered. See ``ansi.minimize_sgr``
+    :param bool scoped: if the parts created within a scoped setup are rendered
+                        for its color mode. See ``ColorfulString.render``
+
+    :returns str: the rendered string
+    """
+    if isinstance(string, core.ColorfulString):
+        return string.render(colormode, minimal, scoped)
+
+    return str(string)
+
+
+def write_to_file(file, data):
+    """
+    Write the given data to the given file stream with a single write call.
+
+    The data is written through the text layer of the file, thus,
+    the newlines are translated like for any other write.
+
+    :param file: the file stream to write to
+    :param str data: the data to write
+
+    :returns int: the number of characters written like returned by the ``write``
+                  of text files. The data isn't encoded a second time to count the
+                  bytes the text layer writes after translating the newlines.
+    """
+    file.write(data)
+    file.flush()
+    return len(data)
+
+
+class ColorfulWriter():
+    """
+    Buffered writer for styled output.
+
+    The rendered strings are collected in a buffer which is written
+    to the file in a single write call once it's full, contains ``max_lines``
+    lines, is older than ``flush_interval`` seconds or is explicitly flushed.
+    See ``write_to_file``.
+
+    :param file: the file stream to write to
+    :param colorful_ctx: the colorful object which provides the color mode
+    :param int buffer_size: the number of characters to buffer before writing
+    :param int max_lines: the number of lines to buffer before writing
+    :param float flush_interval: the number of seconds to buffer before writing.
+                                 It's checked on every write.
+    :param int colormode: the color mode to render for. Defaults to the
+                          color mode of the colorful object.
+    :param bool minimal: if only the changes in the SGR state of the terminal
+                         should be rendered. See ``ansi.minimize_sgr``
+    """
+    def __init__(self, file, colorful_ctx, buffer_size=DEFAULT_BUFFER_SIZE, max_lines=None,
+                 flush_interval=None, colormode=None, minimal=False):
+        self.file = file
+        self.colorful_ctx = colorful_ctx
+        self.buffer_size = buffer_size
+        self.max_lines = max_lines
+        self.flush_interval = flush_interval
+        self.colormode = colormode
+        self.minimal = minimal
+
+        #: Holds the rendered strings which are not written yet.
+        #  The list is reused for the whole lifetime of the writer.
+        self._buffer = []
+        self._buffer_size = 0
+        self._buffer_lines = 0
+        self._last_flush = time.monotonic()
+
+        #: Holds the amount of data and the number of write calls issued to the file.
+        #  The data written to text files is counted in characters,
+        #  not in bytes. See ``write_to_file``.
+        self.bytes_written = 0
+        self.writes = 0
+
+    def write(self, string):
+        """
+        Render and buffer the given string.
+
+        :param string: the ``ColorfulString`` or ``str`` to write
+
+        :returns int: the number of characters buffered
+        """
+        # the parts created within a scoped setup keep its color mode
+        # unless the writer renders for an explicit color mode
+        colormode = self.colormode
+        scoped = colormode is None
+        if scoped:
+            colormode = self.colorful_ctx.colormode
+
+        rendered = render(string, colormode, self.minimal, scoped)
+        self._buffer.append(rendered)
+        self._buffer_size += len(rendered)
+        if self.max_lines is not None:
+            self._buffer_lines += rendered.count('\n')
+
+        if (self._buffer_size >= self.buffer_size or
+                (self.max_lines is not None and self._buffer_lines >= self.max_lines) or
+                (self.flush_interval is not None and
+                 time.monotonic() - self._last_flush >= self.flush_interval)):
+            self.flush()
+
+        return len(rendered)
+
+    def print(self, *objects, sep=' ', end='\n'):
+        """
+        Render and buffer the given objects like the ``print()`` built-in.
+
+        :param str sep: the seperater between the objects
+        :param str end: the ending delimiter after all objects
+        """
+        for index, obj in enumerate(objects):
+            if index:
+                self.write(sep)
+            self.write(obj)
+        self.write(end)
+
+    def flush(self):
+        """
+        Write the buffered strings to the file in a single write call.
+        """
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        data = ''.join(self._buffer)
+        self._buffer.clear()
+        self._buffer_size = 0
+        self._buffer_lines = 0
+
+        self.bytes_written += write_to_file(self.file, data)
+        self.writes += 1
+
+
+class BackgroundWriter():
+    """
+    Writer for styled output which writes from a background thread.
+
+    The strings are rendered in the calling thread and put into a bounded
+    queue. A background thread coalesces the queued strings and writes them
+    to the file, thus, a slow terminal or a stalled pipe doesn't block the
+    calling threads. The queued strings are written when the writer is
+    closed, which happens at interpreter exit at the latest. At interpreter
+    exit the writer waits at most ``EXIT_TIMEOUT`` seconds for the queued
+    strings and drops the rest.
+
+    :param file: the file stream to write to
+    :param colorful_ctx: the colorful object which provides the color mode
+    :param int max_queue_size: the maximum number of queued writes
+    :param str overflow: what to do if the queue is full. Either ``OVERFLOW_BLOCK``
+                         to wait for the background thread or ``OVERFLOW_DROP``
+                         to drop the write.
+    :param int buffer_size: the maximum number of characters coalesced into a single write
+    :param int colormode: the color mode to render for. Defaults to the
+                          color mode of the colorful object.
+    :param bool minimal: if only the changes in the SGR state of the terminal
+                         should be rendered. See ``ansi.minimize_sgr``
+    """
+    def __init__(self, file, colorful_ctx, max_queue_size=DEFAULT_MAX_QUEUE_SIZE,
+                 overflow=OVERFLOW_BLOCK, buffer_size=DEFAULT_BUFFER_SIZE, colormode=None,
+                 minimal=False):
+        if overflow not in OVERFLOW_POLICIES:
+            raise core.ColorfulError('the overflow policy "{}" is unknown. Use one of {}'.format(
+                overflow, ', '.join(OVERFLOW_POLICIES)))
+
+        self.file = file
+        self.colorful_ctx = colorful_ctx
+        self.overflow = overflow
+        self.buffer_size = buffer_size
+        self.colormode = colormode
+        self.minimal = minimal
+
+        #: Holds the amount of data and the number of write calls issued to the file
+        #  and the number of writes dropped because the queue was full.
+        #  See ``ColorfulWriter``.
+        self.bytes_written = 0
+        self.writes = 0
+        self.dropped = 0
+
+        #: Holds the first error raised while writing to the file.
+        #  It's raised again by ``flush`` and ``close``.
+        self._error = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(
+            target=self._run, name='colorful-background-writer', daemon=True)
+        self._thread.start()
+        _background_writers.add(self)
+
+    def _run(self):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                self._queue.task_done()
+                return
+
+            # coalesce the strings which are already queued
+            chunks = [data]
+            size = len(data)
+            closing = False
+            while size < self.buffer_size:
+                try:
+                    data = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if data is None:
+                    closing = True
+                    break
+                chunks.append(data)
+                size += len(data)
+
+            try:
+                if self._error is None:
+                    self.bytes_written += write_to_file(self.file, ''.join(chunks))
+                    self.writes += 1
+            except Exception as exc:
+                self._error = exc
+            finally:
+                for _ in range(len(chunks) + closing):
+                    self._queue.task_done()
+
+            if closing:
+                return
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _put(self, data):
+        # the closed check and the put are atomic, thus,
+        # no string is queued after the stop sentinel.
+        with self._lock:
+            if self._closed:
+                raise core.ColorfulError('the background writer is closed')
+
+            if self.overflow == OVERFLOW_BLOCK:
+                self._queue.put(data)
+            else:
+                try:
+                    self._queue.put_nowait(data)
+                except queue.Full:
+                    self.dropped += 1
+
+    def _drop_queued(self):
+        """
+        Drop the queued strings.
+
+        :returns bool: if the stop sentinel was dropped, too
+        """
+        dropped_sentinel = False
+        while True:
+            try:
+                data = self._queue.get_nowait()
+            except queue.Empty:
+                return dropped_sentinel
+
+            if data is None:
+                dropped_sentinel = True
+            else:
+                self.dropped += 1
+            self._queue.task_done()
+
+    def write(self, string):
+        """
+        Render the given string and queue it for writing.
+
+        :param string: the ``ColorfulString`` or ``str`` to write
+
+        :returns int: the number of characters queued
+        """
+        # the parts created within a scoped setup keep its color mode
+        # unless the writer renders for an explicit color mode
+        colormode = self.colormode
+        scoped = colormode is None
+        if scoped:
+            colormode = self.colorful_ctx.colormode
+
+        rendered = render(string, colormode, self.minimal, scoped)
+        if rendered:
+            self._put(rendered)
+        return len(rendered)
+
+    def print(self, *objects, sep=' ', end='\n'):
+        """
+        Render the given objects like the ``print()`` built-in and queue them
+        for writing. The objects are queued as a single write, thus, they are
+        never interleaved with the writes of other threads.
+
+        :param str sep: the seperater between the objects
+        :param str end: the ending delimiter after all objects
+        """
+        # the parts created within a scoped setup keep its color mode
+        # unless the writer renders for an explicit color mode
+        colormode = self.colormode
+        scoped = colormode is None
+        if scoped:
+            colormode = self.colorful_ctx.colormode
+
+        self._put(sep.join(render(o, colormode, self.minimal, scoped) for o in objects) + end)
+
+    def flush(self):
+        """
+        Wait until all queued strings are written to the file.
+        """
+        self._queue.join()
+        self._raise_error()
+
+    def close(self, timeout=None):
+        """
+        Write all queued strings to the file and stop the background thread.
+
+        :param float timeout: the maximum number of seconds to wait for the queued strings.
+                              The strings which aren't written by then are dropped.
+                              Defaults to wait until all queued strings are written.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if timeout is None:
+            self._lock.acquire()
+        elif not self._lock.acquire(timeout=timeout):
+            # another thread is blocked on the full queue of a stalled file
+            return
+
+        try:
+            if self._closed:
+                return
+            self._closed = True
+        finally:
+            self._lock.release()
+
+        _background_writers.discard(self)
+        if timeout is None:
+            self._queue.put(None)
+            self._thread.join()
+        else:
+            try:
+                self._queue.put(None, timeout=max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                self._drop_queued()
+                self._queue.put_nowait(None)
+
+            self._thread.join(max(deadline - time.monotonic(), 0))
+            if self._thread.is_alive() and self._drop_queued():
+                # the background thread stops after its pending write
+                self._queue.put_nowait(None)
+
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AsyncWriter():
+    """
+    Writer for styled output in asyncio applications.
+
+    The strings are rendered in the calling coroutine and buffered.
+    The buffer is written once per event loop iteration, thus, the
+    writes of many tasks are batched into a single write.
+
+    The stream is either an ``asyncio.StreamWriter`` or a file stream.
+    An ``asyncio.StreamWriter`` is written directly and ``print`` waits
+    for its ``drain()`` to apply backpressure. A file stream is written
+    by the default executor of the event loop - one write at a time - and
+    ``print`` waits for the pending write if the buffer is full.
+
+    :param stream: the ``asyncio.StreamWriter`` or file stream to write to
+    :param colorful_ctx: the colorful object which provides the color mode
+    :param int buffer_size: the number of characters to buffer before waiting for pending writes
+    :param int colormode: the color mode to render for. Defaults to the
+                          color mode of the colorful object.
+    :param bool minimal: if only the changes in the SGR state of the terminal
+                         should be rendered. See ``ansi.minimize_sgr``
+    :param str encoding: the encoding used for an ``asyncio.StreamWriter``
+    """
+    def __init__(self, stream, colorful_ctx, buffer_size=DEFAULT_BUFFER_SIZE, colormode=None,
+                 minimal=False, encoding='utf-8'):
+        # ``asyncio`` is imported on first use to keep ``import colorful`` cheap
+        import asyncio
+
+        self.stream = stream
+        self.colorful_ctx = colorful_ctx
+        self.buffer_size = buffer_size
+        self.colormode = colormode
+        self.minimal = minimal
+        self.encoding = encoding
+
+        self._asyncio = asyncio
+        self._is_stream_writer = isinstance(stream, asyncio.StreamWriter)
+        self._buffer = []
+        self._buffer_size = 0
+        self._flush_handle = None
+        #: Holds the pending executor write of a file stream
+        self._pending_write = None
+        #: Holds the first error raised by an executor write.
+        #  It's raised again by ``drain``.
+        self._error = None
+
+        #: Holds the amount of data and the number of write calls issued to the stream.
+        #  The data written to a ``StreamWriter`` is counted in encoded bytes
+        #  and the data written to a file in characters. See ``ColorfulWriter``.
+        self.bytes_written = 0
+        self.writes = 0
+
+    def write(self, string):
+        """
+        Render and buffer the given string.
+
+        The buffer is written in the next iteration of the running event loop.
+
+        :param string: the ``ColorfulString`` or ``str`` to write
+
+        :returns int: the number of characters buffered
+        """
+        # the parts created within a scoped setup keep its color mode
+        # unless the writer renders for an explicit color mode
+        colormode = self.colormode
+        scoped = colormode is None
+        if scoped:
+            colormode = self.colorful_ctx.colormode
+
+        rendered = render(string, colormode, self.minimal, scoped)
+        if not rendered:
+            return 0
+
+        self._buffer.append(rendered)
+        self._buffer_size += len(rendered)
+        if self._buffer_size >= self.buffer_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self._asyncio.get_running_loop().call_soon(self._flush)
+
+        return len(rendered)
+
+    async def print(self, *objects, sep=' ', end='\n'):
+        """
+        Render and buffer the given objects like the ``print()`` built-in.
+
+        Waits if the stream can't keep up with the writes.
+
+        :param str sep: the seperater between the objects
+        :param str end: the ending delimiter after all objects
+        """
+        # the parts created within a scoped setup keep its color mode
+        # unless the writer renders for an explicit color mode
+        colormode = self.colormode
+        scoped = colormode is None
+        if scoped:
+            colormode = self.colorful_ctx.colormode
+
+        self.write(sep.join(render(o, colormode, self.minimal, scoped) for o in objects) + end)
+
+        if self._is_stream_writer:
+            await self.stream.drain()
+        else:
+            while self._buffer_size >= self.buffer_size and self._is_writing():
+                await self._asyncio.wait([self._pending_write])
+            self._raise_error()
+
+    async def drain(self):
+        """
+        Write the buffer and wait until the stream is drained.
+        """
+        self._flush()
+
+        if self._is_stream_writer:
+            await self.stream.drain()
+        else:
+            # the done callback of a pending write writes the remaining buffer
+            while self._is_writing():
+                await self._asyncio.wait([self._pending_write])
+            self._raise_error()
+
+    def _is_writing(self):
+        return self._pending_write is not None and not self._pending_write.done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._buffer:
+            return
+
+        if self._is_stream_writer:
+            data = ''.join(self._buffer).encode(self.encoding)
+            self._reset_buffer()
+            self.stream.write(data)
+            self.bytes_written += len(data)
+            self.writes += 1
+        elif not self._is_writing():
+            data = ''.join(self._buffer)
+            self._reset_buffer()
+            self._pending_write = self._asyncio.get_running_loop().run_in_executor(
+                None, write_to_file, self.stream, data)
+            self._pending_write.add_done_callback(self._written)
+
+    def _reset_buffer(self):
+        self._buffer.clear()
+        self._buffer_size = 0
+
+    def _written(self, future):
+        # the finished future references the event loop which
+        # must not be kept alive by the writer.
+        if self._pending_write is future:
+            self._pending_write = None
+
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is None:
+            self.bytes_written += future.result()
+            self.writes += 1
+        elif self._error is None:
+            self._error = error
+
+        # write everything which was buffered in the meantime
+        self._flush()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.drain()
+
+
+def get_async_writer(stream, colorful_ctx):
+    """
+    Get the async writer of the running event loop for the given stream.
+
+    :param stream: the ``AsyncWriter``, ``asyncio.StreamWriter`` or file stream
+    :param colorful_ctx: the colorful object which provides the color mode
+
+    :returns AsyncWriter: the async writer
+    """
+    import asyncio
+
+    if isinstance(stream, AsyncWriter):
+        return stream
+
+    loop = asyncio.get_running_loop()
+    writers = _async_writers.get(loop)
+    if writers is None:
+        for closed_loop in [other for other in list(_async_writers) if other.is_closed()]:
+            _async_writers.pop(closed_loop, None)
+        writers = _async_writers[loop] = {}
+
+    try:
+        return writers[(stream, colorful_ctx)]
+    except KeyError:
+        writer = writers[(stream, colorful_ctx)] = AsyncWriter(stream, colorful_ctx)
+        return writer
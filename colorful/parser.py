@@ -0,0 +1,350 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import re
+import collections
+
+from . import ansi
+from . import core
+from . import terminal
+
+#: Holds the maximum number of styles cached by an ``AnsiParser``
+MAX_CACHED_STYLES = 1024
+
+#: Holds the regular expression to match ANSI escape sequences.
+#  The first group holds the SGR parameters if it's an SGR escape code sequence.
+#  See ``ansi.ANSI_ESCAPE_SEQUENCE_REGEX``.
+ESCAPE_SEQUENCE_PATTERN = re.compile(r'{}|{}'.format(
+    ansi.SGR_ESCAPE_CODE_REGEX, ansi.ANSI_ESCAPE_SEQUENCE_REGEX))
+
+#: Holds a segment of parsed ANSI text.
+#  The ``style`` is the ``AnsiStyle`` of the ``text``. If ``escape`` is set
+#  the ``text`` is an escape sequence which doesn't change the style,
+#  like cursor movements, and the ``style`` is the style it's applied with.
+AnsiSegment = collections.namedtuple('AnsiSegment', ['text', 'style', 'escape'])
+
+
+def downgrade_sgr_color(color, colormode):
+    """
+    Downgrade the given SGR color to the given color mode.
+
+    Colors which are supported by the color mode are kept as they are.
+    Thus, the ANSI 16 colors keep the colors of the terminal theme.
+
+    :param tuple color: the SGR parameters of the color. See ``ansi.DEFAULT_SGR_STATE``
+    :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+
+    :returns tuple: the SGR parameters of the downgraded color or ``None``
+    """
+    if color is None or colormode == terminal.NO_COLORS:
+        return None
+
+    code = int(color[0])
+    if len(color) == 1:  # ANSI 16 colors
+        if colormode == terminal.ANSI_8_COLORS and code >= 90:
+            return (str(code - 60),)
+        return color
+
+    offset = ansi.FOREGROUND_COLOR_OFFSET if code == 38 else ansi.BACKGROUND_COLOR_OFFSET
+    if color[1] == '5':  # ANSI 256 colors
+        if colormode >= terminal.ANSI_256_COLORS:
+            return color
+
+        ansi256_code = int(color[2])
+        if ansi256_code < 16:
+            bright = ansi256_code >= 8 and colormode == terminal.ANSI_16_COLORS
+            return (str(offset + ansi256_code % 8 + (60 if bright else 0)),)
+        red, green, blue = ansi.ansi256_to_rgb(ansi256_code)
+    else:  # true colors
+        if colormode == terminal.TRUE_COLORS:
+            return color
+
+        red, green, blue = (int(c) for c in color[2:])
+        if colormode == terminal.ANSI_256_COLORS:
+            return (color[0], '5', str(ansi.rgb_to_ansi256(red, green, blue)))
+
+    return (str(ansi.rgb_to_ansi16(red, green, blue) + offset - ansi.FOREGROUND_COLOR_OFFSET),)
+
+
+def downgrade_sgr_state(state, colormode):
+    """
+    Downgrade the colors of the given SGR state to the given color mode.
+
+    :param tuple state: the SGR state. See ``ansi.DEFAULT_SGR_STATE``
+    :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+
+    :returns tuple: the downgraded SGR state
+    """
+    if colormode == terminal.NO_COLORS:
+        return ansi.DEFAULT_SGR_STATE
+
+    modifiers, foreground, background, untracked = state
+    return (modifiers, downgrade_sgr_color(foreground, colormode),
+            downgrade_sgr_color(background, colormode), untracked)
+
+
+class AnsiStyle():
+    """
+    Represents the style of parsed ANSI text.
+
+    The style can be rendered for any color mode like a ``Colorful.ColorfulStyle``.
+    It's rendered with the SGR codes of the parsed text - only colors which
+    aren't supported by the color mode are downgraded. See ``downgrade_sgr_color``.
+
+    :param tuple state: the SGR state. See ``ansi.DEFAULT_SGR_STATE``
+    """
+    __slots__ = ('state', '_renderings')
+
+    def __init__(self, state):
+        self.state = state
+        self._renderings = None
+
+    def render_state(self, colormode):
+        """
+        Get the SGR state of this style for the given color mode.
+
+        :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+
+        :returns tuple: the SGR state
+        """
+        return downgrade_sgr_state(self.state, colormode)
+
+    def render(self, colormode):
+        """
+        Render this style for the given color mode.
+
+        :param int colormode: the color mode to use. See ``translate_rgb_to_ansi_code``
+
+        :returns tuple: the ANSI start and end escape code sequences
+        """
+        if self._renderings is None:
+            self._renderings = {}
+
+        try:
+            return self._renderings[colormode]
+        except KeyError:
+            pass
+
+        state = self.render_state(colormode)
+        params = ansi.sgr_state_params(state)
+        if not params:
+            style = ('', '')
+        else:
+            modifiers, foreground, background, untracked = state
+            if untracked:
+                # untracked SGR parameters can only be reset by resetting everything
+                end_params = ['0']
+            else:
+                end_params = [str(code) for code in sorted(
+                    {ansi.MODIFIER_RESET_CODES[m] for m in modifiers})]
+                if foreground is not None:
+                    end_params.append(str(ansi.FOREGROUND_COLOR_OFFSET + ansi.COLOR_CLOSE_OFFSET))
+                if background is not None:
+                    end_params.append(str(ansi.BACKGROUND_COLOR_OFFSET + ansi.COLOR_CLOSE_OFFSET))
+
+            style = (
+                '{csi}{params}m'.format(csi=ansi.CSI, params=';'.join(params)),
+                '{csi}{params}m'.format(csi=ansi.CSI, params=';'.join(end_params))
+            )
+
+        self._renderings[colormode] = style
+        return style
+
+    def __eq__(self, other):
+        if not isinstance(other, AnsiStyle):
+            return False
+
+        return self.state == other.state
+
+    def __hash__(self):
+        return hash(self.state)
+
+    def __repr__(self):
+        return 'AnsiStyle({!r})'.format(self.state)
+
+
+class AnsiParser():
+    """
+    Incremental parser for text with ANSI escape sequences.
+
+    The text is fed in chunks of any size. Escape sequences which
+    are split across chunks are parsed once they are complete.
+    The SGR state is tracked across chunks, thus, only the
+    current chunk is held in memory.
+
+    >>> parser = AnsiParser()
+    >>> parser.feed('\\033[31mred \\033[')
+    [AnsiSegment(text='red ', style=AnsiStyle(...), escape=False)]
+    >>> parser.feed('1mbold red')
+    [AnsiSegment(text='bold red', style=AnsiStyle(...), escape=False)]
+    """
+    def __init__(self):
+        self._incomplete = ''
+        #: Holds the styles by their SGR state and the memoized transitions
+        #  between the styles by the id of the style and the SGR parameters.
+        #  Every style which is the source of a transition is kept alive by
+        #  ``_styles``, thus, its id is unique while the transition is cached.
+        self._styles = {}
+        self._transitions = {}
+        self._style = self._get_style(ansi.DEFAULT_SGR_STATE)
+
+    @property
+    def state(self):
+        """
+        Get the current SGR state. See ``ansi.DEFAULT_SGR_STATE``
+        """
+        return self._style.state
+
+    def _get_style(self, state):
+        try:
+            return self._styles[state]
+        except KeyError:
+            style = self._styles[state] = AnsiStyle(state)
+            return style
+
+    def _apply_sgr_params(self, style, params):
+        key = (id(style), params)
+        try:
+            return self._transitions[key]
+        except KeyError:
+            pass
+
+        if len(self._styles) >= MAX_CACHED_STYLES:
+            self._styles.clear()
+            self._transitions.clear()
+            self._styles[style.state] = style
+
+        new_style = self._transitions[key] = self._get_style(
+            ansi.apply_sgr_params(style.state, params))
+        return new_style
+
+    def _parse(self, string):
+        segments = []
+        append = segments.append
+        style = self._style
+
+        position = 0
+        for match in ESCAPE_SEQUENCE_PATTERN.finditer(string):
+            start = match.start()
+            if start > position:
+                append(AnsiSegment(string[position:start], style, False))
+
+            params = match.group(1)
+            if params is None:
+                append(AnsiSegment(match.group(), style, True))
+            else:
+                style = self._apply_sgr_params(style, params)
+            position = match.end()
+
+        if position < len(string):
+            append(AnsiSegment(string[position:], style, False))
+
+        self._style = style
+        return segments
+
+    def feed(self, chunk):
+        """
+        Parse the given chunk.
+
+        :param str chunk: the chunk to parse
+
+        :returns list: the parsed ``AnsiSegment``s
+        """
+        chunk, self._incomplete = ansi.split_incomplete_escape_sequence(
+            self._incomplete + chunk)
+        return self._parse(chunk)
+
+    def close(self):
+        """
+        Finish parsing.
+
+        An incomplete escape sequence at the end of the
+        text is returned as text of the current style.
+
+        :returns list: the parsed ``AnsiSegment``s
+        """
+        incomplete, self._incomplete = self._incomplete, ''
+        if not incomplete:
+            return []
+
+        return [AnsiSegment(incomplete, self._style, False)]
+
+
+def parse_ansi(iterable_or_file):
+    """
+    Parse the given stream of text with ANSI escape sequences.
+
+    :param iterable_or_file: the iterable of strings or the text file.
+                             A file is read in chunks of ``ansi.STREAM_CHUNK_SIZE``.
+
+    :returns: a generator of the parsed ``AnsiSegment``s
+    """
+    parser = AnsiParser()
+    for chunk in ansi.iter_chunks(iterable_or_file):
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def render_ansi(iterable_or_file, colormode):
+    """
+    Render the given stream of text with ANSI escape sequences for the given color mode.
+
+    Colors which aren't supported by the color mode are downgraded and
+    only the changes in the SGR state are rendered. See ``ansi.minimize_sgr``.
+
+    :param iterable_or_file: the iterable of strings or the text file.
+                             A file is read in chunks of ``ansi.STREAM_CHUNK_SIZE``.
+    :param int colormode: the color mode to render for. See ``translate_rgb_to_ansi_code``
+
+    :returns: a generator of the rendered strings
+    """
+    state = ansi.DEFAULT_SGR_STATE
+    for text, style, escape in parse_ansi(iterable_or_file):
+        if escape and colormode == terminal.NO_COLORS:
+            continue
+
+        target_state = style.render_state(colormode)
+        params = ansi.sgr_state_diff(state, target_state)
+        if params:
+            yield '{csi}{params}m{text}'.format(csi=ansi.CSI, params=';'.join(params), text=text)
+        else:
+            yield text
+        state = target_state
+
+    params = ansi.sgr_state_diff(state, ansi.DEFAULT_SGR_STATE)
+    if params:
+        yield '{csi}{params}m'.format(csi=ansi.CSI, params=';'.join(params))
+
+
+def segments_to_colorful_string(segments, colorful_ctx):
+    """
+    Create a ColorfulString from the given parsed segments.
+
+    :param segments: the iterable of ``AnsiSegment``s
+    :param colorful_ctx: the colorful object of the ColorfulString
+
+    :returns ColorfulString: the ColorfulString
+    """
+    rope = ''
+    length = 0
+    for text, style, escape in segments:
+        if escape:
+            # escape sequences are not part of the original string
+            node = core.RenderedSegment('', text)
+        else:
+            node = text
+            length += len(text)
+
+        if style.state != ansi.DEFAULT_SGR_STATE:
+            node = core.StyledSegment(style, node, False)
+
+        rope = node if rope == '' else (rope, node)
+
+    return core.ColorfulString._from_rope(rope, length, colorful_ctx)
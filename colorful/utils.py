@@ -37,3 +37,46 @@ def check_hex(value):
     regex = r'[0-9a-f]{{{length}}}'.format(length=length)
     if not re.search(regex, value, re.I):
         raise ValueError('Invalid Hex String: #{}'.format(value))
+
+
+def _srgb_to_linear(value):
+    value = value / 255.0
+    if value <= 0.04045:
+        return value / 12.92
+    return ((value + 0.055) / 1.055) ** 2.4
+
+
+#: Holds the linear light intensity of the sRGB channel values
+SRGB_TO_LINEAR = tuple(_srgb_to_linear(v) for v in range(256))
+
+#: Holds the D65 reference white of the sRGB color space in the CIE XYZ color space
+D65_WHITE_POINT = (0.95047, 1.0, 1.08883)
+
+
+def _lab_f(t):
+    if t > 216.0 / 24389.0:
+        return t ** (1.0 / 3.0)
+    return (24389.0 / 27.0 * t + 16.0) / 116.0
+
+
+def rgb_to_lab(red, green, blue):
+    """
+    Convert the given sRGB channel triplet to the CIELAB color space.
+
+    The euclidean distance of two colors in the CIELAB color space
+    approximates how different the colors are perceived.
+
+    :returns tuple: the ``(L, a, b)`` coordinates
+    """
+    try:
+        if 0 <= red < 256 and 0 <= green < 256 and 0 <= blue < 256:
+            r, g, b = SRGB_TO_LINEAR[red], SRGB_TO_LINEAR[green], SRGB_TO_LINEAR[blue]
+        else:  # the channel values are out of the lookup table range
+            r, g, b = _srgb_to_linear(red), _srgb_to_linear(green), _srgb_to_linear(blue)
+    except TypeError:  # the channel values are no integers and can't index the lookup table
+        r, g, b = _srgb_to_linear(red), _srgb_to_linear(green), _srgb_to_linear(blue)
+
+    fx = _lab_f((0.4124564 * r + 0.3575761 * g + 0.1804375 * b) / D65_WHITE_POINT[0])
+    fy = _lab_f((0.2126729 * r + 0.7151522 * g + 0.0721750 * b) / D65_WHITE_POINT[1])
+    fz = _lab_f((0.0193339 * r + 0.1191920 * g + 0.9503041 * b) / D65_WHITE_POINT[2])
+    return (116.0 * fy - 16.0, 500.0 * (fx - fy), 200.0 * (fy - fz))
@@ -0,0 +1,48 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+#: Holds the palette cache directory used while collecting the tests.
+#  Collecting a test module may already load the default color palette.
+_session_palette_cache_dir = None
+_orig_palette_cache_dir = None
+
+
+def pytest_configure(config):
+    global _session_palette_cache_dir, _orig_palette_cache_dir
+
+    _session_palette_cache_dir = tempfile.mkdtemp(prefix='colorful-palette-cache-')
+    _orig_palette_cache_dir = os.environ.get('COLORFUL_PALETTE_CACHE_DIR')
+    os.environ['COLORFUL_PALETTE_CACHE_DIR'] = _session_palette_cache_dir
+
+
+def pytest_unconfigure(config):
+    if _orig_palette_cache_dir is None:
+        os.environ.pop('COLORFUL_PALETTE_CACHE_DIR', None)
+    else:
+        os.environ['COLORFUL_PALETTE_CACHE_DIR'] = _orig_palette_cache_dir
+    shutil.rmtree(_session_palette_cache_dir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def palette_cache_dir(tmpdir_factory, monkeypatch):
+    """
+    Store the compiled color palettes in a temporary directory
+    instead of the user cache directory
+    """
+    cache_dir = tmpdir_factory.mktemp('palette-cache')
+    monkeypatch.setenv('COLORFUL_PALETTE_CACHE_DIR', str(cache_dir))
+    monkeypatch.delenv('COLORFUL_NO_PALETTE_CACHE', raising=False)
+    return cache_dir
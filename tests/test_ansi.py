@@ -9,6 +9,7 @@ Terminal string styling done right, in Python.
 """
 
 import os
+import itertools
 
 import pytest
 
@@ -27,3 +28,209 @@ def test_rgb_to_ansi256(r, g, b, result):
     """
 
     assert result == ansi.rgb_to_ansi256(r, g, b)
+
+
+#: Holds the channel values which lie on the quantization boundaries
+BOUNDARY_CHANNEL_VALUES = (0, 1, 25, 26, 76, 77, 127, 128, 178, 179, 229, 230, 254, 255)
+
+
+@pytest.mark.parametrize('channel', [0, 1, 2])
+def test_rgb_to_ansi_lookup_tables(channel):
+    """
+    Test that the lookup table based quantization equals the computed quantization.
+
+    The channels are quantized independently, thus, every value of one channel
+    is tested together with the boundary values of the other channels.
+    """
+    for value, others in itertools.product(
+            range(256), itertools.product(BOUNDARY_CHANNEL_VALUES, repeat=2)):
+        rgb = list(others)
+        rgb.insert(channel, value)
+
+        assert ansi.rgb_to_ansi256(*rgb) == ansi._rgb_to_ansi256(*rgb)
+        assert ansi.rgb_to_ansi16(*rgb) == ansi._rgb_to_ansi16(*rgb)
+        assert ansi.rgb_to_ansi16(*rgb, use_bright=True) == ansi._rgb_to_ansi16(
+            *rgb, use_bright=True)
+
+
+def test_rgb_to_ansi_lookup_tables_grayscale():
+    """
+    Test that the lookup table based quantization equals the computed quantization for grays
+    """
+    for value in range(256):
+        assert ansi.rgb_to_ansi256(value, value, value) == ansi._rgb_to_ansi256(
+            value, value, value)
+        assert ansi.rgb_to_ansi16(value, value, value) == ansi._rgb_to_ansi16(
+            value, value, value)
+
+
+@pytest.mark.parametrize('r, g, b', [
+    (256, 0, 0),
+    (-1, 0, 0),
+    (127.5, 127.5, 127.5),
+])
+def test_rgb_to_ansi_out_of_table_range(r, g, b):
+    """
+    Test that channel values which are not in the lookup tables are still computed
+    """
+    assert ansi.rgb_to_ansi256(r, g, b) == ansi._rgb_to_ansi256(r, g, b)
+    assert ansi.rgb_to_ansi16(r, g, b) == ansi._rgb_to_ansi16(r, g, b)
+
+
+def test_prebuilt_escape_codes():
+    """
+    Test that the prebuilt ANSI escape codes equal the formatted ANSI escape codes
+    """
+    for code in range(108):
+        assert ansi.sgr_escape_code(code) == '\033[{}m'.format(code)
+
+    for code in range(256):
+        assert ansi.ansi256_escape_code(code, ansi.FOREGROUND_COLOR_OFFSET) == \
+            '\033[38;5;{}m'.format(code)
+        assert ansi.ansi256_escape_code(code, ansi.BACKGROUND_COLOR_OFFSET) == \
+            '\033[48;5;{}m'.format(code)
+
+    for name, (start_code, end_code) in ansi.MODIFIERS.items():
+        assert ansi.MODIFIER_ESCAPE_CODES[name] == (
+            '\033[{}m'.format(start_code), '\033[{}m'.format(end_code))
+
+    assert ansi.sgr_escape_code(108) == '\033[108m'
+    assert ansi.true_color_escape_code(1, 2, 3, ansi.BACKGROUND_COLOR_OFFSET) == \
+        '\033[48;2;1;2;3m'
+
+
+@pytest.mark.parametrize('string, expected', [
+    ('plain', 'plain'),
+    ('\033[31ma\033[39m\033[31mb\033[39m', '\033[31mab\033[0m'),
+    ('\033[1m\033[31ma\033[22m\033[39m\033[1m\033[34mb\033[22m\033[39m',
+     '\033[1;31ma\033[34mb\033[0m'),
+    # resetting bold resets dimmed, too
+    ('\033[1m\033[2ma\033[22m\033[1mb\033[22m', '\033[1;2ma\033[0;1mb\033[0m'),
+    ('\033[3m\033[38;5;196ma\033[48;2;1;2;3mb\033[39m\033[49m\033[23m',
+     '\033[3;38;5;196ma\033[48;2;1;2;3mb\033[0m'),
+    # the nest placeholder is removed
+    ('\033[34ma\033[39m\033[26m', '\033[34ma\033[0m'),
+    # codes without text in between are merged
+    ('a\033[31m\033[40m\033[1mb', 'a\033[1;31;40mb'),
+    # untracked codes are kept
+    ('\033[53m\033[31ma\033[39mb\033[55m', '\033[31;53ma\033[39mb\033[55m'),
+    ('\033[53ma\033[0mb', '\033[53ma\033[0mb'),
+])
+def test_minimize_sgr(string, expected):
+    """
+    Test minimizing the SGR escape code sequences of a string
+    """
+    assert ansi.minimize_sgr(string) == expected
+
+
+@pytest.mark.parametrize('string, expected', [
+    ('plain', 'plain'),
+    ('\033[1;31mbold red\033[0m', 'bold red'),
+    ('\033[38;2;1;2;3mtrue\033[39m \033[48;5;16mcolors\033[49m', 'true colors'),
+    # cursor movement and erasing
+    ('a\033[2K\033[1Gb\033[?25l', 'ab'),
+    # hyperlinks and window titles terminated by ST or BEL
+    ('\033]8;;https://example.com\033\\link\033]8;;\033\\', 'link'),
+    ('\033]0;title\007text', 'text'),
+    # DCS strings and other escape sequences
+    ('\033P1$r0m\033\\a\033(Bb\033Mc', 'abc'),
+    # unterminated sequences are kept
+    ('\033]0;title', '\033]0;title'),
+    ('a\033', 'a\033'),
+])
+def test_strip_ansi(string, expected):
+    """
+    Test stripping ANSI escape sequences from a string
+    """
+    assert ansi.strip_ansi(string) == expected
+    assert ansi.visible_len(string) == len(expected)
+
+
+def test_strip_ansi_stream():
+    """
+    Test stripping ANSI escape sequences which are split across chunks
+    """
+    string = '\033[1;31mred\033[0m \033]8;;https://example.com\033\\link\033]8;;\007 \033(Bend'
+    for size in range(1, len(string) + 1):
+        chunks = [string[i:i + size] for i in range(0, len(string), size)]
+        assert ''.join(ansi.strip_ansi_stream(chunks)) == 'red link end'
+
+
+def test_strip_ansi_stream_from_file():
+    """
+    Test stripping ANSI escape sequences from a text file
+    """
+    import io
+
+    file = io.StringIO('\033[31mred\033[39m\n' * (ansi.STREAM_CHUNK_SIZE // 5))
+
+    assert ''.join(ansi.strip_ansi_stream(file)) == 'red\n' * (ansi.STREAM_CHUNK_SIZE // 5)
+
+
+@pytest.mark.parametrize('code, expected', [
+    (1, (205, 0, 0)),
+    (9, (255, 0, 0)),
+    (16, (0, 0, 0)),
+    (196, (255, 0, 0)),
+    (110, (135, 175, 215)),
+    (231, (255, 255, 255)),
+    (232, (8, 8, 8)),
+    (255, (238, 238, 238)),
+])
+def test_ansi256_to_rgb(code, expected):
+    """
+    Test converting ANSI 256 colors to RGB
+    """
+    assert ansi.ansi256_to_rgb(code) == expected
+
+
+def test_perceptual_quantization_matches_linear_scan():
+    """
+    Test that the perceptual quantization picks the perceptually nearest terminal color
+    """
+    import random
+    import colorful.utils as utils
+
+    def nearest(rgb, candidates):
+        lab = utils.rgb_to_lab(*rgb)
+        return min(candidates, key=lambda code_rgb: sum(
+            (a - b) ** 2 for a, b in zip(lab, utils.rgb_to_lab(*code_rgb[1]))))[0]
+
+    ansi256_colors = [(code, ansi.ansi256_to_rgb(code)) for code in range(16, 256)]
+    ansi16_colors = list(enumerate(ansi.ANSI16_RGB_COLORS))
+
+    rng = random.Random(7)
+    for _ in range(100):
+        rgb = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        assert ansi.rgb_to_ansi256_perceptual(*rgb) == nearest(rgb, ansi256_colors)
+
+        code = nearest(rgb, ansi16_colors)
+        assert ansi.rgb_to_ansi16_perceptual(*rgb) == (90 + code - 8 if code >= 8 else 30 + code)
+        assert ansi.rgb_to_ansi16_perceptual(*rgb, bright_colors=False) == 30 + nearest(
+            rgb, ansi16_colors[:8])
+
+    # the memoized RGB values are looked up in the table
+    assert (rgb[0], rgb[1], rgb[2]) in ansi._perceptual_quantization_tables[256]
+
+
+@pytest.mark.parametrize('r, g, b, ansi256, ansi16', [
+    (250, 128, 114, 210, 31),  # salmon
+    (255, 0, 0, 196, 91),
+    (128, 128, 128, 244, 90),
+    (0, 0, 0, 16, 30),
+])
+def test_perceptual_quantization(r, g, b, ansi256, ansi16):
+    """
+    Test the perceptual quantization of some well-known colors
+    """
+    assert ansi.rgb_to_ansi256_perceptual(r, g, b) == ansi256
+    assert ansi.rgb_to_ansi16_perceptual(r, g, b) == ansi16
+
+
+def test_perceptual_quantization_of_float_channels():
+    """
+    Test that the perceptual quantization accepts float channel values
+    """
+    assert ansi.rgb_to_ansi256_perceptual(254.5, 0.5, 0.0) == ansi.rgb_to_ansi256_perceptual(
+        255, 0, 0)
+    assert ansi.rgb_to_ansi16_perceptual(205.0, 0.0, 0.0) == 31
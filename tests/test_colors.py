@@ -37,3 +37,401 @@ def test_sanitize_color_palette(colorpalette, expected):
     Test sanitizing a color palette
     """
     assert colors.sanitize_color_palette(colorpalette) == expected
+
+
+def test_load_color_palette_uses_compiled_cache(tmpdir, monkeypatch):
+    """
+    Test that loading a color palette creates and uses a compiled color palette
+    """
+    cache_dir = tmpdir.mkdir('cache')
+    monkeypatch.setenv('COLORFUL_PALETTE_CACHE_DIR', str(cache_dir))
+    palette_file = tmpdir.join('colors.json')
+    palette_file.write(
+        '[{"name": "Deep Red", "hex": "#8B0000"}, {"name": "mint", "hex": "#c5e8c8"}]')
+
+    expected = {'deepRed': (139, 0, 0), 'mint': (197, 232, 200)}
+    assert colors.load_color_palette(str(palette_file)) == expected
+
+    cache_path = colors.get_palette_cache_path(str(palette_file), str(cache_dir))
+    assert os.path.exists(cache_path)
+
+    # the color file must not be parsed if the compiled color palette is valid
+    monkeypatch.setattr(colors, 'parse_colors', None)
+    assert colors.load_color_palette(str(palette_file)) == expected
+
+
+def test_load_color_palette_rebuilds_stale_cache(tmpdir, monkeypatch):
+    """
+    Test that a stale compiled color palette is rebuilt
+    """
+    monkeypatch.setenv('COLORFUL_PALETTE_CACHE_DIR', str(tmpdir.mkdir('cache')))
+    palette_file = tmpdir.join('rgb.txt')
+    palette_file.write('0 0 0 black\n')
+
+    assert colors.load_color_palette(str(palette_file)) == {'black': (0, 0, 0)}
+
+    palette_file.write('0 0 0 black\n255 255 255 white\n')
+    assert colors.load_color_palette(str(palette_file)) == {
+        'black': (0, 0, 0), 'white': (255, 255, 255)}
+
+
+def test_load_color_palette_without_cache(tmpdir, monkeypatch):
+    """
+    Test that no compiled color palette is created if the cache is disabled
+    """
+    cache_dir = tmpdir.mkdir('cache')
+    monkeypatch.setenv('COLORFUL_PALETTE_CACHE_DIR', str(cache_dir))
+    monkeypatch.setenv('COLORFUL_NO_PALETTE_CACHE', '1')
+    palette_file = tmpdir.join('rgb.txt')
+    palette_file.write('0 0 0 black\n')
+
+    assert colors.load_color_palette(str(palette_file)) == {'black': (0, 0, 0)}
+    assert cache_dir.listdir() == []
+
+
+def test_load_compiled_color_palette_of_other_source(tmpdir):
+    """
+    Test that a compiled color palette is only valid for its source color file
+    """
+    palette_file = tmpdir.join('rgb.txt')
+    palette_file.write('0 0 0 black\n')
+    source_stat = os.stat(str(palette_file))
+
+    data = colors.compile_color_palette({'black': (0, 0, 0)}, str(palette_file), source_stat)
+
+    assert colors.load_compiled_color_palette(
+        data, str(palette_file), source_stat) == {'black': (0, 0, 0)}
+    assert colors.load_compiled_color_palette(
+        data, str(tmpdir.join('other.txt')), source_stat) is None
+    assert colors.load_compiled_color_palette(data[:-1], str(palette_file), source_stat) is None
+
+
+def test_color_palette_overlay():
+    """
+    Test overlaying colors on an immutable color palette
+    """
+    base = colors.make_color_palette({'black': '#000000', 'white': '#FFFFFF'})
+    palette = base.overlay({'white': (250, 250, 250), 'light red': '#FF8080'})
+
+    assert palette == {'black': (0, 0, 0), 'white': (250, 250, 250), 'lightRed': (255, 128, 128)}
+    assert base == {'black': (0, 0, 0), 'white': (255, 255, 255)}
+    assert 'lightRed' in palette and 'lightRed' not in base
+    assert len(palette) == 3
+    with pytest.raises(TypeError):
+        palette['red'] = (255, 0, 0)
+
+
+def test_color_palette_overlays_are_merged():
+    """
+    Test that many overlays are merged into one overlay above the bottom layer
+    """
+    base = colors.make_color_palette({'black': (0, 0, 0)})
+    palette = base
+    for i in range(colors.MAX_COLOR_PALETTE_OVERLAYS * 3):
+        palette = palette.overlay({'color{}'.format(i): (i, i, i), 'black': (i, 0, 0)})
+
+    assert len(palette._layers) <= colors.MAX_COLOR_PALETTE_OVERLAYS + 1
+    assert palette._layers[-1] is base._layers[0]
+    assert palette['black'] == (colors.MAX_COLOR_PALETTE_OVERLAYS * 3 - 1, 0, 0)
+    assert palette['color0'] == (0, 0, 0)
+    assert len(palette) == colors.MAX_COLOR_PALETTE_OVERLAYS * 3 + 1
+
+
+def test_sanitizing_a_color_palette_object():
+    """
+    Test that an immutable color palette is not sanitized again
+    """
+    palette = colors.make_color_palette({'black': '#000000'})
+
+    assert colors.sanitize_color_palette(palette) is palette
+    assert colors.make_color_palette(palette) is palette
+
+
+@pytest.mark.parametrize('metric', [colors.METRIC_RGB, colors.METRIC_LAB])
+def test_nearest_color_index_matches_linear_scan(metric):
+    """
+    Test that the nearest color index finds the same colors as a linear scan
+    """
+    import random
+
+    rng = random.Random(42)
+    palette = [('color{}'.format(i), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+               for i in range(500)]
+    # duplicated colors are resolved to the first color
+    palette.extend([('duplicate{}'.format(i), rgb) for i, (_, rgb) in enumerate(palette[:50])])
+    index = colors.NearestColorIndex(palette, metric)
+    to_point = colors.COLOR_METRICS[metric]
+
+    def distance(rgb, other):
+        return sum((a - b) ** 2 for a, b in zip(to_point(*rgb), to_point(*other)))
+
+    queries = [(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(300)]
+    queries.extend(rgb for _, rgb in palette[:50])
+    for rgb in queries:
+        expected = min(palette, key=lambda color: distance(rgb, color[1]))[0]
+        assert index.nearest(rgb) == expected
+
+    assert index.nearest_many(queries[:10]) == [index.nearest(rgb) for rgb in queries[:10]]
+    assert len(index) == 550
+
+
+def test_nearest_color_index_errors():
+    """
+    Test the nearest color index of an empty color palette and with an unknown metric
+    """
+    assert colors.NearestColorIndex([]).nearest((0, 0, 0)) is None
+
+    with pytest.raises(ValueError) as exc:
+        colors.NearestColorIndex([], 'hsv')
+    assert str(exc.value) == 'the color metric "hsv" is unknown. Use one of lab, rgb'
+
+
+def test_color_palette_nearest_color():
+    """
+    Test that the nearest color index is built once per color palette and metric
+    """
+    palette = colors.make_color_palette({'black': '#000000', 'white': '#FFFFFF'})
+    assert palette.nearest_color((100, 100, 100)) == 'black'
+    assert palette.nearest_color_index() is palette.nearest_color_index()
+    assert palette.nearest_color_index('lab').metric == 'lab'
+
+    # the CIELAB metric considers mid gray to be nearer to white
+    assert palette.nearest_color((119, 119, 119), 'lab') == 'white'
+    assert palette.nearest_color((119, 119, 119)) == 'black'
+
+    overlay = palette.overlay({'gray': (120, 120, 120)})
+    assert overlay.nearest_color((100, 100, 100)) == 'gray'
+    assert palette.nearest_color((100, 100, 100)) == 'black'
+
+
+def test_compact_color_palette():
+    """
+    Test that a compact color palette behaves like a read-only sanitized color palette
+    """
+    expected = {'black': (0, 0, 0), 'lightRed': (255, 128, 128), 'white': (255, 255, 255)}
+    palette = colors.CompactColorPalette.from_color_palette(expected)
+
+    assert palette == expected
+    assert dict(palette) == expected
+    assert list(palette) == ['black', 'lightRed', 'white']
+    assert palette['lightRed'] == (255, 128, 128)
+    assert palette.get('red') is None
+    assert 'white' in palette and 'red' not in palette
+    assert len(palette) == 3
+    assert bytes(palette.channels) == bytes([0, 0, 0, 255, 128, 128, 255, 255, 255])
+    with pytest.raises(TypeError):
+        palette['red'] = (255, 0, 0)
+
+    # a compact color palette is already sanitized
+    assert colors.sanitize_color_palette(palette) is palette
+    colorpalette = colors.make_color_palette(palette)
+    assert colorpalette._layers == (palette,)
+    assert colorpalette.overlay({'red': '#FF0000'})['red'] == (255, 0, 0)
+
+
+@pytest.mark.parametrize('colorpalette', [
+    {'black': (0, 0, 256)},
+    {'black': (0, 0, -1)},
+    {'black': (0, 0, 0.5)},
+    {'black': (0, 0)},
+])
+def test_compact_color_palette_invalid_colors(colorpalette):
+    """
+    Test that colors which cannot be stored in one byte per channel are rejected
+    """
+    with pytest.raises(ValueError):
+        colors.CompactColorPalette.from_color_palette(colorpalette)
+
+    assert colors.compact_color_palette(colorpalette) is colorpalette
+
+
+def test_load_color_palette_is_compact(tmpdir, monkeypatch):
+    """
+    Test that color palettes loaded from color files are compact
+    """
+    palette_file = tmpdir.join('colors.json')
+    palette_file.write('[{"name": "Deep Red", "hex": "#8B0000"}]')
+
+    monkeypatch.setenv('COLORFUL_PALETTE_CACHE_DIR', str(tmpdir.mkdir('cache')))
+    for _ in range(2):  # compiled and loaded from the compiled color palette
+        colorpalette = colors.load_color_palette(str(palette_file))
+        assert isinstance(colorpalette, colors.CompactColorPalette)
+        assert colorpalette == {'deepRed': (139, 0, 0)}
+
+    monkeypatch.setenv('COLORFUL_NO_PALETTE_CACHE', '1')
+    colorpalette = colors.load_color_palette(str(palette_file))
+    assert isinstance(colorpalette, colors.CompactColorPalette)
+
+
+def test_shared_color_palette(tmpdir):
+    """
+    Test publishing a color palette in shared memory and attaching to it from another process
+    """
+    import sys
+    import subprocess
+
+    import colorful.core as core
+
+    palette_file = tmpdir.join('colors.json')
+    palette_file.write(
+        '[{"name": "Deep Red", "hex": "#8B0000"}, {"name": "mint", "hex": "#c5e8c8"}]')
+
+    palette = colors.SharedColorPalette.publish(str(palette_file))
+    try:
+        assert palette == {'deepRed': (139, 0, 0), 'mint': (197, 232, 200)}
+
+        colorful = core.Colorful(colormode=core.Colorful.TRUE_COLORS, colorpalette=palette)
+        assert str(colorful.mint) == '\033[38;2;197;232;200m'
+        colorful.use_palette(palette)
+        assert colorful.colorpalette._layers == (palette,)
+
+        code = '\n'.join([
+            'import os, sys',
+            'os.environ["COLORFUL_NO_MODULE_OVERWRITE"] = "1"',
+            'import colorful.colors as colors',
+            'from colorful.core import Colorful',
+            'with colors.SharedColorPalette.attach(sys.argv[1]) as palette:',
+            '    colorful = Colorful(colormode=Colorful.TRUE_COLORS, colorpalette=palette)',
+            '    print(repr(str(colorful.deepRed)))',
+        ])
+        proc = subprocess.run(
+            [sys.executable, '-c', code, palette.name],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        assert proc.returncode == 0, proc.stderr
+        assert proc.stdout.strip() == repr('\033[38;2;139;0;0m')
+        assert proc.stderr == ''
+
+        # the attaching process must not unlink the shared memory
+        with colors.SharedColorPalette.attach(palette.name) as attached:
+            assert attached == palette
+    finally:
+        palette.unlink()
+
+    with pytest.raises(ValueError):
+        palette.unlink()
+
+
+def test_shared_color_palette_in_process_pool(tmpdir):
+    """
+    Test that attaching from the workers of a process pool keeps the resource tracker consistent
+    """
+    import sys
+    import subprocess
+
+    # the spawned workers import the functions from the script
+    script = tmpdir.join('pool.py')
+    script.write('\n'.join([
+        'import os, sys, multiprocessing',
+        'os.environ["COLORFUL_NO_MODULE_OVERWRITE"] = "1"',
+        'import colorful.colors as colors',
+        'def work(name):',
+        '    with colors.SharedColorPalette.attach(name) as palette:',
+        '        return palette["black"]',
+        'if __name__ == "__main__":',
+        '    palette = colors.SharedColorPalette.publish({"black": (1, 2, 3)})',
+        '    with multiprocessing.get_context("spawn").Pool(2) as pool:',
+        '        print(pool.map(work, [palette.name] * 2))',
+        '    palette.unlink()',
+    ]))
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = os.environ.copy()
+    env['PYTHONPATH'] = root
+    proc = subprocess.run(
+        [sys.executable, str(script)], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, cwd=root, env=env, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == '[(1, 2, 3), (1, 2, 3)]'
+    assert proc.stderr == ''
+
+
+def test_shared_color_palette_is_closed_without_errors(tmpdir):
+    """
+    Test that shared color palettes which are used but never closed are closed without errors
+    """
+    import sys
+    import subprocess
+
+    script = tmpdir.join('pool.py')
+    script.write('\n'.join([
+        'import multiprocessing',
+        'import colorful',
+        'import colorful.colors as colors',
+        'def setup(name):',
+        '    colorful.use_palette(colors.SharedColorPalette.attach(name))',
+        'def work(_):',
+        '    return colorful.colorpalette["black"]',
+        'if __name__ == "__main__":',
+        '    palette = colors.SharedColorPalette.publish({"black": (1, 2, 3)})',
+        '    pool = multiprocessing.get_context("spawn").Pool(',
+        '        2, initializer=setup, initargs=(palette.name,))',
+        '    print(pool.map(work, range(2)))',
+        '    pool.close()',
+        '    pool.join()',
+        '    setup(palette.name)',
+        '    print(work(None))',
+        '    palette.unlink()',
+    ]))
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = os.environ.copy()
+    env['PYTHONPATH'] = root
+    env.pop('COLORFUL_NO_MODULE_OVERWRITE', None)  # ``colorful.use_palette`` is used
+    proc = subprocess.run(
+        [sys.executable, str(script)], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, cwd=root, env=env, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.split() == ['[(1,', '2,', '3),', '(1,', '2,', '3)]', '(1,', '2,', '3)']
+    assert proc.stderr == ''
+
+
+def test_shared_color_palette_errors():
+    """
+    Test attaching to shared memory without a color palette
+    """
+    palette = colors.SharedColorPalette.publish({'black': (0, 0, 0)})
+    try:
+        # clear the header of the compiled color palette
+        header_size = colors.get_compiled_palette_header().size
+        palette._shared_memory.buf[:header_size] = bytes(header_size)
+        with pytest.raises(ValueError) as exc:
+            colors.SharedColorPalette.attach(palette.name)
+        assert str(exc.value) == 'the shared memory "{}" holds no color palette'.format(
+            palette.name)
+    finally:
+        palette.unlink()
+
+    with pytest.raises(ValueError):
+        colors.SharedColorPalette.publish({'black': (0, 0, 256)})
+
+
+def test_palette_cache_is_pruned(tmpdir, palette_cache_dir):
+    """
+    Test that compiled color palettes of removed color files are pruned
+    and that only a few compiled color palettes per color file name are kept
+    """
+    def load(directory):
+        palette_file = tmpdir.mkdir(directory).join('colors.json')
+        palette_file.write('[{"name": "black", "hex": "#000000"}]')
+        colors.load_color_palette(str(palette_file))
+        return palette_file
+
+    def cached():
+        return sorted(name for name in os.listdir(str(palette_cache_dir))
+                      if name.startswith('colors.json-'))
+
+    removed = load('removed')
+    removed.remove()
+    kept = load('kept')
+    assert cached() == [os.path.basename(
+        colors.get_palette_cache_path(str(kept), str(palette_cache_dir)))]
+
+    for i in range(colors.MAX_COMPILED_PALETTES_PER_NAME * 2):
+        last = load('dir{}'.format(i))
+    assert len(cached()) == colors.MAX_COMPILED_PALETTES_PER_NAME
+    assert os.path.exists(colors.get_palette_cache_path(str(last), str(palette_cache_dir)))
+
+    # the compiled color palettes of other color file names are kept
+    other = tmpdir.join('other.json')
+    other.write('[{"name": "black", "hex": "#000000"}]')
+    colors.load_color_palette(str(other))
+    assert len(cached()) == colors.MAX_COMPILED_PALETTES_PER_NAME
@@ -882,3 +882,570 @@ def test_colorfulstyles_support_equals_protocol(style_a_name, style_b_name, expe
     # then
     assert actual_equal == expected_equal
     assert actual_hash_equal == expected_equal
+
+
+def test_resolved_styles_are_cached():
+    """
+    Test that resolving the same style twice hits the style cache
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+
+    assert colorful.bold_red is colorful.bold_red
+    assert colorful.style_cache_info().hits == 1
+    assert colorful.style_cache_info().misses == 1
+
+
+def test_style_cache_invalidation():
+    """
+    Test that the style cache respects changes of the color mode and color palette
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS, colorpalette={'c': (0, 0, 0)})
+    assert str(colorful.c) == '\033[30m'
+
+    colorful.use_true_colors()
+    assert str(colorful.c) == '\033[38;2;0;0;0m'
+
+    colorful.update_palette({'c': (1, 2, 3)})
+    assert str(colorful.c) == '\033[38;2;1;2;3m'
+
+    colorful.use_palette({'c': (4, 5, 6)})
+    assert str(colorful.c) == '\033[38;2;4;5;6m'
+
+    colorful.use_style('solarized')
+    with pytest.raises(core.ColorfulError):
+        colorful.c('c is not part of the solarized style')
+
+    assert colorful.style_cache_info().misses == 5
+
+
+def test_style_cache_eviction():
+    """
+    Test that the style cache drops the least recently published styles
+    """
+    cache = core.StyleCache(lambda name: name.upper(), maxsize=2)
+
+    assert cache('a') == 'A'
+    assert cache('b') == 'B'
+    assert cache('c') == 'C'
+    assert cache.cache_info() == core.StyleCacheInfo(0, 3, 2, 2)
+    assert ('a',) not in cache._shared
+
+    cache.cache_clear()
+    assert cache.cache_info() == core.StyleCacheInfo(0, 0, 2, 0)
+
+
+def test_style_cache_is_shared_between_threads():
+    """
+    Test that the style cache is shared between threads and aggregates their statistics
+    """
+    import threading
+
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+    barrier = threading.Barrier(9)
+    styles = []
+
+    def resolve():
+        for _ in range(50):
+            styles.append(colorful.bold_red)
+
+    def resolve_in_thread():
+        resolve()
+        barrier.wait()
+        barrier.wait()
+        resolve()
+
+    threads = [threading.Thread(target=resolve_in_thread) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+
+    # resolve in another thread while the other threads are still alive
+    barrier.wait()
+    resolve()
+    resolve()
+    barrier.wait()
+
+    for thread in threads:
+        thread.join()
+
+    cache_info = colorful.style_cache_info()
+    assert cache_info.hits + cache_info.misses == 900
+    assert cache_info.currsize == 1
+    assert all(style == colorful.bold_red for style in styles)
+
+
+def test_concatenating_colorfulstrings_keeps_operands():
+    """
+    Test that concatenating ColorfulStrings doesn't change the operands
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+
+    a = colorful.red('a') + 'b'
+    b = a + colorful.black('c')
+    a += colorful.blue('d')
+    c = b + b
+
+    assert str(a) == '\033[31ma\033[39mb\033[34md\033[39m'
+    assert str(b) == '\033[31ma\033[39mb\033[30mc\033[39m'
+    assert str(c) == str(b) * 2
+    assert len(a) == len(b) == 3
+    assert len(c) == 6
+    assert c.orig_string == 'abcabc'
+
+
+def test_building_colorfulstring_from_many_segments():
+    """
+    Test building a ColorfulString from many segments with augmented assignments
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+
+    s = colorful.str('')
+    for i in range(10000):
+        s += colorful.red(str(i % 10))
+
+    assert len(s) == 10000
+    assert str(s) == ''.join('\033[31m{}\033[39m'.format(i % 10) for i in range(10000))
+
+
+def test_colorful_objects_have_no_instance_dict():
+    """
+    Test that ColorfulStrings and ColorfulStyles use slots instead of an instance dict
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+    style = colorful.red
+    s = style('Hello')
+
+    assert not hasattr(style, '__dict__')
+    assert not hasattr(s, '__dict__')
+    # str methods are still delegated to the styled string
+    assert s.upper() == '\033[31MHELLO\033[39M'
+
+
+def test_render_colorfulstring_for_different_color_modes():
+    """
+    Test rendering the same ColorfulString for different color modes
+    """
+    colorful = core.Colorful(colormode=terminal.TRUE_COLORS)
+    s = colorful.bold_red('Hello') + ' ' + colorful.on_blue(colorful.white('World'))
+
+    assert s.render(terminal.TRUE_COLORS) == (
+        '\033[1m\033[38;2;255;0;0mHello\033[22m\033[39m '
+        '\033[48;2;0;0;255m\033[38;2;255;255;255mWorld\033[39m\033[49m')
+    assert s.render(terminal.ANSI_256_COLORS) == (
+        '\033[1m\033[38;5;196mHello\033[22m\033[39m '
+        '\033[48;5;21m\033[38;5;231mWorld\033[39m\033[49m')
+    assert s.render(terminal.ANSI_16_COLORS) == (
+        '\033[1m\033[31mHello\033[22m\033[39m \033[44m\033[37mWorld\033[39m\033[49m')
+    assert s.render(terminal.NO_COLORS) == s.orig_string == 'Hello World'
+    assert str(s) == s.render(terminal.TRUE_COLORS)
+
+    # the renderings are cached per color mode
+    assert s.render(terminal.ANSI_256_COLORS) is s.render(terminal.ANSI_256_COLORS)
+
+
+def test_colorfulstring_follows_color_mode_changes():
+    """
+    Test that a ColorfulString is rendered for the current color mode of its colorful object
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+    s = colorful.red('Hello')
+
+    colorful.use_256_ansi_colors()
+    assert str(s) == '\033[38;5;196mHello\033[39m'
+
+    colorful.disable()
+    assert str(s) == 'Hello'
+
+
+def test_render_colorfulstring_with_minimal_sgr():
+    """
+    Test rendering a ColorfulString with only the changes in the SGR state
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+
+    s = colorful.red('Hello ' + colorful.blue('awesome', nested=True) + ' world')
+    assert s.render(terminal.ANSI_8_COLORS, minimal=True) == \
+        '\033[31mHello \033[34mawesome\033[31m world\033[0m'
+
+    s = colorful.bold_red('a') + colorful.bold_red('b') + colorful.bold_blue('c')
+    assert s.render(terminal.ANSI_8_COLORS, minimal=True) == '\033[1;31mab\033[34mc\033[0m'
+    assert s.render(terminal.NO_COLORS, minimal=True) == 'abc'
+
+
+def _render_rope_with_style_string(rope, colormode):
+    """
+    Render the given rope by styling every segment with ``style_string``.
+
+    This is how styled strings were rendered before the rope was flattened in
+    a single pass and serves as reference for ``core.render_rope``.
+    """
+    if isinstance(rope, tuple):
+        return ''.join(_render_rope_with_style_string(node, colormode) for node in rope)
+
+    if isinstance(rope, core.StyledSegment):
+        return core.style_string(
+            _render_rope_with_style_string(rope.rope, colormode),
+            rope.style.render(colormode), colormode, rope.nested)
+
+    if isinstance(rope, core.RenderedSegment):
+        return rope.styled_string
+
+    return rope
+
+
+@pytest.mark.parametrize('colormode', [
+    terminal.ANSI_8_COLORS, terminal.ANSI_256_COLORS, terminal.TRUE_COLORS
+])
+def test_render_nested_styles_in_single_pass(colormode):
+    """
+    Test that rendering nested styles in a single pass matches styling every segment
+    """
+    colorful = core.Colorful(colormode=colormode)
+
+    strings = [
+        colorful.red('Hello ' + colorful.blue('awesome', nested=True) + ' world'),
+        colorful.red('Hello {} world'.format(colorful.blue('awesome'))),
+        colorful.bold(colorful.red('a' + colorful.blue(
+            colorful.green('b', nested=True) + 'c', nested=True) + 'd', nested=True) + 'e'),
+        colorful.red('a', nested=True) + colorful.blue('b', nested=True),
+        core.ColorfulString('a{}'.format(core.ansi.NEST_PLACEHOLDER), 'b', colorful),
+        colorful.on_white(colorful.str('x') + core.ColorfulString(
+            'a', 'b{}'.format(core.ansi.NEST_PLACEHOLDER), colorful) + 'y'),
+        colorful.bold_red | colorful.on_black('No, I am your father') * 2,
+    ]
+
+    for s in strings:
+        assert s.render(colormode) == _render_rope_with_style_string(s._rope, colormode)
+
+
+def test_render_deeply_nested_styles():
+    """
+    Test rendering deeply nested styles
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+
+    s = colorful.str('x')
+    for i in range(5000):
+        s = (colorful.red if i % 2 else colorful.blue)(s, nested=True)
+
+    assert str(s).count('x') == 1
+    assert s.orig_string == 'x'
+
+
+@pytest.mark.parametrize('template, args, kwargs', [
+    ('{c.italic_red}{0}, I am your {who}{c.no_italic}{c.close_fg_color}', ('No',),
+     {'who': 'father'}),
+    ('{c.bold!r:>20} {} {}', (1, 2), {}),
+    ('{{c.red}} {c.red}{{}}{}', ('braces',), {}),
+    ('{c.close_fg_color:>{width}}|', (), {'width': 10}),
+    ('no replacement fields', (), {}),
+])
+def test_compiled_format(template, args, kwargs):
+    """
+    Test that a compiled format string formats like colorful.format
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+    compiled = colorful.compile_format(template)
+
+    assert compiled.format(*args, **kwargs) == colorful.format(template, *args, **kwargs)
+
+
+def test_compiled_format_invalidation():
+    """
+    Test that a compiled format string respects changes of the color mode and color palette
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS, colorpalette={'c': (0, 0, 0)})
+    compiled = colorful.compile_format('{c.c}{0}')
+    assert compiled.format('x') == '\033[30mx'
+
+    colorful.use_true_colors()
+    assert compiled.format('x') == '\033[38;2;0;0;0mx'
+
+    colorful.update_palette({'c': (1, 2, 3)})
+    assert compiled.format('x') == '\033[38;2;1;2;3mx'
+
+
+def test_compiled_format_is_compiled_once_per_setup(monkeypatch):
+    """
+    Test that a compiled format string is compiled only once for every setup it's used in
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+    compiled = colorful.compile_format('{c.red}{0}')
+
+    compile_calls = []
+    compile_template = core.CompiledFormat._compile
+
+    def count_compile(self):
+        compile_calls.append(self)
+        return compile_template(self)
+
+    monkeypatch.setattr(core.CompiledFormat, '_compile', count_compile)
+
+    for _ in range(3):
+        assert compiled.format('x') == '\033[31mx'
+        with colorful.scoped_setup(colormode=terminal.TRUE_COLORS):
+            assert compiled.format('x') == '\033[38;2;255;0;0mx'
+    assert len(compile_calls) == 2
+
+
+def test_compiled_format_in_concurrent_scoped_setups():
+    """
+    Test that threads in different scoped setups get the compiled format string of their setup
+    """
+    import threading
+
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+    compiled = colorful.compile_format('{c.red}{0}')
+    barrier = threading.Barrier(3)
+    errors = []
+
+    def render(colormode, expected):
+        with colorful.scoped_setup(colormode=colormode):
+            barrier.wait()
+            for _ in range(2000):
+                rendered = compiled.format('x')
+                if rendered != expected:
+                    errors.append(rendered)
+
+    threads = [
+        threading.Thread(target=render, args=args) for args in (
+            (terminal.ANSI_8_COLORS, '\033[31mx'),
+            (terminal.ANSI_256_COLORS, '\033[38;5;196mx'),
+            (terminal.TRUE_COLORS, '\033[38;2;255;0;0mx'))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+
+def test_print_compiled_format(capsys):
+    """
+    Test printing a compiled format string
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+
+    colorful.print(colorful.compile_format('{c.red}Hello{c.close_fg_color}'))
+
+    out, _ = capsys.readouterr()
+    assert out == '\033[31mHello\033[39m\n'
+
+
+def test_scoped_setup():
+    """
+    Test setting up a colorful object for the current context only
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS, colorpalette={'c': (0, 0, 0)})
+    compiled = colorful.compile_format('{c.c}{0}')
+
+    with colorful.scoped_setup(colormode=terminal.TRUE_COLORS) as c:
+        assert c is colorful
+        assert colorful.colormode == terminal.TRUE_COLORS
+        assert str(colorful.c('x')) == '\033[38;2;0;0;0mx\033[39m'
+
+        with colorful.scoped_setup(colorpalette={'c': (1, 2, 3)}, extend_colors=True):
+            assert colorful.colormode == terminal.TRUE_COLORS
+            assert str(colorful.c('x')) == '\033[38;2;1;2;3mx\033[39m'
+            assert compiled.format('x') == '\033[38;2;1;2;3mx'
+
+        assert str(colorful.c('x')) == '\033[38;2;0;0;0mx\033[39m'
+
+    assert colorful.colormode == terminal.ANSI_8_COLORS
+    assert colorful.colorpalette == {'c': (0, 0, 0)}
+    assert str(colorful.c('x')) == '\033[30mx\033[39m'
+    assert compiled.format('x') == '\033[30mx'
+
+
+def test_scoped_setup_strings_keep_their_colormode():
+    """
+    Test that strings created within a scoped setup keep its color mode when they're rendered
+    """
+    import threading
+
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+
+    with colorful.scoped_setup(colormode=terminal.NO_COLORS):
+        plain = colorful.red('x')
+        plain_str = colorful.str('y')
+    with colorful.scoped_setup(colormode=terminal.TRUE_COLORS):
+        true_color = colorful.red('x')
+
+    assert str(plain) == 'x'
+    assert '{}'.format(plain) == 'x'
+    assert str(plain + '!') == 'x!'
+    assert str(plain * 2) == 'xx'
+    assert str(plain_str) == 'y'
+    assert str(true_color) == '\033[38;2;255;0;0mx\033[39m'
+    assert str(colorful.red('x')) == '\033[31mx\033[39m'
+
+    # the strings keep the color mode if they are composed with other strings
+    assert str(colorful.str('a') + plain) == 'ax'
+    assert str(colorful.blue('a') + plain) == '\033[34ma\033[39mx'
+    assert str(colorful.bold(plain)) == '\033[1mx\033[22m'
+    assert str(colorful.bold(plain) + true_color) == (
+        '\033[1mx\033[22m\033[38;2;255;0;0mx\033[39m')
+    assert '{c.bold}{}{c.no_bold}'.format(plain, c=colorful) == '\033[1mx\033[22m'
+    with colorful.scoped_setup(colormode=terminal.TRUE_COLORS):
+        assert str(plain + '!') == 'x!'
+        assert str(colorful.blue('a') + plain) == '\033[38;2;0;0;255ma\033[39mx'
+
+    # the color mode can still be given explicitly
+    assert plain.render(terminal.ANSI_8_COLORS) == '\033[31mx\033[39m'
+    assert (colorful.str('a') + plain).render(terminal.ANSI_8_COLORS) == 'a\033[31mx\033[39m'
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(str(plain)))
+    thread.start()
+    thread.join()
+    assert results == ['x']
+
+
+def test_scoped_setup_is_isolated_between_threads():
+    """
+    Test that scoped setups of concurrent threads do not interfere
+    """
+    import threading
+
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+    barrier = threading.Barrier(2)
+    results = {}
+
+    def render(colormode):
+        with colorful.scoped_setup(colormode=colormode):
+            barrier.wait()
+            results[colormode] = str(colorful.red('x'))
+            barrier.wait()
+
+    threads = [
+        threading.Thread(target=render, args=(colormode,))
+        for colormode in (terminal.NO_COLORS, terminal.TRUE_COLORS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {
+        terminal.NO_COLORS: 'x',
+        terminal.TRUE_COLORS: '\033[38;2;255;0;0mx\033[39m',
+    }
+    assert colorful.colormode == terminal.ANSI_8_COLORS
+
+
+def test_scoped_setup_is_isolated_between_asyncio_tasks():
+    """
+    Test that scoped setups of concurrent asyncio tasks do not interfere
+    """
+    import asyncio
+
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+
+    async def render(colormode):
+        with colorful.scoped_setup(colormode=colormode):
+            await asyncio.sleep(0)
+            return str(colorful.red('x'))
+
+    async def main():
+        return await asyncio.gather(
+            render(terminal.NO_COLORS), render(terminal.TRUE_COLORS))
+
+    assert asyncio.run(main()) == ['x', '\033[38;2;255;0;0mx\033[39m']
+
+
+def test_nearest_color():
+    """
+    Test finding the nearest color names in the color palette
+    """
+    colorful = core.Colorful(colormode=terminal.TRUE_COLORS)
+
+    assert colorful.nearest_color('#fa8072') == 'salmon'
+    assert colorful.nearest_color((254, 0, 1)) == 'red'
+    assert colorful.nearest_colors(['#ff0000', (1, 1, 1)], metric='lab') == ['red', 'black']
+    assert colorful.nearest_color((254.5, 0.5, 0), metric='lab') == 'red'
+
+    # the index of the updated color palette knows the new colors
+    assert colorful.nearest_color((250, 128, 116)) == 'salmon'
+    colorful.update_palette({'mySalmon': (250, 128, 116)})
+    assert colorful.nearest_color((250, 128, 116)) == 'mySalmon'
+
+    with colorful.scoped_setup(colorpalette={'black': (0, 0, 0)}):
+        assert colorful.nearest_color((250, 128, 116)) == 'black'
+
+    with pytest.raises(core.ColorfulError) as exc:
+        colorful.nearest_color('#fa8072', metric='hsv')
+    assert str(exc.value) == 'the color metric "hsv" is unknown. Use one of lab, rgb'
+
+
+def test_perceptual_quantization():
+    """
+    Test rendering styles with the perceptual quantization
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_256_COLORS)
+    assert str(colorful.salmon) == '\033[38;5;216m'
+
+    colorful.quantization = colorful.QUANTIZATION_PERCEPTUAL
+    assert str(colorful.salmon) == '\033[38;5;210m'
+    assert colorful.salmon.render(terminal.ANSI_16_COLORS) == ('\033[31m', '\033[39m')
+    assert colorful.on_salmon.render(terminal.ANSI_8_COLORS) == ('\033[41m', '\033[49m')
+    compiled = colorful.compile_format('{c.salmon}x')
+    assert compiled.format() == '\033[38;5;210mx'
+
+    # the quantization is part of the style cache key
+    colorful.quantization = colorful.QUANTIZATION_CUBE
+    assert str(colorful.salmon) == '\033[38;5;216m'
+    assert compiled.format() == '\033[38;5;216mx'
+
+    colorful = core.Colorful(colormode=terminal.ANSI_16_COLORS,
+                             quantization=core.Colorful.QUANTIZATION_PERCEPTUAL)
+    assert str(colorful.bold_gray50) == '\033[1m\033[90m'
+
+    with pytest.raises(core.ColorfulError) as exc:
+        colorful.quantization = 'median-cut'
+    assert str(exc.value) == 'the quantization "median-cut" is unknown. Use one of cube, perceptual'
+
+
+@pytest.mark.parametrize('style, expected', [
+    ('bold', ('bold',)),
+    ('red', ((30, 'red'),)),
+    ('bold_italic_red_on_black', ('bold', 'italic', (30, 'red'), (40, 'black'))),
+    ('on_black', ((40, 'black'),)),
+])
+def test_split_style(style, expected):
+    """
+    Test splitting a style into the names of its modifiers and colors
+    """
+    assert core.split_style(style) == expected
+
+
+def test_ansi_code_index(monkeypatch):
+    """
+    Test that color names are resolved once per color palette and color mode
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_256_COLORS)
+    colorpalette = colorful.colorpalette
+
+    assert core.resolve_style('bold_red_on_black', terminal.ANSI_256_COLORS, colorpalette) == (
+        core.parse_style('bold_red_on_black', colorpalette),
+        core.render_style(core.parse_style('bold_red_on_black', colorpalette),
+                          terminal.ANSI_256_COLORS))
+    index = colorpalette.ansi_code_index(30, terminal.ANSI_256_COLORS, 'cube')
+    assert index['red'] == ((30, 255, 0, 0), ('\033[38;5;196m', '\033[39m'))
+    assert colorpalette.ansi_code_index(30, terminal.ANSI_256_COLORS, 'cube') is index
+
+    str(colorful.green)
+    colorful.use_true_colors()
+    assert str(colorful.green) == '\033[38;2;0;255;0m'
+    colorful.use_256_ansi_colors()
+    colorful._style_cache.cache_clear()
+
+    # the resolved colors are looked up in the index of the color palette
+    monkeypatch.setattr(core, 'translate_rgb_to_ansi_code', None)
+    monkeypatch.setattr(core, 'resolve_colorname_to_rgb', None)
+    assert str(colorful.green) == '\033[38;5;46m'
+    assert core.translate_colorname_to_ansi_code(
+        'red', 30, terminal.ANSI_256_COLORS, colorpalette) == ('\033[38;5;196m', '\033[39m')
+
+    # an updated color palette has its own index
+    colorful.update_palette({'green': (0, 0, 0)})
+    assert colorful.colorpalette.ansi_code_index(30, terminal.ANSI_256_COLORS, 'cube') == {}
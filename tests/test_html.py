@@ -0,0 +1,84 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import os
+
+import pytest
+
+# do not overwrite module
+os.environ['COLORFUL_NO_MODULE_OVERWRITE'] = '1'
+
+import colorful.core as core  # noqa
+import colorful.html as html  # noqa
+import colorful.terminal as terminal  # noqa
+
+
+@pytest.mark.parametrize('string, expected', [
+    ('plain <text> & more', 'plain &lt;text&gt; &amp; more'),
+    ('\033[1;31mbold red\033[0m plain', '<span class="cf-bold cf-fg-1">bold red</span> plain'),
+    # adjacent text with the same style is merged
+    ('\033[31ma\033[31mb\033[2Kc\033[39m', '<span class="cf-fg-1">abc</span>'),
+    ('\033[91;104mbright\033[0m', '<span class="cf-fg-9 cf-bg-12">bright</span>'),
+    ('\033[38;5;196;48;5;4mextended',
+     '<span class="cf-bg-4" style="color:#ff0000">extended</span>'),
+    ('\033[38;2;1;2;3mtrue\033[0m', '<span style="color:#010203">true</span>'),
+    # invalid ANSI 256 colors are ignored
+    ('\033[38;5;999;48;5;4minvalid\033[0m', '<span class="cf-bg-4">invalid</span>'),
+    ('\033[38;5;256minvalid', '<span>invalid</span>'),
+    ('\033[4;9mdecorated\033[24mstruck',
+     '<span class="cf-struckthrough cf-underlined">decorated</span>'
+     '<span class="cf-struckthrough">struck</span>'),
+    # inversed text swaps the fore- and background colors
+    ('\033[7;31minversed', '<span class="cf-fg-0 cf-bg-1">inversed</span>'),
+])
+def test_ansi_to_html(string, expected):
+    """
+    Test converting text with ANSI escape sequences to HTML
+    """
+    for size in range(1, len(string) + 1):
+        chunks = [string[i:i + size] for i in range(0, len(string), size)]
+        assert ''.join(html.ansi_to_html(chunks)) == expected
+
+
+def test_ansi_to_html_with_inline_styles():
+    """
+    Test converting text with ANSI escape sequences to HTML with inline styles
+    """
+    string = '\033[1;4;9;31;44mstyled\033[0m \033[38;5;21mblue'
+
+    assert ''.join(html.ansi_to_html([string], inline_styles=True)) == (
+        '<span style="font-weight:bold;text-decoration:line-through underline;'
+        'color:#cd0000;background-color:#0000ee">styled</span> '
+        '<span style="color:#0000ff">blue</span>')
+
+
+def test_ansi_to_html_with_color_palette():
+    """
+    Test converting the ANSI 16 colors with a color palette
+    """
+    colorful = core.Colorful(colormode=terminal.ANSI_8_COLORS)
+    colorful.use_style('solarized')
+    converter = html.HtmlConverter(inline_styles=True, colorpalette=colorful.colorpalette)
+
+    assert converter.feed(str(colorful.red('red'))) == '<span style="color:#dc322f">red'
+    assert converter.close() == '</span>'
+    assert '.cf-fg-1 { color:#dc322f }' in html.HtmlConverter(
+        colorpalette=colorful.colorpalette).stylesheet()
+    assert '.cf-fg-1 { color:#cd0000 }' in html.HtmlConverter().stylesheet()
+
+
+def test_html_converter_closes_span():
+    """
+    Test that closing the converter closes the opened span element
+    """
+    converter = html.HtmlConverter()
+
+    assert converter.feed('\033[1mbold\033[') == '<span class="cf-bold">bold'
+    assert converter.close() == '\033[</span>'
@@ -9,6 +9,8 @@ Terminal string styling done right, in Python.
 """
 
 import os
+import sys
+import subprocess
 
 import pytest
 
@@ -102,3 +104,98 @@ def test_use_styles():
         assert str(c.red) == '\033[38;2;220;50;47m'
 
     assert str(colorful.red) == '\033[31m'
+
+
+def test_import_is_cheap():
+    """
+    Test that importing colorful neither loads the default color palette
+    nor the modules which are only needed by some features
+    """
+    env = os.environ.copy()
+    env.pop('COLORFUL_NO_MODULE_OVERWRITE', None)
+
+    proc = subprocess.run(
+        [sys.executable, '-c',
+         'import sys; modules = set(sys.modules)\n'
+         'import colorful\n'
+         'print(sys.modules["colorful.core"]._default_color_palette)\n'
+         'print(sorted(set(sys.modules) - modules))'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert proc.returncode == 0, proc.stderr
+    palette, modules = proc.stdout.splitlines()
+    assert palette == 'None'
+    for module in ('colorful.output', 'colorful.parser', 'colorful.html', 'asyncio',
+                   'json', 'zlib', 'array', 'struct', 'weakref', 'platform'):
+        assert repr(module) not in modules
+
+    # the lazily imported modules are loaded on first use
+    proc = subprocess.run(
+        [sys.executable, '-c',
+         'import sys, colorful\n'
+         'colorful.from_ansi("")\n'
+         'with colorful.writer():\n'
+         '    pass\n'
+         'print(sorted(m for m in sys.modules if m.startswith("colorful.")))'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert proc.returncode == 0, proc.stderr
+    assert "'colorful.output'" in proc.stdout
+    assert "'colorful.parser'" in proc.stdout
+
+
+def test_contextmanagers_share_the_color_palette():
+    """
+    Test that the contextmanagers don't copy the color palette
+    """
+    palette = colorful.colorful.colorpalette
+
+    with colorful.with_true_colors() as c:
+        assert c.colorpalette is palette
+
+    with colorful.with_updated_palette({'testColor': (0, 0, 0)}) as c:
+        assert c.colorpalette._layers[-1] is palette._layers[-1]
+        assert 'testColor' not in palette
+
+
+def test_scoped_setup_contextmanager():
+    """
+    Test that the package level styles respect the scoped setup
+    """
+    with colorful.scoped_setup(colormode=terminal.TRUE_COLORS,
+                               colorpalette={'testColor': (1, 2, 3)}, extend_colors=True):
+        assert str(colorful.testColor) == '\033[38;2;1;2;3m'
+        assert str(colorful.black) == '\033[38;2;0;0;0m'
+
+    assert str(colorful.black) == '\033[30m'
+    with pytest.raises(ColorfulError):
+        colorful.testColor('The testColor only existed in the with block above.')
+
+
+def test_ansi_utilities(monkeypatch):
+    """
+    Test the package level ANSI utilities
+    """
+    # the original module is backed up when the module is overwritten
+    monkeypatch.setitem(sys.modules, 'colorful_orig', sys.modules['colorful'])
+
+    assert colorful.strip_ansi(colorful.red('red')) == 'red'
+    assert colorful.visible_len(colorful.format('{c.red}red{c.reset}')) == 3
+    assert list(colorful.strip_ansi_stream(['\033[3', '1mred'])) == ['red']
+
+
+def test_contextmanagers_keep_the_quantization():
+    """
+    Test that the contextmanagers use the quantization of the colorful object
+    """
+    module = colorful.__class__(
+        colorful.colorful.__class__(colormode=terminal.ANSI_8_COLORS, quantization='perceptual'),
+        'colorful')
+
+    with module.with_256_ansi_colors() as c:
+        assert str(c.salmon) == '\033[38;5;210m'
+
+    with module.with_updated_palette({'testColor': (250, 128, 114)}) as c:
+        assert c.quantization == 'perceptual'
@@ -0,0 +1,439 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import io
+import os
+import time
+import socket
+import asyncio
+import threading
+
+import pytest
+
+# do not overwrite module
+os.environ['COLORFUL_NO_MODULE_OVERWRITE'] = '1'
+
+import colorful.core as core  # noqa
+import colorful.output as output  # noqa
+import colorful.terminal as terminal  # noqa
+
+
+class CountingBytesIO(io.BytesIO):
+    """
+    Binary stream which counts its write calls
+    """
+    def __init__(self):
+        super().__init__()
+        self.write_calls = 0
+
+    def write(self, data):
+        self.write_calls += 1
+        return super().write(data)
+
+
+@pytest.fixture
+def colorful():
+    return core.Colorful(colormode=terminal.ANSI_8_COLORS)
+
+
+def test_writer_buffers_until_exit(colorful):
+    """
+    Test that the writer issues a single write for everything written in the with block
+    """
+    raw = CountingBytesIO()
+    file = io.TextIOWrapper(raw, encoding='utf-8', line_buffering=True)
+
+    with colorful.writer(file) as writer:
+        for i in range(100):
+            writer.print(colorful.red('line'), i)
+        assert raw.write_calls == 0
+
+    expected = ''.join('\033[31mline\033[39m {}\n'.format(i) for i in range(100))
+    assert raw.getvalue() == expected.encode('utf-8')
+    assert raw.write_calls == 1
+    assert writer.writes == 1
+    assert writer.bytes_written == len(expected)
+
+
+def test_writer_keeps_the_colormode_of_scoped_strings(colorful):
+    """
+    Test that the writer renders the strings created within a scoped setup for its color mode
+    """
+    with colorful.scoped_setup(colormode=terminal.NO_COLORS):
+        plain = colorful.red('x')
+
+    file = io.StringIO()
+    with colorful.writer(file) as writer:
+        writer.print(colorful.blue('a') + plain)
+    assert file.getvalue() == '\033[34ma\033[39mx\n'
+
+    file = io.StringIO()
+    with colorful.writer(file, colormode=terminal.ANSI_8_COLORS) as writer:
+        writer.print(plain)
+    assert file.getvalue() == '\033[31mx\033[39m\n'
+
+
+def test_writer_translates_newlines(colorful):
+    """
+    Test that the writer writes through the text layer which translates the newlines
+    """
+    raw = CountingBytesIO()
+    file = io.TextIOWrapper(raw, encoding='utf-8', newline='\r\n')
+
+    with colorful.writer(file, colormode=terminal.NO_COLORS) as writer:
+        writer.print(colorful.red('zwölf'))
+        writer.print('line')
+
+    assert raw.getvalue() == 'zwölf\r\nline\r\n'.encode('utf-8')
+    # the characters are counted, not the encoded and translated bytes
+    assert writer.bytes_written == len('zwölf\nline\n')
+
+
+@pytest.mark.parametrize('options, expected_writes', [
+    ({'buffer_size': 20}, 5),
+    ({'max_lines': 3}, 4),
+    ({'flush_interval': 0}, 10),
+])
+def test_writer_flush_conditions(colorful, options, expected_writes):
+    """
+    Test that the writer flushes when the buffer is full, has enough lines or is too old
+    """
+    file = io.StringIO()
+
+    with colorful.writer(file, **options) as writer:
+        for _ in range(10):
+            writer.write('123456789\n')
+
+    assert file.getvalue() == '123456789\n' * 10
+    assert writer.writes == expected_writes
+
+
+def test_writer_explicit_flush(colorful):
+    """
+    Test flushing the writer explicitly
+    """
+    file = io.StringIO()
+
+    with colorful.writer(file) as writer:
+        writer.write(colorful.bold('a'))
+        writer.flush()
+        assert file.getvalue() == '\033[1ma\033[22m'
+        writer.flush()
+
+    assert writer.writes == 1
+
+
+def test_writer_renders_for_color_mode(colorful):
+    """
+    Test that the writer renders for the given color mode
+    """
+    file = io.StringIO()
+
+    with colorful.writer(file, colormode=terminal.NO_COLORS) as writer:
+        writer.print(colorful.red('a'), colorful.blue('b'), sep='-')
+
+    with colorful.writer(file, minimal=True) as writer:
+        writer.write(colorful.red('a') + colorful.red('b'))
+
+    assert file.getvalue() == 'a-b\n\033[31mab\033[0m'
+
+
+def test_writer_keeps_order_with_text_layer(colorful):
+    """
+    Test that the writer keeps the order with data written to the text layer of the file
+    """
+    raw = io.BytesIO()
+    file = io.TextIOWrapper(raw, encoding='utf-8')
+
+    with colorful.writer(file) as writer:
+        file.write('before ')
+        writer.write('writer')
+
+    assert raw.getvalue() == b'before writer'
+
+
+class BlockingStringIO(io.StringIO):
+    """
+    Text stream which blocks every write until it's released
+    """
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+        self.write_calls = 0
+
+    def write(self, data):
+        self.released.wait()
+        self.write_calls += 1
+        return super().write(data)
+
+
+def test_background_writer_coalesces_writes(colorful):
+    """
+    Test that the background writer writes the queued strings in order and coalesces them
+    """
+    file = BlockingStringIO()
+
+    with colorful.background_writer(file) as writer:
+        for i in range(100):
+            writer.print(colorful.red('line'), i)
+        file.released.set()
+        writer.flush()
+        assert file.write_calls < 100
+
+    expected = ''.join('\033[31mline\033[39m {}\n'.format(i) for i in range(100))
+    assert file.getvalue() == expected
+    assert writer.writes == file.write_calls
+    assert writer.bytes_written == len(expected)
+
+
+def test_background_writer_drops_on_overflow(colorful):
+    """
+    Test that the background writer drops writes if its queue is full
+    """
+    file = BlockingStringIO()
+
+    writer = colorful.background_writer(file, max_queue_size=2, overflow='drop')
+    for i in range(10):
+        writer.write('{}\n'.format(i))
+    assert writer.dropped >= 7
+
+    file.released.set()
+    writer.close()
+
+    assert len(file.getvalue().splitlines()) == 10 - writer.dropped
+
+
+def test_background_writer_close(colorful):
+    """
+    Test that closing the background writer writes the queued strings and stops writing
+    """
+    file = io.StringIO()
+
+    writer = colorful.background_writer(file, colormode=terminal.NO_COLORS)
+    writer.write(colorful.red('a'))
+    writer.close()
+    writer.close()
+
+    assert file.getvalue() == 'a'
+    with pytest.raises(core.ColorfulError):
+        writer.write('b')
+
+
+def test_background_writer_close_races_writes(colorful):
+    """
+    Test that no string is queued after the background writer is closed
+    """
+    file = io.StringIO()
+    writer = colorful.background_writer(file, max_queue_size=4)
+    queued = []
+
+    def write_lines():
+        for i in range(1000):
+            try:
+                writer.write('{}\n'.format(i))
+            except core.ColorfulError:
+                return
+            queued.append(i)
+
+    threads = [threading.Thread(target=write_lines) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    writer.close()
+    for thread in threads:
+        thread.join()
+
+    writer.flush()
+    assert len(file.getvalue().splitlines()) == len(queued)
+
+
+def test_background_writer_close_with_timeout(colorful):
+    """
+    Test that closing the background writer with a timeout drops the strings of a stalled file
+    """
+    file = BlockingStringIO()
+    writer = colorful.background_writer(file, max_queue_size=2, overflow='drop')
+    for i in range(10):
+        writer.write('{}\n'.format(i))
+
+    started = time.monotonic()
+    writer.close(timeout=0.1)
+    assert time.monotonic() - started < 1
+    assert writer.dropped >= 8
+
+    file.released.set()
+    writer._thread.join(1)
+    assert not writer._thread.is_alive()
+    assert len(file.getvalue().splitlines()) == 10 - writer.dropped
+    writer.flush()
+
+
+def test_background_writer_closed_at_exit(colorful):
+    """
+    Test that the open background writers are closed at interpreter exit
+    """
+    file = io.StringIO()
+    writer = colorful.background_writer(file)
+    assert writer in output._background_writers
+
+    writer.write('a')
+    output._close_background_writers()
+
+    assert writer not in output._background_writers
+    assert file.getvalue() == 'a'
+    with pytest.raises(core.ColorfulError):
+        writer.write('b')
+
+
+def test_background_writer_raises_write_errors(colorful):
+    """
+    Test that errors of the background thread are raised when flushing
+    """
+    file = io.StringIO()
+    file.close()
+
+    writer = colorful.background_writer(file)
+    writer.write('a')
+    with pytest.raises(ValueError):
+        writer.flush()
+    writer.close()
+
+
+def test_background_writer_unknown_overflow_policy(colorful):
+    """
+    Test that an unknown overflow policy is rejected
+    """
+    with pytest.raises(core.ColorfulError) as exc:
+        colorful.background_writer(io.StringIO(), overflow='ignore')
+
+    assert str(exc.value).startswith('the overflow policy "ignore" is unknown')
+
+
+def test_async_writer_batches_writes_of_many_tasks(colorful):
+    """
+    Test that the async writer batches the writes of many tasks into a single write
+    """
+    async def main():
+        server_socket, client_socket = socket.socketpair()
+        _, stream = await asyncio.open_connection(sock=client_socket)
+
+        async with colorful.async_writer(stream) as writer:
+            await asyncio.gather(*(writer.print(colorful.red('task'), i) for i in range(100)))
+
+        stream.close()
+        await stream.wait_closed()
+
+        data = b''
+        while True:
+            chunk = server_socket.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        server_socket.close()
+        return writer, data
+
+    writer, data = asyncio.run(main())
+
+    expected = ''.join('\033[31mtask\033[39m {}\n'.format(i) for i in range(100))
+    assert data == expected.encode('utf-8')
+    assert writer.writes == 1
+    assert writer.bytes_written == len(expected)
+
+
+def test_async_writer_for_file(colorful):
+    """
+    Test that the async writer writes to a file stream from the default executor
+    """
+    file = io.StringIO()
+
+    async def main():
+        async with colorful.async_writer(file, buffer_size=10) as writer:
+            for i in range(100):
+                await writer.print(colorful.blue('line'), i)
+        return writer
+
+    writer = asyncio.run(main())
+
+    expected = ''.join('\033[34mline\033[39m {}\n'.format(i) for i in range(100))
+    assert file.getvalue() == expected
+    assert writer.bytes_written == len(expected)
+
+
+def test_async_writer_raises_write_errors(colorful):
+    """
+    Test that errors of executor writes are raised when draining
+    """
+    file = io.StringIO()
+    file.close()
+
+    async def main():
+        writer = colorful.async_writer(file)
+        writer.write('a')
+        await writer.drain()
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
+
+
+def test_aprint(colorful):
+    """
+    Test printing from many tasks without blocking the event loop
+    """
+    file = io.StringIO()
+
+    async def print_line(i):
+        await colorful.aprint('{c.red}line{c.close_fg_color}', str(i), file=file)
+
+    async def main():
+        await asyncio.gather(*(print_line(i) for i in range(10)))
+        await colorful.aprint('done', file=file, flush=True)
+
+    asyncio.run(main())
+
+    expected = ''.join('\033[31mline\033[39m {}\n'.format(i) for i in range(10)) + 'done\n'
+    assert file.getvalue() == expected
+
+
+def test_aprint_drops_the_writers_of_finished_event_loops(colorful):
+    """
+    Test that the async writers used by aprint don't keep their event loops alive
+    """
+    import gc
+
+    file = io.StringIO()
+
+    async def print_to_file():
+        await colorful.aprint('line', file=file, flush=True)
+
+    async def print_to_stream(stream):
+        await colorful.aprint('line', file=stream, flush=True)
+
+    for _ in range(5):
+        asyncio.run(print_to_file())
+    gc.collect()
+    assert len(output._async_writers) == 0
+    assert file.getvalue() == 'line\n' * 5
+
+    # the streams keep their event loops alive until they are closed
+    sockets = []
+    for _ in range(5):
+        async def main():
+            server_socket, client_socket = socket.socketpair()
+            sockets.extend((server_socket, client_socket))
+            _, stream = await asyncio.open_connection(sock=client_socket)
+            await print_to_stream(stream)
+            stream.close()
+            await stream.wait_closed()
+
+        asyncio.run(main())
+    gc.collect()
+    assert len(output._async_writers) <= 1
+
+    for sock in sockets:
+        sock.close()
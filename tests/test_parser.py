@@ -0,0 +1,135 @@
+"""
+colorful
+~~~~~~~~
+
+Terminal string styling done right, in Python.
+
+:copyright: (c) 2017 by Timo Furrer <tuxtimo@gmail.com>
+:license: MIT, see LICENSE for more details.
+"""
+
+import os
+
+import pytest
+
+# do not overwrite module
+os.environ['COLORFUL_NO_MODULE_OVERWRITE'] = '1'
+
+import colorful.core as core  # noqa
+import colorful.parser as parser  # noqa
+import colorful.terminal as terminal  # noqa
+
+
+def test_parse_ansi():
+    """
+    Test parsing text with ANSI escape sequences into styled segments
+    """
+    segments = list(parser.parse_ansi(['\033[1;3', '1mbold red\033[22m red\033[2K\033[0m plain']))
+
+    assert [(text, escape) for text, _, escape in segments] == [
+        ('bold red', False), (' red', False), ('\033[2K', True), (' plain', False)]
+    assert segments[0].style.state == (frozenset({1}), ('31',), None, ())
+    assert segments[1].style.state == segments[2].style.state == (frozenset(), ('31',), None, ())
+    assert segments[3].style.state == core.ansi.DEFAULT_SGR_STATE
+
+
+def test_parser_keeps_state_across_chunks():
+    """
+    Test that the parser keeps the SGR state and incomplete escape sequences across chunks
+    """
+    ansi_parser = parser.AnsiParser()
+
+    assert ansi_parser.feed('\033[4') == []
+    assert ansi_parser.feed('4ma\033') == [('a', parser.AnsiStyle(
+        (frozenset(), None, ('44',), ())), False)]
+    assert ansi_parser.feed('[1mb') == [('b', parser.AnsiStyle(
+        (frozenset({1}), None, ('44',), ())), False)]
+    assert ansi_parser.feed('c\033[') == [('c', parser.AnsiStyle(
+        (frozenset({1}), None, ('44',), ())), False)]
+    assert ansi_parser.close() == [('\033[', parser.AnsiStyle(
+        (frozenset({1}), None, ('44',), ())), False)]
+
+
+@pytest.mark.parametrize('color, colormode, expected', [
+    (None, terminal.TRUE_COLORS, None),
+    (('31',), terminal.NO_COLORS, None),
+    (('31',), terminal.ANSI_8_COLORS, ('31',)),
+    (('91',), terminal.ANSI_8_COLORS, ('31',)),
+    (('101',), terminal.ANSI_8_COLORS, ('41',)),
+    (('91',), terminal.ANSI_16_COLORS, ('91',)),
+    (('91',), terminal.TRUE_COLORS, ('91',)),
+    (('38', '5', '196'), terminal.ANSI_256_COLORS, ('38', '5', '196')),
+    (('38', '5', '196'), terminal.ANSI_16_COLORS, ('31',)),
+    (('48', '5', '9'), terminal.ANSI_16_COLORS, ('101',)),
+    (('48', '5', '9'), terminal.ANSI_8_COLORS, ('41',)),
+    (('38', '2', '255', '0', '0'), terminal.TRUE_COLORS, ('38', '2', '255', '0', '0')),
+    (('38', '2', '255', '0', '0'), terminal.ANSI_256_COLORS, ('38', '5', '196')),
+    (('48', '2', '0', '0', '255'), terminal.ANSI_8_COLORS, ('44',)),
+])
+def test_downgrade_sgr_color(color, colormode, expected):
+    """
+    Test downgrading SGR colors to color modes
+    """
+    assert parser.downgrade_sgr_color(color, colormode) == expected
+
+
+@pytest.mark.parametrize('colormode, expected', [
+    (terminal.NO_COLORS, 'bold red plain x'),
+    (terminal.ANSI_8_COLORS, '\033[1;31mbold red\033[0m plain \033[3;44mx\033[0m'),
+    (terminal.ANSI_256_COLORS,
+     '\033[1;38;5;196mbold red\033[0m plain \033[3;48;5;21mx\033[0m'),
+    (terminal.TRUE_COLORS,
+     '\033[1;38;2;255;0;0mbold red\033[0m plain \033[3;48;2;0;0;255mx\033[0m'),
+])
+def test_render_ansi(colormode, expected):
+    """
+    Test rendering text with ANSI escape sequences for another color mode
+    """
+    colorful = core.Colorful(colormode=terminal.TRUE_COLORS)
+    string = str(colorful.bold_red('bold red') + ' plain ' + colorful.on_blue(colorful.italic('x')))
+
+    for size in range(1, len(string) + 1):
+        chunks = [string[i:i + size] for i in range(0, len(string), size)]
+        assert ''.join(parser.render_ansi(chunks, colormode)) == expected
+
+
+def test_render_ansi_syncs_state_before_escape_sequences():
+    """
+    Test that escape sequences are rendered with the SGR state they were applied with
+    """
+    string = '\033[44m\033[K\033[0m\033[2Ka\033[1m'
+
+    assert ''.join(parser.render_ansi([string], terminal.ANSI_16_COLORS)) == \
+        '\033[44m\033[K\033[0m\033[2Ka'
+    assert ''.join(parser.render_ansi([string], terminal.NO_COLORS)) == 'a'
+
+
+def test_colorfulstring_from_ansi():
+    """
+    Test creating a ColorfulString from a string with ANSI escape sequences
+    """
+    colorful = core.Colorful(colormode=terminal.TRUE_COLORS)
+    string = str(colorful.bold_red('bold red') + ' plain ' + colorful.on_blue('x')) + '\033[2K'
+
+    s = colorful.from_ansi(string)
+
+    assert len(s) == len('bold red plain x')
+    assert s.orig_string == 'bold red plain x'
+    assert s.render(terminal.ANSI_8_COLORS) == \
+        '\033[1;31mbold red\033[22;39m plain \033[44mx\033[49m\033[2K'
+    assert s.render(terminal.TRUE_COLORS, minimal=True) == ''.join(
+        parser.render_ansi([string], terminal.TRUE_COLORS))
+    assert str(colorful.green(s)) == '\033[38;2;0;255;0m{}\033[39m'.format(str(s))
+
+
+def test_parser_style_cache_eviction(monkeypatch):
+    """
+    Test that the parser tracks the SGR state correctly when its style cache is evicted
+    """
+    string = ''.join('\033[{};{}m{}\033[1m'.format(30 + i % 8, 40 + i // 8 % 8, i)
+                     for i in range(200))
+    expected = [(text, style.state) for text, style, _ in parser.parse_ansi([string])]
+
+    monkeypatch.setattr(parser, 'MAX_CACHED_STYLES', 3)
+
+    assert [(text, style.state) for text, style, _ in parser.parse_ansi([string])] == expected
@@ -51,3 +51,27 @@ def test_hex_to_rgb_error(hex_error_value):
     """
     with pytest.raises(ValueError):
         utils.hex_to_rgb(hex_error_value)
+
+
+@pytest.mark.parametrize('rgb, expected', [
+    ((0, 0, 0), (0.0, 0.0, 0.0)),
+    ((255, 255, 255), (100.0, 0.0, 0.0)),
+    ((255, 0, 0), (53.24, 80.09, 67.20)),
+    ((0, 0, 255), (32.30, 79.19, -107.86)),
+    ((128, 128, 128), (53.59, 0.0, 0.0)),
+])
+def test_rgb_to_lab_conversion(rgb, expected):
+    """
+    Test the conversion from a RGB channel triplet to the CIELAB color space
+    """
+    assert utils.rgb_to_lab(*rgb) == pytest.approx(expected, abs=0.01)
+
+
+def test_rgb_to_lab_conversion_of_float_channels():
+    """
+    Test the conversion of RGB channel triplets with float channel values to the CIELAB color space
+    """
+    assert utils.rgb_to_lab(255.0, 0.0, 0.0) == pytest.approx(utils.rgb_to_lab(255, 0, 0))
+    assert utils.rgb_to_lab(12.5, 3, 4) == pytest.approx(
+        tuple((a + b) / 2 for a, b in zip(utils.rgb_to_lab(12, 3, 4), utils.rgb_to_lab(13, 3, 4))),
+        abs=0.1)